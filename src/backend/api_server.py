@@ -39,6 +39,8 @@ from fastapi.responses import FileResponse, JSONResponse
 import tempfile
 import shutil
 import sys
+import threading
+from collections import OrderedDict
 from typing import Optional
 
 # Add the backend directory to path for imports
@@ -47,12 +49,18 @@ sys.path.insert(0, str(Path(__file__).parent))
 # Import local modules (works both as package and standalone)
 try:
     from .pipeline import Pipeline
-    from .config import OUTPUT_DIR
+    from .config import OUTPUT_DIR, REGION_OCR_DPI, REGION_INDEX_CACHE_SIZE
     from .confidence_scorer import add_confidence_scores
+    from .pdf_cache import compute_file_hash
+    from .tesseract_pool import get_tesseract_pool
+    from .spatial_index import words_to_text
 except ImportError:
     from pipeline import Pipeline
-    from config import OUTPUT_DIR
+    from config import OUTPUT_DIR, REGION_OCR_DPI, REGION_INDEX_CACHE_SIZE
     from confidence_scorer import add_confidence_scores
+    from pdf_cache import compute_file_hash
+    from tesseract_pool import get_tesseract_pool
+    from spatial_index import words_to_text
 
 from fastapi.staticfiles import StaticFiles
 
@@ -169,6 +177,35 @@ app.add_middleware(
 # Initialize pipeline
 pipeline = None
 
+# Word-box index per (PDF hash, page): each page is OCR'd once, later
+# rectangles on it are index lookups
+_page_indexes: "OrderedDict" = OrderedDict()
+_page_indexes_lock = threading.Lock()
+
+# Pipeline response of the PDF whose CSVs are in output/single: more
+# rectangles on the same upload don't re-run the whole extraction
+_last_pipeline = {"hash": None, "response": None}
+
+
+def get_page_index(pdf_path: Path, page: int, pdf_hash: Optional[str] = None):
+    """PageIndex of one PDF page in PDF points (72 dpi), cached LRU"""
+    key = (pdf_hash or compute_file_hash(pdf_path), page)
+    with _page_indexes_lock:
+        if key in _page_indexes:
+            _page_indexes.move_to_end(key)
+            return _page_indexes[key]
+
+    from pdf2image import convert_from_path
+
+    images = convert_from_path(pdf_path, dpi=REGION_OCR_DPI, first_page=page, last_page=page)
+    _, index = get_tesseract_pool().ocr_page(images[0], page, scale=72 / REGION_OCR_DPI)
+
+    with _page_indexes_lock:
+        _page_indexes[key] = index
+        while len(_page_indexes) > REGION_INDEX_CACHE_SIZE:
+            _page_indexes.popitem(last=False)
+    return index
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize pipeline on startup"""
@@ -176,6 +213,12 @@ async def startup_event():
     pipeline = Pipeline()
     print("✅ Pipeline initialized")
 
+    # Warm up Docling/OCR models off the event loop so the first request
+    # doesn't wait for them and /health stays responsive
+    if hasattr(pipeline.extractor, "warm_up_in_background"):
+        pipeline.extractor.warm_up_in_background()
+        print("🔥 Docling warm-up started in background")
+
 @app.get("/")
 async def root():
     """Serve frontend HTML"""
@@ -187,9 +230,11 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    warmup = getattr(pipeline.extractor, "warmup_status", None) if pipeline else None
     return {
         "status": "healthy",
-        "pipeline": "ready" if pipeline else "not initialized"
+        "pipeline": "ready" if pipeline else "not initialized",
+        "warmup": warmup or {"status": "not required"}
     }
 
 @app.post("/extract_region")
@@ -236,53 +281,76 @@ async def extract_region(
             print(f"   Region: ({x}, {y}) size: {w}x{h}")
             print(f"   Page: {page}, Scale: {scale}")
 
-            # Run pipeline on single PDF
-            # Use default IDs for single file processing
-            result = pipeline.process_single_pdf(
-                processing_path,
-                submitter_id=1,  # Default ID for single file upload
-                nacc_id=1        # Default ID for single file upload
-            )
-
-            # Clean up compressed file if created (disabled for now)
-            # if compressed_path and compressed_path != tmp_path:
-            #     try:
-            #         compressed_path.unlink()
-            #     except:
-            #         pass
-
-            # Get output directory
-            output_dir = OUTPUT_DIR / "single"
-
-            # Find generated CSVs
-            csv_files = list(output_dir.glob("*.csv"))
-            csv_names = [f.name for f in csv_files]
-
-            # Add confidence scores to result
-            scored_result = add_confidence_scores(result) if result else {}
-
-            return JSONResponse({
-                "success": True,
-                "message": f"Processed {file.filename} successfully",
-                "region": {
-                    "x": x,
-                    "y": y,
-                    "width": w,
-                    "height": h,
-                    "page": page
-                },
-                "output": {
-                    "csv_files": csv_names,
-                    "count": len(csv_files)
-                },
-                "data": scored_result.get("data", result) if result else {},
-                "confidence": {
-                    "overall": scored_result.get("overall_confidence", 0.0),
-                    "field_stats": scored_result.get("field_count", {}),
-                    "low_confidence_fields": scored_result.get("low_confidence_fields", []),
-                    "warnings": scored_result.get("validation_warnings", [])
+            # Words inside the rectangle (viewer pixels at `scale` -> PDF points)
+            pdf_hash = compute_file_hash(processing_path)
+            region_words = []
+            try:
+                page_index = get_page_index(processing_path, page, pdf_hash)
+                region_box = (x / scale, y / scale, (x + w) / scale, (y + h) / scale)
+                region_words = page_index.query(region_box)
+            except Exception as e:
+                print(f"   ⚠️ Region OCR failed: {e}")
+
+            # The document is extracted once per upload; another rectangle on
+            # the same PDF reuses the result (and its CSVs in output/single)
+            if _last_pipeline["hash"] == pdf_hash:
+                print(f"   ♻️ Reusing extraction of {file.filename}")
+                response = dict(_last_pipeline["response"])
+            else:
+                # Run pipeline on single PDF
+                # Use default IDs for single file processing
+                result = pipeline.process_single_pdf(
+                    processing_path,
+                    submitter_id=1,  # Default ID for single file upload
+                    nacc_id=1        # Default ID for single file upload
+                )
+
+                # Clean up compressed file if created (disabled for now)
+                # if compressed_path and compressed_path != tmp_path:
+                #     try:
+                #         compressed_path.unlink()
+                #     except:
+                #         pass
+
+                # Get output directory
+                output_dir = OUTPUT_DIR / "single"
+
+                # Find generated CSVs
+                csv_files = list(output_dir.glob("*.csv"))
+                csv_names = [f.name for f in csv_files]
+
+                # Add confidence scores to result
+                scored_result = add_confidence_scores(result) if result else {}
+
+                response = {
+                    "success": True,
+                    "message": f"Processed {file.filename} successfully",
+                    "output": {
+                        "csv_files": csv_names,
+                        "count": len(csv_files)
+                    },
+                    "data": scored_result.get("data", result) if result else {},
+                    "confidence": {
+                        "overall": scored_result.get("overall_confidence", 0.0),
+                        "field_stats": scored_result.get("field_count", {}),
+                        "low_confidence_fields": scored_result.get("low_confidence_fields", []),
+                        "warnings": scored_result.get("validation_warnings", [])
+                    },
+                    "usage": pipeline.last_usage or {}
                 }
-            })
+                _last_pipeline.update(hash=pdf_hash if result else None, response=response)
+                response = dict(response)
+
+            response["region"] = {
+                "x": x,
+                "y": y,
+                "width": w,
+                "height": h,
+                "page": page,
+                "text": words_to_text(region_words),
+                "words": region_words
+            }
+            return JSONResponse(response)
 
         finally:
             # Clean up temporary file
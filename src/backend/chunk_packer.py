@@ -0,0 +1,149 @@
+"""
+Token-aware Chunk Packer - Size legacy Gemini chunks by content, not page count
+
+Pages arrive one at a time from OCR. Each page's input tokens are
+estimated from its text length and its output tokens from the number of
+data rows (lines with amounts) it holds. Pages are packed into a chunk
+until either budget would be exceeded, and a chunk is closed early where
+a new form section starts. Nearly empty pages share a call; dense asset
+pages get their own so the JSON answer fits in max_output_tokens.
+"""
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .prompt_compactor import CHARS_PER_TOKEN_ESTIMATE
+    from .config import (
+        CHUNK_INPUT_TOKEN_BUDGET,
+        CHUNK_OUTPUT_TOKEN_BUDGET,
+        OUTPUT_TOKENS_PER_ROW,
+    )
+except ImportError:
+    from prompt_compactor import CHARS_PER_TOKEN_ESTIMATE
+    from config import (
+        CHUNK_INPUT_TOKEN_BUDGET,
+        CHUNK_OUTPUT_TOKEN_BUDGET,
+        OUTPUT_TOKENS_PER_ROW,
+    )
+
+
+# Lines that produce JSON rows: amounts ("1,234,567.00") or dated entries
+_DATA_ROW = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+\.\d{2}\b|\d{1,2}/\d{1,2}/\d{4}")
+
+# Headings that start a new form section (ส่วนที่ ..., numbered section titles)
+SECTION_START = re.compile(
+    r"^\s*(?:ส่วนที่|\(?\d{1,2}[.)]\s*(?:ข้อมูล|รายได้|รายจ่าย|ภาษี|ทรัพย์สิน|หนี้สิน|"
+    r"เงินสด|เงินฝาก|เงินลงทุน|เงินให้กู้ยืม|ที่ดิน|โรงเรือน|ยานพาหนะ|สิทธิ|บุตร|บิดา))",
+    re.MULTILINE,
+)
+
+# Fixed per-chunk output overhead (JSON skeleton, spouse info, positions)
+OUTPUT_BASE_TOKENS = 300
+
+
+def estimate_input_tokens(text: str) -> int:
+    """Input tokens of OCR text (character estimate)"""
+    return int(len(text) / CHARS_PER_TOKEN_ESTIMATE)
+
+
+def estimate_output_tokens(text: str) -> int:
+    """Output tokens needed for the JSON rows a page produces"""
+    rows = sum(1 for line in text.split("\n") if _DATA_ROW.search(line))
+    return rows * OUTPUT_TOKENS_PER_ROW
+
+
+def is_truncated(response: Any) -> bool:
+    """True if Gemini stopped because it hit max_output_tokens"""
+    try:
+        finish_reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError):
+        return False
+    return "MAX_TOKENS" in str(getattr(finish_reason, "name", finish_reason)) or finish_reason == 2
+
+
+class ChunkPacker:
+    """
+    Pack OCR pages into chunks within input/output token budgets.
+
+    add_page() returns a finished chunk whenever the new page does not fit
+    or starts a new section; flush() returns the last one. A chunk is a
+    list of (page_num, text) tuples.
+    """
+
+    def __init__(
+        self,
+        input_budget: int = CHUNK_INPUT_TOKEN_BUDGET,
+        output_budget: int = CHUNK_OUTPUT_TOKEN_BUDGET,
+    ):
+        """
+        Initialize packer
+
+        Args:
+            input_budget: Max estimated OCR-text tokens per chunk
+            output_budget: Max estimated JSON output tokens per chunk
+        """
+        self.input_budget = input_budget
+        self.output_budget = output_budget
+        self._pages: List[Tuple[int, str]] = []
+        self._input = 0
+        self._output = OUTPUT_BASE_TOKENS
+
+    def _take(self) -> Optional[List[Tuple[int, str]]]:
+        chunk = self._pages or None
+        self._pages = []
+        self._input = 0
+        self._output = OUTPUT_BASE_TOKENS
+        return chunk
+
+    def add_page(self, page_num: int, text: str) -> Optional[List[Tuple[int, str]]]:
+        """
+        Add one page.
+
+        Returns:
+            The previous chunk if this page could not join it, else None
+        """
+        page_input = estimate_input_tokens(text)
+        page_output = estimate_output_tokens(text)
+
+        ready = None
+        if self._pages:
+            over_budget = (
+                self._input + page_input > self.input_budget
+                or self._output + page_output > self.output_budget
+            )
+            # Close at a section start once the chunk is reasonably full
+            section_break = bool(SECTION_START.search(text)) and (
+                self._input > self.input_budget / 2 or self._output > self.output_budget / 2
+            )
+            if over_budget or section_break:
+                ready = self._take()
+
+        self._pages.append((page_num, text))
+        self._input += page_input
+        self._output += page_output
+        return ready
+
+    def flush(self) -> Optional[List[Tuple[int, str]]]:
+        """Return the last (partial) chunk"""
+        return self._take()
+
+
+def split_chunk(pages: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+    """Split a truncated multi-page chunk in half (preferring a section start)"""
+    if len(pages) < 2:
+        return [pages]
+
+    middle = len(pages) // 2
+    starts = [i for i, (_, text) in enumerate(pages) if i > 0 and SECTION_START.search(text)]
+    if starts:
+        middle = min(starts, key=lambda i: abs(i - middle))
+    return [pages[:middle], pages[middle:]]
+
+
+def empty_chunk_stats() -> Dict:
+    """Zeroed chunking counters"""
+    return {"pages": 0, "chunks": 0, "calls": 0, "truncated": 0, "resplit": 0}
@@ -41,6 +41,7 @@ class ConfidenceScorer:
             "validation_warnings": [],
             "low_confidence_fields": [],
             "overall_confidence": 0.0,
+            "section_confidence": {},  # Mean field score per section
             "field_count": {
                 "total": 0,
                 "high_confidence": 0,  # >= 0.9
@@ -53,13 +54,13 @@ class ConfidenceScorer:
         if "submitter" in data and data["submitter"]:
             submitter_scores = self._score_person(data["submitter"], "submitter")
             result["confidence_scores"]["submitter"] = submitter_scores
-            self._update_stats(result, submitter_scores)
+            self._update_stats(result, submitter_scores, "submitter")
 
         # Score spouse
         if "spouse" in data and data["spouse"]:
             spouse_scores = self._score_person(data["spouse"], "spouse")
             result["confidence_scores"]["spouse"] = spouse_scores
-            self._update_stats(result, spouse_scores)
+            self._update_stats(result, spouse_scores, "spouse")
 
         # Score relatives
         if "relatives" in data and data["relatives"]:
@@ -67,7 +68,7 @@ class ConfidenceScorer:
             for i, relative in enumerate(data["relatives"]):
                 rel_score = self._score_person(relative, f"relative_{i}")
                 relatives_scores.append(rel_score)
-                self._update_stats(result, rel_score)
+                self._update_stats(result, rel_score, "relatives")
             result["confidence_scores"]["relatives"] = relatives_scores
 
         # Score positions
@@ -76,7 +77,7 @@ class ConfidenceScorer:
             for i, pos in enumerate(data["submitter_positions"]):
                 p_score = self._score_position(pos, f"position_{i}")
                 pos_scores.append(p_score)
-                self._update_stats(result, p_score)
+                self._update_stats(result, p_score, "submitter_positions")
             result["confidence_scores"]["submitter_positions"] = pos_scores
 
         # Score assets
@@ -85,7 +86,7 @@ class ConfidenceScorer:
             for i, asset in enumerate(data["assets"]):
                 a_score = self._score_asset(asset, f"asset_{i}")
                 asset_scores.append(a_score)
-                self._update_stats(result, a_score)
+                self._update_stats(result, a_score, "assets")
             result["confidence_scores"]["assets"] = asset_scores
 
         # Score statements
@@ -94,9 +95,13 @@ class ConfidenceScorer:
             for i, stmt in enumerate(data["statements"]):
                 s_score = self._score_statement(stmt, f"statement_{i}")
                 stmt_scores.append(s_score)
-                self._update_stats(result, s_score)
+                self._update_stats(result, s_score, "statements")
             result["confidence_scores"]["statements"] = stmt_scores
 
+        # Average per section (used to trigger targeted re-extraction)
+        for section, (total, count) in result.pop("_section_sums", {}).items():
+            result["section_confidence"][section] = total / count if count else 0.0
+
         # Calculate overall confidence
         if result["field_count"]["total"] > 0:
             result["overall_confidence"] = (
@@ -319,11 +324,15 @@ class ConfidenceScorer:
         except (ValueError, TypeError):
             return 0.10  # Parse error
 
-    def _update_stats(self, result: Dict, field_scores: Dict):
+    def _update_stats(self, result: Dict, field_scores: Dict, section: str = ""):
         """Update field count statistics"""
+        section_sums = result.setdefault("_section_sums", {})
         for field, score in field_scores.items():
             result["field_count"]["total"] += 1
 
+            total, count = section_sums.get(section, (0.0, 0))
+            section_sums[section] = (total + score, count + 1)
+
             if score >= 0.9:
                 result["field_count"]["high_confidence"] += 1
             elif score >= 0.7:
@@ -334,6 +343,7 @@ class ConfidenceScorer:
                 # Track low confidence fields
                 result["low_confidence_fields"].append({
                     "field": field,
+                    "section": section,
                     "confidence": score
                 })
 
@@ -57,6 +57,7 @@ GEMINI_MODEL = "gemini-2.5-flash"  # Latest Gemini 2.5 Flash
 # Extraction Method Configuration
 USE_VISION = os.getenv("USE_VISION", "false").lower() == "true"  # Gemini Vision API (fast & accurate)
 USE_DOCLING = os.getenv("USE_DOCLING", "true").lower() == "true"  # Docling OCR (slower, for comparison)
+USE_OFFLINE = os.getenv("USE_OFFLINE", "false").lower() == "true"  # Tesseract + pattern scanner, no API calls (bulk triage)
 DOCLING_OCR_BACKEND = "easyocr"  # EasyOCR for Thai language support
 
 # Imputation Configuration
@@ -126,3 +127,103 @@ MAX_RETRIES = 3
 TEMPERATURE = 0.1  # Low temperature for consistent extraction
 TOP_P = 0.95
 TOP_K = 40
+
+# Request hedging for Gemini calls (cuts tail latency on stalled requests)
+USE_HEDGING = os.getenv("USE_HEDGING", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))  # Fire duplicate after this latency percentile
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))  # Samples per request class before percentile is trusted
+HEDGE_MAX_EXTRA_RATIO = float(os.getenv("HEDGE_MAX_EXTRA_RATIO", "0.1"))  # Max 10% extra requests
+# Fixed hedge delay while a request class is warming up - well above a normal call (0 = don't hedge yet)
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "90")) or None
+
+# Token and cost accounting (gemini-2.5-flash list prices, USD per 1M tokens)
+GEMINI_INPUT_PRICE_PER_M = float(os.getenv("GEMINI_INPUT_PRICE_PER_M", "0.30"))
+GEMINI_OUTPUT_PRICE_PER_M = float(os.getenv("GEMINI_OUTPUT_PRICE_PER_M", "2.50"))
+GEMINI_TOKENS_PER_IMAGE = 258  # Estimate used when the API gives no modality breakdown
+DOC_TOKEN_BUDGET = int(os.getenv("DOC_TOKEN_BUDGET", "0"))  # Max tokens per document (0 = unlimited)
+
+# Confidence-triggered re-extraction of weak sections
+USE_REFINEMENT = os.getenv("USE_REFINEMENT", "true").lower() == "true"
+REFINE_CONFIDENCE_THRESHOLD = float(os.getenv("REFINE_CONFIDENCE_THRESHOLD", "0.7"))
+REFINE_DPI = 400  # Higher DPI for re-rendered section pages (first pass uses 300)
+REFINE_SECTIONS = ["assets", "statements", "relatives", "submitter_positions"]
+
+# Typical page ranges (1-based, inclusive, None = last page) of each section
+# in the NACC declaration form - used when page text is not available
+SECTION_PAGE_HINTS = {
+    "submitter_positions": (1, 2),
+    "relatives": (2, 4),
+    "statements": (3, 6),
+    "assets": (5, None),
+}
+
+# Docling page-range parallelism (CPU hosts): number of worker processes, 0/1 = off
+DOCLING_PARALLEL_WORKERS = int(os.getenv("DOCLING_PARALLEL_WORKERS", "0"))
+
+# Persistent Docling parse cache (markdown + tables keyed by PDF hash + options)
+USE_DOCLING_CACHE = os.getenv("USE_DOCLING_CACHE", "true").lower() == "true"
+DOCLING_CACHE_DIR = Path(os.getenv("DOCLING_CACHE_DIR", str(OUTPUT_DIR / "cache" / "docling")))
+
+# Docling prompt compaction (de-duplicated tables, collapsed boilerplate, token budget)
+USE_PROMPT_COMPACTION = os.getenv("USE_PROMPT_COMPACTION", "true").lower() == "true"
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "200000"))  # Max prompt tokens per Gemini call
+BOILERPLATE_MIN_REPEATS = 3  # Non-data lines repeated this often are kept once
+
+# Deterministic parser for known NACC asset/statement tables (enables Docling table structure)
+USE_TABLE_PARSER = os.getenv("USE_TABLE_PARSER", "false").lower() == "true"
+
+# Rule-based extraction of fixed form fields (names, age, status, address)
+USE_RULE_EXTRACTION = os.getenv("USE_RULE_EXTRACTION", "true").lower() == "true"
+RULE_FIELD_PAGES = 2  # First N pages hold the submitter/spouse form fields
+
+# EasyOCR reader pool (legacy chunked extractor) - models load once per process
+EASYOCR_LANGS = ["th", "en"]
+EASYOCR_POOL_SIZE = int(os.getenv("EASYOCR_POOL_SIZE", "1"))  # Readers = concurrent OCR threads
+EASYOCR_GPU = os.getenv("EASYOCR_GPU", "false").lower() == "true"
+
+# Legacy chunked extractor: Gemini chunk requests in flight while OCR continues
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "4"))
+
+# Legacy chunked extractor: pack OCR pages into chunks by estimated token size
+CHUNK_INPUT_TOKEN_BUDGET = int(os.getenv("CHUNK_INPUT_TOKEN_BUDGET", "6000"))  # OCR text tokens per chunk
+CHUNK_OUTPUT_TOKEN_BUDGET = int(os.getenv("CHUNK_OUTPUT_TOKEN_BUDGET", "6000"))  # Expected JSON tokens (max_output_tokens is 8192)
+OUTPUT_TOKENS_PER_ROW = 60  # JSON tokens per asset/statement row seen in OCR text
+
+# Tesseract OCR (OCRExtractor) - resident engines via tesserocr, pytesseract fallback
+TESSERACT_LANG = "tha+eng"
+TESSERACT_PSM = 6
+TESSERACT_POOL_SIZE = int(os.getenv("TESSERACT_POOL_SIZE", str(os.cpu_count() or 4)))  # Engines = parallel pages
+
+# Region queries (API): OCR a page once into a word-box index, answer rectangles from it
+REGION_OCR_DPI = 200
+REGION_INDEX_CACHE_SIZE = 32  # Page indexes kept in memory (LRU by PDF hash + page)
+
+# Streaming CSV output: append each document's rows as it finishes (flat memory, crash-safe partial output)
+STREAM_CSV = os.getenv("STREAM_CSV", "false").lower() == "true"
+STREAM_FLUSH_INTERVAL = int(os.getenv("STREAM_FLUSH_INTERVAL", "10"))  # Flush CSV files every N documents
+
+# Typed outputs written next to the CSVs: "parquet" (needs pyarrow) and/or "jsonl"
+OUTPUT_FORMATS = [f.strip() for f in os.getenv("OUTPUT_FORMATS", "").split(",") if f.strip()]
+PARQUET_PARTITION_SIZE = int(os.getenv("PARQUET_PARTITION_SIZE", "0"))  # Partition by nacc_id range (0 = one file)
+PARQUET_ROW_GROUP_SIZE = 50000  # Streaming Parquet: rows per row group
+
+# Global IDs: model IDs restart at 1 per document, so the transformer remaps them to contiguous blocks
+ALLOCATE_IDS = os.getenv("ALLOCATE_IDS", "true").lower() == "true"
+ID_STATE_FILE = os.getenv("ID_STATE_FILE", "")  # Shared counter file (file-locked) for multi-process runs
+ID_START = int(os.getenv("ID_START", "1"))  # First ID of every counter (e.g. a per-shard range)
+ID_SHARD_STRIDE = int(os.getenv("ID_SHARD_STRIDE", "10000000"))  # IDs reserved per shard (--shard i/n)
+ID_WORKER_BASE = int(os.getenv("ID_WORKER_BASE", "1000000000000"))  # Queue worker ranges start here, above all shard ranges
+
+# Shard merge: rows sorted per run in memory before the k-way merge
+MERGE_CHUNK_ROWS = int(os.getenv("MERGE_CHUNK_ROWS", "200000"))
+
+# Work queue (main.py enqueue / worker): SQLite file on storage all workers can reach
+WORK_QUEUE_FILE = Path(os.getenv("WORK_QUEUE_FILE", str(OUTPUT_DIR / "queue.sqlite")))
+QUEUE_LEASE_SECONDS = int(os.getenv("QUEUE_LEASE_SECONDS", "600"))  # Lease without heartbeat (renewed every 1/3)
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))  # Leases per document before it is marked failed
+QUEUE_POLL_SECONDS = 10  # Idle worker waits this long while other workers still hold leases
+
+# SQL summary: load the output tables into SQLite and run data/validation_query.sql over them
+SQL_SUMMARY = os.getenv("SQL_SUMMARY", "false").lower() == "true"
+VALIDATION_QUERY_FILE = Path(os.getenv("VALIDATION_QUERY_FILE", str(DATA_DIR / "validation_query.sql")))
+SQL_LOAD_CHUNK_ROWS = 50000  # CSV rows inserted per batch
@@ -5,11 +5,19 @@ Replaces EasyOCR chunked approach with layout-aware document parsing
 OPTIMIZATIONS:
 - Lazy loading of torch and EasyOCR (only when Docling is actually used)
 - Cached PDF conversions shared with Vision extractor
+- Optional background warm-up so the first request doesn't pay model load time
+- Optional page-range parallel conversion across a process pool (CPU hosts)
 """
 import google.generativeai as genai
 import json
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
 import time
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional, List
 
@@ -17,31 +25,223 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 try:
     from .pdf_cache import get_cache
+    from .parse_cache import get_parse_cache
+    from .pdf_optimizer import get_page_count
+    from .prompt_compactor import PromptCompactor, compact_text
+    from .refiner import build_section_prompt
+    from .rule_extractor import RuleExtractor, first_pages_text
+    from .table_parser import TableParser, merge_parsed_data, remove_parsed_rows
+    from .usage_tracker import get_usage_tracker, TokenBudgetExceeded
     from .config import (
         GEMINI_API_KEY,
         GEMINI_MODEL,
+        DOCLING_PARALLEL_WORKERS,
+        USE_TABLE_PARSER,
         MAX_RETRIES,
+        RULE_FIELD_PAGES,
         TEMPERATURE,
         TOP_P,
         TOP_K,
     )
 except ImportError:
     from pdf_cache import get_cache
+    from parse_cache import get_parse_cache
+    from pdf_optimizer import get_page_count
+    from prompt_compactor import PromptCompactor, compact_text
+    from refiner import build_section_prompt
+    from rule_extractor import RuleExtractor, first_pages_text
+    from table_parser import TableParser, merge_parsed_data, remove_parsed_rows
+    from usage_tracker import get_usage_tracker, TokenBudgetExceeded
     from config import (
         GEMINI_API_KEY,
         GEMINI_MODEL,
+        DOCLING_PARALLEL_WORKERS,
+        USE_TABLE_PARSER,
         MAX_RETRIES,
+        RULE_FIELD_PAGES,
         TEMPERATURE,
         TOP_P,
         TOP_K,
     )
 
 
+# Pipeline options that affect the parse output (also the parse cache key)
+DOCLING_OPTIONS = {
+    "do_ocr": True,
+    "do_table_structure": USE_TABLE_PARSER,  # Only needed for the local table parser
+    "table_mode": "fast",
+    "ocr_backend": "easyocr",
+    "ocr_lang": ["th", "en"],  # Thai + English
+}
+
+
+def _build_converter():
+    """
+    Build a Docling converter configured for Thai NACC PDFs.
+
+    Returns:
+        Tuple of (DocumentConverter, use_gpu)
+    """
+    # Lazy import heavy dependencies
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions, EasyOcrOptions, TableFormerMode
+
+    # Configure pipeline for Thai PDFs - OPTIMIZED FOR SPEED
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.do_ocr = DOCLING_OPTIONS["do_ocr"]
+    pipeline_options.do_table_structure = DOCLING_OPTIONS["do_table_structure"]
+    if pipeline_options.do_table_structure:
+        pipeline_options.table_structure_options.mode = (
+            TableFormerMode.FAST if DOCLING_OPTIONS["table_mode"] == "fast" else TableFormerMode.ACCURATE
+        )
+
+    # Try to use GPU for faster OCR
+    import torch
+    use_gpu = torch.cuda.is_available()
+
+    # Use EasyOCR backend for Thai language support - OPTIMIZED
+    pipeline_options.ocr_options = EasyOcrOptions(
+        lang=DOCLING_OPTIONS["ocr_lang"],
+        use_gpu=use_gpu,    # Enable GPU if available
+    )
+
+    # Create format options dict with PdfFormatOption
+    format_options = {
+        InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
+    }
+
+    converter = DocumentConverter(
+        allowed_formats=[InputFormat.PDF],
+        format_options=format_options
+    )
+    return converter, use_gpu
+
+
+# Converter preloaded in each pool worker process (see _init_worker)
+_worker_converter = None
+
+
+def _init_worker():
+    """Process pool initializer - load the converter once per worker"""
+    global _worker_converter
+    _worker_converter, _ = _build_converter()
+
+
+def _convert_page_range(pdf_path: str, start_page: int, end_page: int) -> Dict:
+    """
+    Convert one page range in a pool worker.
+
+    Args:
+        pdf_path: Path to PDF file
+        start_page: First page (1-based, inclusive)
+        end_page: Last page (1-based, inclusive)
+
+    Returns:
+        Partial parse result (markdown, tables, per-page markdown)
+    """
+    result = _worker_converter.convert(pdf_path, page_range=(start_page, end_page))
+    doc = result.document
+    return {
+        "start_page": start_page,
+        "markdown": doc.export_to_markdown(),
+        "tables": DoclingExtractor._extract_tables_structure(doc),
+        "pages": DoclingExtractor._export_page_markdown(doc),
+    }
+
+
+def write_warmup_pdf(path: Path) -> Path:
+    """One-page image PDF whose conversion loads the layout and OCR weights"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (600, 200), "white")
+    ImageDraw.Draw(image).text((20, 80), "NACC warm-up 2566", fill="black")
+    image.save(path, "PDF", resolution=150)
+    return path
+
+
+def _warm_worker(pdf_path: str) -> int:
+    """Convert a warm-up PDF in a pool worker (loads its models); returns the worker's pid"""
+    _convert_page_range(pdf_path, 1, 1)
+    return os.getpid()
+
+
+def split_page_ranges(num_pages: int, workers: int) -> List[tuple]:
+    """Split pages 1..num_pages into at most `workers` contiguous ranges"""
+    per_worker = max(1, math.ceil(num_pages / max(1, workers)))
+    return [
+        (start, min(start + per_worker - 1, num_pages))
+        for start in range(1, num_pages + 1, per_worker)
+    ]
+
+
+def merge_partial_parses(partials: List[Dict]) -> Dict:
+    """
+    Merge partial parses back in page order.
+
+    Args:
+        partials: Results of _convert_page_range (any order)
+
+    Returns:
+        Parse result with markdown, tables (re-indexed) and per-page markdown
+    """
+    partials = sorted(partials, key=lambda p: p["start_page"])
+
+    tables = []
+    pages = {}
+    for partial in partials:
+        for table in partial["tables"]:
+            tables.append({**table, "index": len(tables) + 1})
+        pages.update(partial["pages"])
+
+    return {
+        "markdown": "\n\n".join(p["markdown"] for p in partials if p["markdown"]),
+        "tables": tables,
+        "pages": pages,
+    }
+
+
+def convert_parallel(pool: ProcessPoolExecutor, pdf_path: Path, workers: int) -> Dict:
+    """
+    Convert a PDF by page ranges across a process pool.
+
+    Args:
+        pool: Pool whose workers were started with _init_worker
+        pdf_path: Path to PDF file
+        workers: Number of page ranges to split into
+
+    Returns:
+        Merged parse result
+    """
+    ranges = split_page_ranges(get_page_count(pdf_path), workers)
+    futures = [
+        pool.submit(_convert_page_range, str(pdf_path), start, end)
+        for start, end in ranges
+    ]
+    return merge_partial_parses([f.result() for f in futures])
+
+
+def create_worker_pool(workers: int) -> ProcessPoolExecutor:
+    """Start a process pool whose workers each hold a preloaded converter"""
+    # spawn: torch/EasyOCR state must not be inherited through fork
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+
+
 class DoclingExtractor:
     """Extract structured data from PDF using Docling + Gemini 2.5 Flash"""
 
-    def __init__(self, api_key: str = GEMINI_API_KEY):
-        """Initialize Docling converter and Gemini API client"""
+    def __init__(self, api_key: str = GEMINI_API_KEY, parallel_workers: int = DOCLING_PARALLEL_WORKERS):
+        """
+        Initialize Docling converter and Gemini API client
+
+        Args:
+            api_key: Gemini API key
+            parallel_workers: Convert page ranges in this many processes (0/1 = single process)
+        """
         if not api_key:
             raise ValueError(
                 "GEMINI_API_KEY not found. Please set it in .env file or environment variable."
@@ -69,10 +269,28 @@ class DoclingExtractor:
             "max_output_tokens": 32768,  # Increased for larger PDFs
         }
 
+        # De-duplicates tables and enforces the prompt token budget
+        self.compactor = PromptCompactor()
+
+        # Known asset/statement tables are mapped locally, the rest goes to Gemini
+        self.table_parser = TableParser(enabled=USE_TABLE_PARSER)
+
+        # Fixed form fields (names, age, status, address) are read by rules
+        self.rule_extractor = RuleExtractor()
+
         # Lazy initialization of Docling (deferred until first use)
         # This saves 10-15 seconds when using Vision API instead
         self.converter = None
         self._initialized = False
+        self._init_lock = threading.Lock()
+        self.parallel_workers = parallel_workers
+        self.use_gpu = False
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.warmup_status = {"status": "pending", "seconds": None, "error": None}
+
+        # Per-page markdown of the last converted PDF (for section refinement)
+        self._page_markdown: Dict[int, str] = {}
+        self._page_markdown_source: Optional[str] = None
         print("   ⚡ Docling will initialize on first use (lazy loading)")
 
     def _ensure_initialized(self):
@@ -85,45 +303,81 @@ class DoclingExtractor:
         if self._initialized:
             return
 
-        print("   🔧 Initializing Docling with Thai OCR support (first use)...")
-
-        # Lazy import heavy dependencies
-        from docling.document_converter import DocumentConverter, PdfFormatOption
-        from docling.datamodel.base_models import InputFormat
-        from docling.datamodel.pipeline_options import PdfPipelineOptions, EasyOcrOptions
+        # Warm-up thread and first request may race - only one loads models
+        with self._init_lock:
+            if self._initialized:
+                return
+            self._initialize()
 
-        # Configure pipeline for Thai PDFs - OPTIMIZED FOR SPEED
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.do_ocr = True
-        pipeline_options.do_table_structure = False  # Disable for speed (not needed for NACC forms)
+    def _initialize(self):
+        """Build the Docling converter (called once, under _init_lock)"""
+        print("   🔧 Initializing Docling with Thai OCR support (first use)...")
 
-        # Try to use GPU for faster OCR
-        import torch
-        use_gpu = torch.cuda.is_available()
+        self.converter, use_gpu = _build_converter()
+        self.use_gpu = use_gpu
         if use_gpu:
             print("   🚀 GPU detected - using CUDA acceleration")
         else:
             print("   💻 Running on CPU (GPU would be faster)")
 
-        # Use EasyOCR backend for Thai language support - OPTIMIZED
-        pipeline_options.ocr_options = EasyOcrOptions(
-            lang=["th", "en"],  # Thai + English
-            use_gpu=use_gpu,    # Enable GPU if available
-        )
-
-        # Create format options dict with PdfFormatOption
-        format_options = {
-            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
-        }
-
-        self.converter = DocumentConverter(
-            allowed_formats=[InputFormat.PDF],
-            format_options=format_options
-        )
+        # Page-range parallelism only pays off on CPU hosts
+        if self.parallel_workers > 1 and not use_gpu:
+            print(f"   🧵 Starting {self.parallel_workers} Docling worker processes...")
+            self._pool = create_worker_pool(self.parallel_workers)
 
         self._initialized = True
         print("   ✅ Docling initialized with Thai OCR" + (" + GPU 🚀" if use_gpu else ""))
 
+    def warm_up(self) -> Dict:
+        """
+        Load Docling and OCR weights ahead of the first request.
+
+        Initializes the converter and runs one tiny dummy conversion so the
+        EasyOCR detection/recognition models are resident in memory.
+        Safe to call from a background thread.
+
+        Returns:
+            Warm-up status dictionary (status, seconds, error)
+        """
+        if self.warmup_status["status"] in ("running", "ready"):
+            return self.warmup_status
+
+        self.warmup_status = {"status": "running", "seconds": None, "error": None}
+        start_time = time.time()
+
+        try:
+            self._ensure_initialized()
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                dummy_pdf = write_warmup_pdf(Path(tmp_dir) / "warmup.pdf")
+
+                self.converter.convert(str(dummy_pdf))
+
+                # One dummy task per worker so every pool process loads its converter
+                if self._pool is not None:
+                    n = self.parallel_workers
+                    list(self._pool.map(_convert_page_range, [str(dummy_pdf)] * n, [1] * n, [1] * n))
+
+            elapsed = time.time() - start_time
+            self.warmup_status = {"status": "ready", "seconds": round(elapsed, 1), "error": None}
+            print(f"   🔥 Docling warm-up complete in {elapsed:.1f}s")
+
+        except Exception as e:
+            self.warmup_status = {
+                "status": "failed",
+                "seconds": round(time.time() - start_time, 1),
+                "error": str(e),
+            }
+            print(f"   ⚠️ Docling warm-up failed: {e}")
+
+        return self.warmup_status
+
+    def warm_up_in_background(self) -> threading.Thread:
+        """Start warm_up() in a daemon thread and return it"""
+        thread = threading.Thread(target=self.warm_up, name="docling-warmup", daemon=True)
+        thread.start()
+        return thread
+
     def extract_from_pdf(
         self,
         pdf_path: Path,
@@ -144,33 +398,38 @@ class DoclingExtractor:
             Structured data dictionary matching database schema
         """
         try:
-            # Ensure Docling is initialized (lazy loading)
-            self._ensure_initialized()
+            parsed = self._parse_pdf(pdf_path)
+            markdown_content = parsed["markdown"]
+            tables_info = parsed["tables"]
 
-            print(f"   📖 Converting PDF with Docling (layout-aware)...")
-
-            # Convert PDF to structured document
-            result = self.converter.convert(str(pdf_path))
-            doc = result.document
-
-            print(f"   ✅ Docling parsed {len(doc.pages)} pages")
-
-            # Export to Markdown (preserves structure better than plain text)
-            markdown_content = doc.export_to_markdown()
-
-            # Get table information separately for better accuracy
-            tables_info = self._extract_tables_structure(doc)
+            # Keep per-page markdown so weak sections can be re-extracted alone
+            self._page_markdown = parsed["pages"]
+            self._page_markdown_source = str(pdf_path)
 
             print(f"   📄 Extracted {len(markdown_content)} chars")
             print(f"   📊 Found {len(tables_info)} tables")
 
+            # Fast path: known NACC tables become rows without an LLM round trip
+            table_result = self.table_parser.parse_tables(tables_info, enum_mappings)
+            prefilled = table_result["data"]
+            if table_result["parsed"]:
+                markdown_content = remove_parsed_rows(markdown_content, table_result["parsed"])
+                tables_info = table_result["unparsed"]
+                print(f"   📐 Parsed {len(table_result['parsed'])} tables locally "
+                      f"({len(prefilled['assets'])} assets, {len(prefilled['statement_details'])} statement rows)")
+
+            # Fixed form fields from the first pages - Gemini only gets the rest
+            known_fields = self.rule_extractor.extract(first_pages_text(parsed["pages"], RULE_FIELD_PAGES))
+
             # Build enhanced prompt with structured content
             prompt = self._build_enhanced_prompt(
                 markdown_content,
                 tables_info,
                 submitter_info,
                 nacc_detail,
-                enum_mappings
+                enum_mappings,
+                prefilled=prefilled if table_result["parsed"] else None,
+                known_fields=known_fields
             )
 
             # Single Gemini API call with full document context
@@ -178,15 +437,19 @@ class DoclingExtractor:
 
             for attempt in range(MAX_RETRIES):
                 try:
-                    response = self.model.generate_content(
+                    response = get_usage_tracker().generate(
+                        self.model,
                         prompt,
-                        generation_config=self.generation_config,
+                        self.generation_config,
+                        "docling"
                     )
 
                     if response.candidates and response.candidates[0].content.parts:
                         extracted_data = self._parse_response(response.text)
 
                         if extracted_data:
+                            extracted_data = merge_parsed_data(extracted_data, prefilled)
+                            extracted_data = self.rule_extractor.apply(extracted_data, known_fields)
                             print(f"   ✅ Extraction successful")
                             print(f"      - Assets: {len(extracted_data.get('assets', []))}")
                             print(f"      - Statements: {len(extracted_data.get('statements', []))}")
@@ -196,14 +459,19 @@ class DoclingExtractor:
                     else:
                         print(f"   ⚠️ Attempt {attempt + 1}: Response blocked")
 
+                except TokenBudgetExceeded as e:
+                    print(f"   🛑 {e} - aborting extraction")
+                    break
                 except Exception as e:
                     print(f"   ⚠️ Attempt {attempt + 1} error: {e}")
                     if attempt < MAX_RETRIES - 1:
                         time.sleep(2 ** attempt)  # Exponential backoff
 
-            # If all retries failed, return empty structure
+            # If all retries failed, keep whatever the table parser produced
             print(f"   ❌ All retry attempts failed")
-            return self._empty_structure()
+            return self.rule_extractor.apply(
+                merge_parsed_data(self._empty_structure(), prefilled), known_fields
+            )
 
         except Exception as e:
             print(f"   ❌ Docling extraction failed: {e}")
@@ -211,7 +479,129 @@ class DoclingExtractor:
             traceback.print_exc()
             return self._empty_structure()
 
-    def _extract_tables_structure(self, doc) -> List[Dict]:
+    def _parse_pdf(self, pdf_path: Path) -> Dict:
+        """
+        Convert PDF with Docling into markdown, tables and per-page markdown
+
+        Reuses a persisted parse when the same PDF was converted with the
+        same options before (no OCR models loaded). Otherwise uses the
+        worker pool (page ranges in parallel) when enabled, or converts
+        the whole document in this process.
+        """
+        parse_cache = get_parse_cache()
+        cached = parse_cache.get(pdf_path, DOCLING_OPTIONS)
+        if cached is not None:
+            return cached
+
+        # Ensure Docling is initialized (lazy loading)
+        self._ensure_initialized()
+        start_time = time.time()
+
+        if self._pool is not None:
+            print(f"   📖 Converting PDF with Docling ({self.parallel_workers} page ranges in parallel)...")
+            parsed = convert_parallel(self._pool, pdf_path, self.parallel_workers)
+        else:
+            print(f"   📖 Converting PDF with Docling (layout-aware)...")
+
+            # Convert PDF to structured document
+            result = self.converter.convert(str(pdf_path))
+            doc = result.document
+
+            parsed = {
+                # Export to Markdown (preserves structure better than plain text)
+                "markdown": doc.export_to_markdown(),
+                # Get table information separately for better accuracy
+                "tables": self._extract_tables_structure(doc),
+                "pages": self._export_page_markdown(doc),
+            }
+
+        print(f"   ✅ Docling parsed {len(parsed['pages'])} pages in {time.time() - start_time:.1f}s")
+        parse_cache.put(pdf_path, DOCLING_OPTIONS, parsed)
+        return parsed
+
+    @staticmethod
+    def _export_page_markdown(doc) -> Dict[int, str]:
+        """Export markdown for each page separately ({page_no: markdown})"""
+        pages = {}
+        try:
+            for page_no in sorted(doc.pages.keys()):
+                pages[page_no] = doc.export_to_markdown(page_no=page_no)
+        except Exception as e:
+            print(f"      ⚠️ Per-page markdown export failed: {e}")
+        return pages
+
+    def page_count(self, pdf_path: Path) -> int:
+        """Number of pages in the PDF"""
+        if self._page_markdown_source == str(pdf_path) and self._page_markdown:
+            return max(self._page_markdown)
+        return get_page_count(pdf_path)
+
+    def page_texts(self, pdf_path: Path) -> Optional[Dict[int, str]]:
+        """Per-page markdown of the PDF if it was the last one converted"""
+        if self._page_markdown_source == str(pdf_path):
+            return self._page_markdown
+        return None
+
+    def extract_sections(
+        self,
+        pdf_path: Path,
+        section: str,
+        pages: List[int],
+        submitter_info: Dict,
+        nacc_detail: Dict,
+        enum_mappings: Dict
+    ) -> Optional[Dict]:
+        """
+        Re-extract one section with a focused prompt over its pages only
+
+        Args:
+            pdf_path: Path to PDF file
+            section: Section to extract (e.g. "assets")
+            pages: 1-based page numbers containing the section
+            submitter_info: Basic submitter information
+            nacc_detail: NACC detail information
+            enum_mappings: Enum type mappings
+
+        Returns:
+            Dictionary with the section's keys, or None if extraction failed
+        """
+        page_markdown = self.page_texts(pdf_path)
+        if not page_markdown:
+            return None
+
+        content = "\n\n".join(
+            f"=== หน้า {page_no} ===\n{page_markdown.get(page_no, '')}" for page_no in pages
+        )
+        if self.compactor.enabled:
+            content = compact_text(content)
+        prompt = build_section_prompt(section, nacc_detail, pages, enum_mappings)
+        prompt += f"\n**PAGE CONTENT (STRUCTURED MARKDOWN):**\n\n{content}\n"
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                response = get_usage_tracker().generate(
+                    self.model,
+                    prompt,
+                    self.generation_config,
+                    "refine"
+                )
+
+                if response.candidates and response.candidates[0].content.parts:
+                    return self._parse_response(response.text)
+                print(f"      ⚠️ Refinement attempt {attempt + 1}: Response blocked")
+
+            except TokenBudgetExceeded as e:
+                print(f"      🛑 {e} - skipping refinement")
+                return None
+            except Exception as e:
+                print(f"      ⚠️ Refinement attempt {attempt + 1} error: {e}")
+                if attempt < MAX_RETRIES - 1:
+                    time.sleep(2 ** attempt)
+
+        return None
+
+    @staticmethod
+    def _extract_tables_structure(doc) -> List[Dict]:
         """Extract table structures for enhanced prompt"""
         tables = []
         try:
@@ -279,28 +669,69 @@ class DoclingExtractor:
         tables_info: List[Dict],
         submitter_info: Dict,
         nacc_detail: Dict,
-        enum_mappings: Dict
+        enum_mappings: Dict,
+        prefilled: Optional[Dict] = None,
+        known_fields: Optional[Dict] = None
     ) -> str:
-        """Build enhanced extraction prompt with Docling structured output"""
-
-        # Add table summaries if present
-        table_context = ""
-        if tables_info:
-            table_context = "\n**📊 DOCUMENT CONTAINS TABLES:**\n"
-            for i, table in enumerate(tables_info):
-                # Handle both old format (with 'page') and new format (with 'index')
-                page_info = f"Page {table['page']}" if 'page' in table else f"#{table.get('index', i+1)}"
-                table_context += f"\n**Table {i+1} ({page_info}, {table['rows']}×{table['cols']}):**\n{table['content']}\n"
-
-        # Gemini 2.5 Flash supports up to 1M tokens (~4M chars)
-        # Keep full content - no truncation needed
-        max_content_length = 500000  # 500K chars = safe limit
-        if len(markdown_content) > max_content_length:
-            print(f"   ⚠️ Content truncated from {len(markdown_content)} to {max_content_length} chars")
-            markdown_content = markdown_content[:max_content_length] + "\n\n... [document continues]"
-        else:
-            print(f"   ✅ Full content sent ({len(markdown_content)} chars)")
+        """
+        Build enhanced extraction prompt with Docling structured output
+
+        Tables already contained in the markdown are not repeated, and the
+        content is trimmed so the whole prompt fits PROMPT_TOKEN_BUDGET.
+        prefilled holds rows the table parser already extracted; their
+        table rows are no longer in the content and Gemini is told so.
+        known_fields holds form fields resolved by rules, which Gemini
+        is asked not to extract again.
+        """
+        if self.compactor.enabled:
+            compacted = self.compactor.compact(markdown_content, tables_info)
+            markdown_content = compacted["markdown"]
+            tables_info = compacted["tables"]
+            stats = compacted["stats"]
+            print(f"   🗜️ Compacted content {stats['chars_before']:,} → {stats['chars_after']:,} chars "
+                  f"({stats['tables_deduplicated']} duplicate tables dropped)")
+
+        table_context = self._format_table_context(tables_info)
+        if prefilled:
+            table_context = (
+                f"\n**ALREADY EXTRACTED:** {len(prefilled['assets'])} asset rows and "
+                f"{len(prefilled['statement_details'])} income/expense/liability rows were read from tables "
+                f"that have been removed from the content below. Extract only the data that remains - "
+                f"do not invent or repeat those rows.\n"
+            ) + table_context
+        if known_fields:
+            table_context = self.rule_extractor.prompt_note(known_fields) + table_context
+
+        prompt, tokens = self.compactor.fit_prompt(
+            self.model,
+            lambda content: self._render_prompt(content, table_context, submitter_info, nacc_detail),
+            markdown_content
+        )
+        print(f"   ✅ Prompt: {tokens:,} tokens")
+
+        return prompt
 
+    @staticmethod
+    def _format_table_context(tables_info: List[Dict]) -> str:
+        """Format tables that are not already part of the markdown"""
+        if not tables_info:
+            return ""
+
+        table_context = "\n**📊 DOCUMENT CONTAINS TABLES:**\n"
+        for i, table in enumerate(tables_info):
+            # Handle both old format (with 'page') and new format (with 'index')
+            page_info = f"Page {table['page']}" if 'page' in table else f"#{table.get('index', i+1)}"
+            table_context += f"\n**Table {i+1} ({page_info}, {table['rows']}×{table['cols']}):**\n{table['content']}\n"
+        return table_context
+
+    @staticmethod
+    def _render_prompt(
+        markdown_content: str,
+        table_context: str,
+        submitter_info: Dict,
+        nacc_detail: Dict
+    ) -> str:
+        """Fill the extraction prompt template"""
         prompt = f"""You are an expert data extraction assistant for Thailand's NACC (National Anti-Corruption Commission).
 
 **CRITICAL CONTEXT:** This is OFFICIAL PUBLIC government transparency data required by Thai law. You are helping digitize public asset declarations.
@@ -4,27 +4,41 @@ Extracts structured data from Thai asset declaration PDFs
 """
 import google.generativeai as genai
 import json
+import threading
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 try:
+    from .usage_tracker import get_usage_tracker, TokenBudgetExceeded
+    from .rule_extractor import RuleExtractor, first_pages_text
+    from .ocr_pool import get_reader_pool
+    from .chunk_packer import ChunkPacker, empty_chunk_stats, is_truncated, split_chunk
     from .config import (
         GEMINI_API_KEY,
         GEMINI_MODEL,
+        CHUNK_CONCURRENCY,
         MAX_RETRIES,
+        RULE_FIELD_PAGES,
         TEMPERATURE,
         TOP_P,
         TOP_K,
     )
 except ImportError:
+    from usage_tracker import get_usage_tracker, TokenBudgetExceeded
+    from rule_extractor import RuleExtractor, first_pages_text
+    from ocr_pool import get_reader_pool
+    from chunk_packer import ChunkPacker, empty_chunk_stats, is_truncated, split_chunk
     from config import (
         GEMINI_API_KEY,
         GEMINI_MODEL,
+        CHUNK_CONCURRENCY,
         MAX_RETRIES,
+        RULE_FIELD_PAGES,
         TEMPERATURE,
         TOP_P,
         TOP_K,
@@ -64,6 +78,11 @@ class GeminiExtractor:
             "max_output_tokens": 8192,
         }
 
+        # Fixed form fields (names, age, status, address) are read by rules
+        self.rule_extractor = RuleExtractor()
+        self.chunk_stats = empty_chunk_stats()
+        self._stats_lock = threading.Lock()
+
     def extract_from_pdf(
         self,
         pdf_path: Path,
@@ -87,75 +106,79 @@ class GeminiExtractor:
         # Split pages into small chunks to avoid safety blocking!
         try:
             from pdf2image import convert_from_path
-            import easyocr
             import numpy as np
 
             print(f"   📖 Converting PDF to images...")
             images = convert_from_path(pdf_path, dpi=300, fmt='png')
 
             print(f"   📸 Converted {len(images)} pages")
-            print(f"   🔧 Initializing EasyOCR...")
 
-            # Initialize Easy OCR once
-            reader = easyocr.Reader(['th', 'en'], gpu=False, verbose=False)
+            # Readers are loaded once per process and reused across documents
+            reader_pool = get_reader_pool()
+            load_before = reader_pool.get_stats()
+            reader_pool.preload(1)
+            ocr_seconds = 0.0
+
+            # Pages are packed into chunks by estimated input/output tokens
+            packer = ChunkPacker()
+            all_extracted_data = self._empty_result()
+            page_texts = {}
+            known_fields = None
+            base_prompt = self._build_extraction_prompt(submitter_info, nacc_detail, enum_mappings)
+
+            # Producer-consumer: OCR of the next pages (this thread) overlaps
+            # with Gemini calls for earlier chunks (executor threads)
+            budget_exhausted = threading.Event()
+            # Chunk threads have no document of their own - bill this one explicitly
+            document = get_usage_tracker().document_totals()
+            pipeline_start = time.time()
+            futures = []
+            with ThreadPoolExecutor(max_workers=CHUNK_CONCURRENCY, thread_name_prefix="chunk") as executor:
+                for page_num, img in enumerate(images, start=1):
+                    if budget_exhausted.is_set():
+                        print(f"   🛑 Token budget exhausted - skipping pages {page_num}+")
+                        break
+
+                    # Extract text from this page with EasyOCR
+                    img_array = np.array(img)
+                    ocr_start = time.time()
+                    result = reader_pool.readtext(img_array, detail=0)
+                    ocr_seconds += time.time() - ocr_start
+                    page_texts[page_num] = '\n'.join(result)
+
+                    ready = packer.add_page(page_num, page_texts[page_num])
+                    if page_num == len(images):
+                        ready = [chunk for chunk in (ready, packer.flush()) if chunk]
+                    else:
+                        ready = [ready] if ready else []
 
-            print(f"   ✅ EasyOCR ready! Processing pages...")
+                    # Form fields live on the first pages - resolve them once by rules
+                    if known_fields is None and (ready or page_num >= RULE_FIELD_PAGES):
+                        known_fields = self.rule_extractor.extract(first_pages_text(page_texts, RULE_FIELD_PAGES))
+                        base_prompt += self.rule_extractor.prompt_note(known_fields)
 
-            # Process pages in small chunks (3 pages at a time)
-            chunk_size = 3
-            all_extracted_data = {
-                "assets": [],
-                "statements": [],
-                "submitter_positions": [],
-                "spouse_info": None,
-                "relatives": []
-            }
+                    # Send finished chunks to Gemini without waiting for the result
+                    for chunk in ready:
+                        print(f"   🔍 Chunk pages {chunk[0][0]}-{chunk[-1][0]}: "
+                              f"{sum(len(text) for _, text in chunk)} chars")
+                        futures.append(executor.submit(self._extract_chunk, base_prompt, chunk, budget_exhausted, document))
 
-            for chunk_start in range(0, len(images), chunk_size):
-                chunk_end = min(chunk_start + chunk_size, len(images))
-                chunk_pages = images[chunk_start:chunk_end]
+            # Merge in page order (leaving the executor waited for every chunk)
+            for future in futures:
+                chunk_data = future.result()
+                if chunk_data:
+                    self._merge_chunk(all_extracted_data, chunk_data)
 
-                print(f"   🔍 Processing pages {chunk_start+1}-{chunk_end}...")
+            with self._stats_lock:
+                self.chunk_stats["pages"] += len(page_texts)
+                self.chunk_stats["chunks"] += len(futures)
+            print(f"   ⏱️ {len(futures)} chunks for {len(page_texts)} pages in {time.time() - pipeline_start:.1f}s "
+                  f"(OCR {ocr_seconds:.1f}s overlapped with Gemini calls)")
 
-                # Extract text from this chunk with EasyOCR
-                chunk_text = ""
-                for i, img in enumerate(chunk_pages):
-                    page_num = chunk_start + i + 1
-                    img_array = np.array(img)
-                    result = reader.readtext(img_array, detail=0)
-                    page_text = '\n'.join(result)
-                    chunk_text += f"\n\n=== หน้า {page_num} ===\n{page_text}"
-
-                print(f"      OCR: {len(chunk_text)} chars")
-
-                # Send this chunk's text to Gemini
-                try:
-                    prompt = self._build_extraction_prompt(submitter_info, nacc_detail, enum_mappings)
-                    chunk_prompt = f"{prompt}\n\n**เนื้อหา (หน้า {chunk_start+1}-{chunk_end}):**\n{chunk_text}"
-
-                    response = self.model.generate_content(
-                        chunk_prompt,
-                        generation_config=self.generation_config,
-                    )
-
-                    if response.candidates and response.candidates[0].content.parts:
-                        chunk_data = self._parse_response(response.text)
-
-                        # Merge chunk data into all_extracted_data
-                        if chunk_data:
-                            for key in all_extracted_data:
-                                if isinstance(all_extracted_data[key], list) and key in chunk_data and isinstance(chunk_data[key], list):
-                                    all_extracted_data[key].extend(chunk_data[key])
-                                elif key == "spouse_info" and chunk_data.get(key):
-                                    all_extracted_data[key] = chunk_data[key]
-
-                            print(f"      ✅ Chunk parsed successfully")
-                    else:
-                        print(f"      ⚠️ Chunk blocked by Gemini")
+            all_extracted_data = self.rule_extractor.apply(all_extracted_data, known_fields or {})
 
-                except Exception as e:
-                    print(f"      ⚠️ Chunk error: {e}")
-                    continue
+            load_seconds = reader_pool.get_stats()["load_seconds"] - load_before["load_seconds"]
+            print(f"   ⏱️ OCR {ocr_seconds:.1f}s for {len(images)} pages (model load {load_seconds:.1f}s)")
 
             print(f"   📊 Total extracted items:")
             total_items = sum(len(v) if isinstance(v, list) else (1 if v else 0) for v in all_extracted_data.values())
@@ -175,6 +198,106 @@ class GeminiExtractor:
 
         # Old retry logic removed - using chunked approach above
 
+    def _extract_chunk(
+        self,
+        base_prompt: str,
+        pages: List[Tuple[int, str]],
+        budget_exhausted: threading.Event,
+        document: Optional[Dict] = None
+    ) -> Optional[Dict]:
+        """
+        Send one chunk to Gemini (runs in an executor thread)
+
+        A multi-page chunk whose answer hit max_output_tokens is split in
+        half and each half sent again.
+
+        Args:
+            base_prompt: Prompt without page content
+            pages: (page_num, OCR text) tuples of this chunk
+            budget_exhausted: Set when the document token budget runs out
+            document: Usage totals of the document (UsageTracker.document_totals())
+
+        Returns:
+            Parsed chunk data, or None if blocked/failed/skipped
+        """
+        if budget_exhausted.is_set():
+            return None
+
+        label = f"{pages[0][0]}-{pages[-1][0]}"
+        chunk_text = "".join(f"\n\n=== หน้า {page_num} ===\n{text}" for page_num, text in pages)
+        chunk_prompt = f"{base_prompt}\n\n**เนื้อหา (หน้า {label}):**\n{chunk_text}"
+
+        try:
+            with self._stats_lock:
+                self.chunk_stats["calls"] += 1
+            response = get_usage_tracker().generate(
+                self.model,
+                chunk_prompt,
+                self.generation_config,
+                "chunk",
+                document=document
+            )
+
+            if is_truncated(response):
+                with self._stats_lock:
+                    self.chunk_stats["truncated"] += 1
+                if len(pages) > 1:
+                    print(f"      ✂️ Chunk {label} hit max_output_tokens - splitting")
+                    with self._stats_lock:
+                        self.chunk_stats["resplit"] += 1
+                    merged = self._empty_result()
+                    for half in split_chunk(pages):
+                        half_data = self._extract_chunk(base_prompt, half, budget_exhausted, document)
+                        if half_data:
+                            self._merge_chunk(merged, half_data)
+                    return merged
+                print(f"      ⚠️ Chunk {label} truncated (single page)")
+
+            if response.candidates and response.candidates[0].content.parts:
+                chunk_data = self._parse_response(response.text)
+                if chunk_data:
+                    print(f"      ✅ Chunk {label} parsed successfully")
+                return chunk_data
+
+            print(f"      ⚠️ Chunk {label} blocked by Gemini")
+
+        except TokenBudgetExceeded as e:
+            print(f"      🛑 Chunk {label}: {e}")
+            budget_exhausted.set()
+        except Exception as e:
+            print(f"      ⚠️ Chunk {label} error: {e}")
+
+        return None
+
+    @staticmethod
+    def _empty_result() -> Dict:
+        """Empty extraction result that chunks are merged into"""
+        return {
+            "assets": [],
+            "statements": [],
+            "submitter_positions": [],
+            "spouse_info": None,
+            "relatives": []
+        }
+
+    @staticmethod
+    def _merge_chunk(all_extracted_data: Dict, chunk_data: Dict):
+        """Merge chunk data into all_extracted_data"""
+        for key in all_extracted_data:
+            if isinstance(all_extracted_data[key], list) and key in chunk_data and isinstance(chunk_data[key], list):
+                all_extracted_data[key].extend(chunk_data[key])
+            elif key == "spouse_info" and chunk_data.get(key):
+                all_extracted_data[key] = chunk_data[key]
+
+    def print_stats(self):
+        """Print chunking stats (calls per page, truncation rate)"""
+        s = self.chunk_stats
+        print(f"\n🧩 Chunking:")
+        print(f"   {s['pages']} pages → {s['chunks']} chunks, {s['calls']} Gemini calls")
+        if s["calls"]:
+            print(f"   Truncated: {s['truncated']} ({s['truncated'] / s['calls']:.1%}), re-split: {s['resplit']}")
+
+
     def _build_extraction_prompt(
         self,
         submitter_info: Dict,
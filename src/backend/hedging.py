@@ -0,0 +1,274 @@
+"""
+Hedged Gemini Requests - Cut tail latency on stalled model calls
+
+When a call runs longer than the observed p95 latency for its request
+class, a duplicate request is fired and whichever finishes first wins.
+Latency percentiles are tracked in-process; until a class has enough
+samples a fixed, conservative delay is used instead. The number of extra
+requests is capped as a fraction of all requests.
+"""
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Optional, Any
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .config import (
+        USE_HEDGING,
+        CHUNK_CONCURRENCY,
+        HEDGE_PERCENTILE,
+        HEDGE_MIN_SAMPLES,
+        HEDGE_MAX_EXTRA_RATIO,
+        HEDGE_DEFAULT_DELAY,
+    )
+except ImportError:
+    from config import (
+        USE_HEDGING,
+        CHUNK_CONCURRENCY,
+        HEDGE_PERCENTILE,
+        HEDGE_MIN_SAMPLES,
+        HEDGE_MAX_EXTRA_RATIO,
+        HEDGE_DEFAULT_DELAY,
+    )
+
+
+class LatencyTracker:
+    """
+    Track recent call latencies per request class.
+
+    Keeps a bounded window of successful call durations so the hedge
+    threshold follows the current behaviour of the API.
+    """
+
+    def __init__(self, window: int = 200):
+        """Initialize empty latency windows"""
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, request_class: str, seconds: float):
+        """Record one successful call duration"""
+        with self._lock:
+            samples = self._samples.get(request_class)
+            if samples is None:
+                samples = deque(maxlen=self.window)
+                self._samples[request_class] = samples
+            samples.append(seconds)
+
+    def count(self, request_class: str) -> int:
+        """Number of samples recorded for a request class"""
+        with self._lock:
+            return len(self._samples.get(request_class, ()))
+
+    def percentile(self, request_class: str, pct: float) -> Optional[float]:
+        """
+        Get latency percentile for a request class.
+
+        Args:
+            request_class: Name of the request class (e.g. "vision")
+            pct: Percentile in 0-100
+
+        Returns:
+            Latency in seconds, or None if no samples yet
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(request_class, ()))
+
+        if not samples:
+            return None
+
+        # Nearest-rank percentile
+        rank = max(0, min(len(samples) - 1, math.ceil(pct / 100 * len(samples)) - 1))
+        return samples[rank]
+
+    def summary(self) -> Dict:
+        """Get p50/p95/p99 per request class"""
+        with self._lock:
+            classes = list(self._samples.keys())
+
+        return {
+            name: {
+                "samples": self.count(name),
+                "p50": self.percentile(name, 50),
+                "p95": self.percentile(name, 95),
+                "p99": self.percentile(name, 99),
+            }
+            for name in classes
+        }
+
+
+class HedgedCaller:
+    """
+    Run model calls with optional request hedging.
+
+    The primary request starts immediately. If it has not finished by the
+    hedge delay (p95 of its request class), a duplicate is started and the
+    first one to return a result wins. The losing request is cancelled if
+    it has not started yet, otherwise its result is discarded when it
+    completes (HTTP calls in flight cannot be interrupted from Python).
+    """
+
+    def __init__(
+        self,
+        enabled: bool = USE_HEDGING,
+        percentile: float = HEDGE_PERCENTILE,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        max_extra_ratio: float = HEDGE_MAX_EXTRA_RATIO,
+        default_delay: Optional[float] = HEDGE_DEFAULT_DELAY,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Initialize hedged caller
+
+        Args:
+            enabled: Fire duplicate requests for slow calls
+            percentile: Latency percentile used as the hedge threshold
+            min_samples: Samples needed before the percentile is trusted
+            max_extra_ratio: Cap on hedged requests as a fraction of all requests
+            default_delay: Hedge delay (seconds) before enough samples exist, None = don't hedge
+            max_workers: Thread pool size for primary + hedged requests (default: room for a
+                primary and a hedge per concurrent chunk request, at least 8)
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra_ratio = max_extra_ratio
+        self.default_delay = default_delay
+        self.latency = LatencyTracker()
+
+        if max_workers is None:
+            max_workers = max(8, 2 * CHUNK_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "hedges_skipped_budget": 0,
+        }
+
+    def hedge_delay(self, request_class: str) -> Optional[float]:
+        """Seconds to wait before firing a duplicate, or None to never hedge"""
+        if self.latency.count(request_class) < self.min_samples:
+            return self.default_delay
+        return self.latency.percentile(request_class, self.percentile)
+
+    def _reserve_hedge(self) -> bool:
+        """Check the extra-spend cap and reserve one hedged request"""
+        with self._lock:
+            allowed = (self._stats["hedged"] + 1) <= self.max_extra_ratio * self._stats["requests"]
+            if allowed:
+                self._stats["hedged"] += 1
+            else:
+                self._stats["hedges_skipped_budget"] += 1
+            return allowed
+
+    def _timed(self, request_class: str, fn: Callable[[], Any]) -> Any:
+        """Run fn and record its latency on success"""
+        start = time.time()
+        result = fn()
+        self.latency.record(request_class, time.time() - start)
+        return result
+
+    def call(
+        self,
+        request_class: str,
+        fn: Callable[[], Any],
+        on_discarded: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """
+        Call fn, hedging with a duplicate call if it runs too long.
+
+        Args:
+            request_class: Latency class for thresholds (e.g. "vision", "docling", "chunk")
+            fn: Zero-argument callable that performs the request
+            on_discarded: Called with the losing request's result if it completes later
+
+        Returns:
+            Result of whichever request finished first
+
+        Raises:
+            Exception from the request if all started requests failed
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+
+        delay = self.hedge_delay(request_class) if self.enabled else None
+        if delay is None:
+            return self._timed(request_class, fn)
+
+        # The hedge timer starts when the primary leaves the pool queue, so time
+        # spent queued behind other requests doesn't trigger (and queue) hedges
+        started = threading.Event()
+
+        def run_primary():
+            started.set()
+            return self._timed(request_class, fn)
+
+        primary = self._executor.submit(run_primary)
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if not self._reserve_hedge():
+            return primary.result()
+
+        print(f"   ⏱️ Hedging {request_class} request (no response after {delay:.1f}s)")
+        hedge = self._executor.submit(self._timed, request_class, fn)
+        pending = {primary, hedge}
+        last_error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    continue
+
+                # Winner found - cancel or discard the other request
+                for loser in pending:
+                    if not loser.cancel() and on_discarded:
+                        loser.add_done_callback(
+                            lambda f: on_discarded(f.result()) if f.exception() is None else None
+                        )
+                if future is hedge:
+                    with self._lock:
+                        self._stats["hedge_wins"] += 1
+                return future.result()
+
+        raise last_error
+
+    def get_stats(self) -> Dict:
+        """Get hedging statistics and latency percentiles"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["extra_ratio"] = stats["hedged"] / stats["requests"] if stats["requests"] else 0.0
+        stats["latency"] = self.latency.summary()
+        return stats
+
+    def print_stats(self):
+        """Print hedging statistics"""
+        stats = self.get_stats()
+        print(f"\n⏱️ Request Hedging Statistics:")
+        print(f"   Requests: {stats['requests']}")
+        print(f"   Hedged: {stats['hedged']} ({stats['extra_ratio']:.1%} extra)")
+        print(f"   Hedge wins: {stats['hedge_wins']}")
+        for name, lat in stats["latency"].items():
+            if lat["p50"] is not None:
+                print(f"   {name}: p50={lat['p50']:.1f}s p95={lat['p95']:.1f}s p99={lat['p99']:.1f}s ({lat['samples']} samples)")
+
+
+# Global hedged caller instance
+_global_hedger = HedgedCaller()
+
+
+def get_hedger() -> HedgedCaller:
+    """Get the global hedged caller instance"""
+    return _global_hedger
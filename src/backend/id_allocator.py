@@ -0,0 +1,170 @@
+"""
+ID Allocator - Collision-free global IDs for the output tables
+
+The model numbers assets, statements, relatives and detail rows from 1 in
+every document, and spouse IDs used to fall back to submitter_id * 1000,
+so outputs from different documents (or merged runs) collide. The
+allocator reserves one contiguous block per counter per document and
+rewrites the document's IDs and foreign keys (statement_detail ->
+statement, asset details -> asset) into those blocks before rows are
+built.
+
+Reservations are thread-safe; with a state file they are also safe
+across processes (counters live in a JSON file guarded by flock).
+"""
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .config import ID_SHARD_STRIDE, ID_START, ID_STATE_FILE, ID_WORKER_BASE
+except ImportError:
+    from config import ID_SHARD_STRIDE, ID_START, ID_STATE_FILE, ID_WORKER_BASE
+
+try:
+    import fcntl
+except ImportError:  # Windows: thread-safe only
+    fcntl = None
+
+
+# Extracted list -> (counter, ID field, {foreign key field: parent counter})
+# Parents come before their children so foreign keys can be remapped in order
+ID_FIELDS = {
+    "relatives": ("relative", "relative_id", {}),
+    "statements": ("statement", "statement_id", {}),
+    "statement_details": ("statement_detail", "statement_detail_id", {"statement_id": "statement"}),
+    "assets": ("asset", "asset_id", {}),
+    "asset_land_info": ("asset_land", "asset_land_id", {"asset_id": "asset"}),
+    "asset_building_info": ("asset_building", "asset_building_id", {"asset_id": "asset"}),
+    "asset_vehicle_info": ("asset_vehicle", "asset_vehicle_id", {"asset_id": "asset"}),
+    "asset_other_info": ("asset_other", "asset_other_id", {"asset_id": "asset"}),
+}
+
+ID_COUNTERS = ("spouse",) + tuple(counter for counter, _, _ in ID_FIELDS.values())
+
+
+class IdAllocator:
+    """Hands out contiguous ID blocks per document"""
+
+    def __init__(self, state_file: Optional[Path] = None, start: int = ID_START):
+        """
+        Args:
+            state_file: JSON counter file shared by processes (None = in-process counters)
+            start: First ID of every counter when the counters are new
+        """
+        self.state_file = Path(state_file) if state_file else None
+        self.start = start
+        self._next = {counter: start for counter in ID_COUNTERS}
+        self._lock = threading.Lock()
+        self.documents = 0
+        if self.state_file and fcntl is None:
+            print("   ⚠️ fcntl not available - ID state file is not locked across processes")
+
+    def _reserve_in_file(self, counts: Dict[str, int]) -> Dict[str, int]:
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_file, "a+", encoding="utf-8") as handle:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                content = handle.read()
+                next_ids = {counter: self.start for counter in ID_COUNTERS}
+                next_ids.update(json.loads(content) if content.strip() else {})
+
+                starts = {counter: next_ids[counter] for counter in counts}
+                for counter, count in counts.items():
+                    next_ids[counter] += count
+
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(next_ids))
+                handle.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+        return starts
+
+    def reserve(self, counts: Dict[str, int]) -> Dict[str, int]:
+        """
+        Reserve `count` consecutive IDs for each counter in one step.
+
+        Args:
+            counts: Counter -> number of IDs needed
+
+        Returns:
+            Counter -> first reserved ID
+        """
+        with self._lock:
+            self.documents += 1
+            if self.state_file:
+                return self._reserve_in_file(counts)
+            starts = {counter: self._next[counter] for counter in counts}
+            for counter, count in counts.items():
+                self._next[counter] += count
+            return starts
+
+    def assign(self, extracted_data: Dict) -> Dict:
+        """
+        Copy of one document's extracted data with global IDs.
+
+        Each row gets the next ID of its block (in list order); foreign keys
+        pointing at a local ID the document doesn't define become None
+        rather than pointing at another document's row.
+        """
+        spouse_info = (extracted_data.get("spouse") or {}).get("info")
+        counts = {
+            counter: len(extracted_data.get(source) or [])
+            for source, (counter, _, _) in ID_FIELDS.items()
+        }
+        counts["spouse"] = 1 if spouse_info else 0
+        starts = self.reserve({counter: count for counter, count in counts.items() if count})
+
+        result = dict(extracted_data)
+        if spouse_info:
+            result["spouse"] = {**extracted_data["spouse"], "info": {**spouse_info, "spouse_id": starts["spouse"]}}
+
+        local_to_global = {counter: {} for counter in ID_COUNTERS}
+        for source, (counter, id_field, foreign_keys) in ID_FIELDS.items():
+            items = extracted_data.get(source)
+            if not items:
+                continue
+            mapping = local_to_global[counter]
+            rows = []
+            for offset, item in enumerate(items):
+                row = dict(item)
+                global_id = starts[counter] + offset
+                local_id = item.get(id_field)
+                if local_id is not None:
+                    mapping.setdefault(local_id, global_id)
+                row[id_field] = global_id
+                for fk_field, parent in foreign_keys.items():
+                    row[fk_field] = local_to_global[parent].get(item.get(fk_field))
+                rows.append(row)
+            result[source] = rows
+        return result
+
+    def get_stats(self) -> Dict:
+        """Documents assigned and next free ID per counter (in-process counters only)"""
+        with self._lock:
+            return {"documents": self.documents, "next_ids": None if self.state_file else dict(self._next)}
+
+
+def create_id_allocator(shard_index: int = 0, worker_slot: Optional[int] = None) -> IdAllocator:
+    """
+    Allocator from config (shared state file if ID_STATE_FILE is set).
+
+    Shards get disjoint ranges (ID_SHARD_STRIDE apart) so their outputs
+    merge without collisions and a re-run shard reproduces the same IDs.
+    Queue workers (worker_slot) get ranges from ID_WORKER_BASE on, so
+    worker-1 doesn't share shard-1's range when both are merged together.
+    """
+    if worker_slot is not None:
+        start = ID_WORKER_BASE + worker_slot * ID_SHARD_STRIDE
+    else:
+        start = ID_START + shard_index * ID_SHARD_STRIDE
+    return IdAllocator(state_file=ID_STATE_FILE or None, start=start)
@@ -0,0 +1,344 @@
+"""
+Shard Merge - Combine per-shard CSV outputs into the final 13 tables
+
+Each shard (main.py --shard i/n) writes the 13 CSVs into its own
+directory with its own ID range. The merge sorts every shard file in
+bounded chunks (sorted runs on disk) and k-way merges the runs with heapq.
+Memory is one chunk while sorting and one row per run while merging, plus
+one entry per document.
+
+Duplicates are dropped by document, not by row ID: model IDs restart per
+document when ALLOCATE_IDS is off (and in official-schema files), and the
+same document run in two shard or worker ranges gets different IDs. A
+document's rows are taken from the first shard that has any row for it
+(by nacc_id, or submitter_id where a table has no nacc_id). Child tables
+without either (spouse old names/positions, statement details, asset
+details) follow their parent row. Output files keep the shards' header,
+so transformer-schema and official-schema outputs both merge.
+"""
+import csv
+import heapq
+import re
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .transformer import CSV_FILES, TABLE_COLUMNS
+    from .config import MERGE_CHUNK_ROWS
+except ImportError:
+    from transformer import CSV_FILES, TABLE_COLUMNS
+    from config import MERGE_CHUNK_ROWS
+
+
+# Table -> sort key columns (those present in the files; the document column breaks ties)
+MERGE_KEYS = {
+    "submitter_old_name": ("submitter_id",),
+    "submitter_position": ("submitter_id",),
+    "spouse_info": ("spouse_id",),
+    "spouse_old_name": ("spouse_id",),
+    "spouse_position": ("spouse_id",),
+    "relative_info": ("relative_id",),
+    "statement": ("statement_id",),
+    "statement_detail": ("statement_detail_id",),
+    "asset": ("asset_id",),
+    "asset_building_info": ("asset_building_id",),
+    "asset_land_info": ("asset_land_id",),
+    "asset_vehicle_info": ("asset_vehicle_id",),
+    "asset_other_asset_info": ("asset_other_id",),
+}
+
+# Child table -> (column linking it to its parent row, parent table), for files without a document column
+MERGE_PARENTS = {
+    "spouse_old_name": ("spouse_id", "spouse_info"),
+    "spouse_position": ("spouse_id", "spouse_info"),
+    "statement_detail": ("statement_id", "statement"),
+    "asset_building_info": ("asset_id", "asset"),
+    "asset_land_info": ("asset_id", "asset"),
+    "asset_vehicle_info": ("asset_id", "asset"),
+    "asset_other_asset_info": ("asset_id", "asset"),
+}
+
+# Columns identifying a row's document, in order of preference
+DOCUMENT_COLUMNS = ("nacc_id", "submitter_id")
+
+_SHARD_DIR = re.compile(r"^(?:shard-(\d+)-of-\d+|worker-(\d+))$")
+
+
+def shard_dir_name(index: int, count: int) -> str:
+    """Output directory name of one shard"""
+    return f"shard-{index}-of-{count}"
+
+
+def worker_dir_name(slot: int) -> str:
+    """Output directory name of one queue worker"""
+    return f"worker-{slot}"
+
+
+def find_shard_dirs(base_dir: Path) -> List[Path]:
+    """Shard and queue-worker output directories under base_dir (shards first, by number)"""
+    dirs = []
+    for path in Path(base_dir).iterdir():
+        match = _SHARD_DIR.match(path.name)
+        if match and path.is_dir():
+            shard, worker = match.groups()
+            dirs.append(((0, int(shard)) if shard else (1, int(worker)), path))
+    return [path for _, path in sorted(dirs)]
+
+
+def _sort_key(values: Sequence[str]) -> Tuple:
+    """Numeric IDs sort numerically ("10" after "9"), blanks last"""
+    key = []
+    for value in values:
+        try:
+            key.append((0, float(value), ""))
+        except ValueError:
+            key.append((1, 0.0, value))
+    return tuple(key)
+
+
+def _read_header(path: Path) -> List[str]:
+    """Header of a shard CSV ([] for missing files and empty placeholder files)"""
+    if not Path(path).exists():
+        return []
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        header = next(csv.reader(handle), [])
+    return header if any(header) else []
+
+
+def _read_rows(path: Path, columns: List[str]) -> Iterator[List[str]]:
+    """Rows of a shard CSV in `columns` order (missing and empty placeholder files yield nothing)"""
+    header = _read_header(path)
+    if not header:
+        return
+    if not set(columns) <= set(header):
+        raise ValueError(f"{path}: columns {header} don't match the other shards ({columns})")
+    order = [header.index(column) for column in columns]
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        reader = csv.reader(handle)
+        next(reader)
+        for row in reader:
+            yield [row[i] for i in order]
+
+
+def table_columns(table: str, shard_files: List[Path]) -> List[str]:
+    """Columns of a merged table: the first shard's header (TABLE_COLUMNS if every file is empty)"""
+    for path in shard_files:
+        header = _read_header(path)
+        if header:
+            return header
+    return TABLE_COLUMNS[table]
+
+
+def document_column(columns: Sequence[str]) -> Optional[str]:
+    """Column identifying the document of a row, or None (child table)"""
+    return next((column for column in DOCUMENT_COLUMNS if column in columns), None)
+
+
+def _document_key(value: str) -> str:
+    """Same document for "62" and "62.0" (a float column in one shard)"""
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return str(int(number)) if number.is_integer() else value
+
+
+class DocumentFilter:
+    """Which shard each document's rows are taken from"""
+
+    def __init__(self):
+        self.owners: Dict[str, int] = {}  # document -> first shard with rows for it
+        self.dropped: Dict[Tuple[str, int], set] = {}  # (parent table, shard) -> link IDs of dropped rows
+        self.ambiguous: Dict[Tuple[str, int], set] = {}  # (parent table, shard) -> link IDs of kept and dropped rows
+
+    def scan(self, shard_no: int, path: Path):
+        """Register the documents of one shard file (call in shard order)"""
+        header = _read_header(path)
+        column = document_column(header)
+        if column is None:
+            return
+        idx = header.index(column)
+        with open(path, newline="", encoding="utf-8-sig") as handle:
+            reader = csv.reader(handle)
+            next(reader)
+            for row in reader:
+                if row[idx] != "":
+                    self.owners.setdefault(_document_key(row[idx]), shard_no)
+
+    def keep(self, document: str, shard_no: int) -> bool:
+        """True if the document's rows are taken from this shard"""
+        return document == "" or self.owners.get(_document_key(document), shard_no) == shard_no
+
+
+def _sorted_runs(path: Path, columns: List[str], key_idx: List[int], chunk_rows: int, tmp_dir: Path) -> List[Path]:
+    """Split one shard file into sorted run files (line number kept to preserve row order)"""
+    runs = []
+
+    def write_run(chunk):
+        chunk.sort(key=lambda item: (_sort_key([item[1][i] for i in key_idx]), item[0]))
+        run_path = tmp_dir / f"run-{len(runs)}.csv"
+        with open(run_path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle, lineterminator="\n")
+            writer.writerows([line] + row for line, row in chunk)
+        runs.append(run_path)
+
+    chunk = []
+    for line, row in enumerate(_read_rows(path, columns)):
+        chunk.append((line, row))
+        if len(chunk) >= chunk_rows:
+            write_run(chunk)
+            chunk = []
+    if chunk:
+        write_run(chunk)
+    return runs
+
+
+def _read_run(run_path: Path, shard_no: int, key_idx: List[int]) -> Iterator[Tuple]:
+    with open(run_path, newline="", encoding="utf-8") as handle:
+        for record in csv.reader(handle):
+            row = record[1:]
+            yield _sort_key([row[i] for i in key_idx]), shard_no, int(record[0]), row
+
+
+def merge_table(
+    table: str,
+    shard_files: List[Path],
+    output_path: Path,
+    chunk_rows: int = MERGE_CHUNK_ROWS,
+    documents: Optional[DocumentFilter] = None
+) -> Dict:
+    """
+    Merge one table's shard files into a sorted CSV with one copy of each document.
+
+    Args:
+        table: Table name (key of TABLE_COLUMNS)
+        shard_files: The table's CSV from each shard, in shard order (missing files are skipped)
+        output_path: Final CSV
+        chunk_rows: Rows sorted in memory at a time
+        documents: Shared filter of the merge (parents must be merged before their children);
+            default: one built from this table's files
+
+    Returns:
+        {"rows": rows written, "duplicates": rows dropped}
+
+    Raises:
+        ValueError: A child row's parent ID belongs to a kept and a dropped
+            document in the same shard (IDs were not allocated)
+    """
+    if documents is None:
+        documents = DocumentFilter()
+        for shard_no, path in enumerate(shard_files):
+            documents.scan(shard_no, path)
+
+    columns = table_columns(table, shard_files)
+    doc_column = document_column(columns)
+    # Children without a document column follow their parent's rows
+    link_column, parent = MERGE_PARENTS.get(table, (None, None)) if doc_column is None else (None, None)
+    if link_column not in columns:
+        link_column = None
+    # Link column of this table's children: sorted first, so a link ID's rows are adjacent
+    parent_link = next(
+        (link for link, parent_table in MERGE_PARENTS.values() if parent_table == table and link in columns),
+        None
+    )
+    key_columns = [column for column in MERGE_KEYS[table] if column in columns]
+    if parent_link:
+        key_columns = [parent_link] + [column for column in key_columns if column != parent_link]
+    if doc_column and doc_column not in key_columns:
+        key_columns.append(doc_column)
+    key_idx = [columns.index(column) for column in key_columns]
+    doc_idx = columns.index(doc_column) if doc_column else None
+    link_idx = columns.index(link_column) if link_column else None
+    rows = duplicates = 0
+
+    with tempfile.TemporaryDirectory(prefix=f"merge_{table}_") as tmp:
+        streams = []
+        for shard_no, path in enumerate(shard_files):
+            shard_tmp = Path(tmp) / str(shard_no)
+            shard_tmp.mkdir()
+            streams.extend(
+                _read_run(run, shard_no, key_idx)
+                for run in _sorted_runs(path, columns, key_idx, chunk_rows, shard_tmp)
+            )
+
+        with open(output_path, "w", newline="", encoding="utf-8-sig") as handle:
+            writer = csv.writer(handle, lineterminator="\n")
+            writer.writerow(columns)
+            group, decisions = None, {}
+            for key, shard_no, _, row in heapq.merge(*streams):
+                if doc_idx is not None:
+                    keep = documents.keep(row[doc_idx], shard_no)
+                elif link_idx is not None:
+                    link = row[link_idx]
+                    if link in documents.ambiguous.get((parent, shard_no), ()):
+                        raise ValueError(
+                            f"{table}: {link_column} {link} in {shard_files[shard_no]} belongs to more than "
+                            f"one document - IDs were not allocated (run the shards with ALLOCATE_IDS=true)"
+                        )
+                    keep = link not in documents.dropped.get((parent, shard_no), ())
+                else:
+                    keep = True
+
+                if parent_link and row[key_idx[0]] != "":
+                    link = row[key_idx[0]]
+                    if key[0] != group:
+                        group, decisions = key[0], {}
+                    decisions.setdefault(shard_no, set()).add(keep)
+                    if len(decisions[shard_no]) > 1:
+                        documents.ambiguous.setdefault((table, shard_no), set()).add(link)
+                    if not keep:
+                        documents.dropped.setdefault((table, shard_no), set()).add(link)
+
+                if not keep:
+                    duplicates += 1
+                    continue
+                writer.writerow(row)
+                rows += 1
+
+    return {"rows": rows, "duplicates": duplicates}
+
+
+def merge_shards(
+    shard_dirs: List[Path],
+    output_dir: Path,
+    prefix: str = "",
+    chunk_rows: int = MERGE_CHUNK_ROWS
+) -> List[Path]:
+    """
+    Merge the 13 tables of several shard output directories.
+
+    Args:
+        shard_dirs: Shard output directories (a document duplicated across shards is taken from the first)
+        output_dir: Directory for the merged CSVs
+        prefix: File name prefix used by the shards (e.g. "Train_")
+        chunk_rows: Rows sorted in memory at a time
+
+    Returns:
+        Merged CSV paths
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"\n🧩 Merging {len(shard_dirs)} shards into {output_dir}")
+
+    table_files = {
+        table: [Path(d) / f"{prefix}{filename}" for d in shard_dirs]
+        for table, filename in CSV_FILES.items()
+    }
+    documents = DocumentFilter()
+    for shard_no in range(len(shard_dirs)):
+        for shard_files in table_files.values():
+            documents.scan(shard_no, shard_files[shard_no])
+
+    saved_files = []
+    for table, filename in CSV_FILES.items():
+        shard_files = table_files[table]
+        output_path = output_dir / f"{prefix}{filename}"
+        stats = merge_table(table, shard_files, output_path, chunk_rows, documents)
+        saved_files.append(output_path)
+        print(f"✓ Merged {output_path} ({stats['rows']} rows from {sum(p.exists() for p in shard_files)} shards, "
+              f"{stats['duplicates']} duplicate-document rows dropped)")
+    return saved_files
@@ -0,0 +1,101 @@
+"""
+Metadata Store - doc_info / submitter_info / nacc_detail with hash indexes
+
+Loads the three input CSVs once (imputed, if an imputer is given) and
+indexes them by doc_id, submitter_id and nacc_id, so looking up a
+document's metadata is a dict lookup instead of a boolean scan of the
+whole DataFrame per document. Columns are kept as plain lists and a
+record (dict) is only built for the row that was asked for.
+
+The DataFrames stay available (doc_info, submitter_info, nacc_detail) for
+code that works on whole tables - slicing documents, the SQL summary.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import pandas as pd
+
+
+class _IndexedTable:
+    """Column lists + key -> first row position"""
+
+    __slots__ = ("columns", "values", "positions")
+
+    def __init__(self, df: pd.DataFrame, key: str):
+        self.columns = list(df.columns)
+        self.values = [df[column].tolist() for column in self.columns]
+        self.positions: Dict[Any, int] = {}
+        if key in df:
+            # Reversed so the first row of a duplicated key wins (what .iloc[0] picked)
+            keys = df[key].tolist()
+            for position in range(len(keys) - 1, -1, -1):
+                if not pd.isna(keys[position]):
+                    self.positions[keys[position]] = position
+
+    def get(self, key: Any) -> Optional[Dict]:
+        position = self.positions.get(key)
+        if position is None:
+            return None
+        return {column: values[position] for column, values in zip(self.columns, self.values)}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+class MetadataStore:
+    """The three metadata tables of a dataset, indexed by their keys"""
+
+    def __init__(self, doc_info: pd.DataFrame, submitter_info: pd.DataFrame, nacc_detail: pd.DataFrame):
+        """
+        Args:
+            doc_info: One row per document (doc_id, nacc_id, doc_location_url)
+            submitter_info: Submitter metadata (submitter_id)
+            nacc_detail: Declaration metadata (nacc_id)
+        """
+        self.doc_info = doc_info
+        self.submitter_info = submitter_info
+        self.nacc_detail = nacc_detail
+        self._docs = _IndexedTable(doc_info, "doc_id")
+        self._submitters = _IndexedTable(submitter_info, "submitter_id")
+        self._nacc = _IndexedTable(nacc_detail, "nacc_id")
+
+    @classmethod
+    def from_files(
+        cls,
+        doc_info_file: Path,
+        submitter_info_file: Path,
+        nacc_detail_file: Path,
+        imputer=None
+    ) -> "MetadataStore":
+        """
+        Read the input CSVs (and clean them with imputer.impute_metadata if given)
+        """
+        doc_info = pd.read_csv(doc_info_file, encoding='utf-8-sig')
+        submitter_info = pd.read_csv(submitter_info_file, encoding='utf-8-sig')
+        nacc_detail = pd.read_csv(nacc_detail_file, encoding='utf-8-sig')
+        if imputer:
+            print(f"\n🧹 Imputation: Cleaning metadata...")
+            doc_info = imputer.impute_metadata(doc_info, "doc_info")
+            submitter_info = imputer.impute_metadata(submitter_info, "submitter_info")
+            nacc_detail = imputer.impute_metadata(nacc_detail, "nacc_detail")
+        return cls(doc_info, submitter_info, nacc_detail)
+
+    def doc(self, doc_id: Any) -> Optional[Dict]:
+        """doc_info record, or None"""
+        return self._docs.get(doc_id)
+
+    def submitter(self, submitter_id: Any) -> Optional[Dict]:
+        """submitter_info record (first row of the submitter), or None"""
+        return self._submitters.get(submitter_id)
+
+    def nacc(self, nacc_id: Any) -> Optional[Dict]:
+        """nacc_detail record (first row of the nacc_id), or None"""
+        return self._nacc.get(nacc_id)
+
+    def docs(self, doc_info: Optional[pd.DataFrame] = None) -> Iterator[Dict]:
+        """doc_info records in file order (of a slice of doc_info, if given)"""
+        return iter((self.doc_info if doc_info is None else doc_info).to_dict("records"))
+
+    def __repr__(self) -> str:
+        return (f"MetadataStore({len(self.doc_info)} documents, "
+                f"{len(self._submitters)} submitters, {len(self._nacc)} nacc_ids)")
@@ -1,107 +1,396 @@
 """
 OCR-based PDF text extraction for Thai documents
 Uses Tesseract OCR to extract text from images
+
+Offline mode: extract_from_pdf() fills the pipeline schema without any LLM
+call. One compiled multi-pattern scanner tokenizes each OCR line (section
+headings, names, ages, dates, amounts) and a section state machine decides
+whether a line is a position, relative, statement or asset row.
 """
-import pytesseract
-from PIL import Image
 from pdf2image import convert_from_path
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .tesseract_pool import get_tesseract_pool
+    from .rule_extractor import RuleExtractor, TITLES, first_pages_text
+    from .table_parser import TableParser, STATEMENT_TYPE_LABELS, TOTAL_LABELS, parse_amount, parse_thai_date
+    from .config import RULE_FIELD_PAGES, THAI_MONTHS
+except ImportError:
+    from tesseract_pool import get_tesseract_pool
+    from rule_extractor import RuleExtractor, TITLES, first_pages_text
+    from table_parser import TableParser, STATEMENT_TYPE_LABELS, TOTAL_LABELS, parse_amount, parse_thai_date
+    from config import RULE_FIELD_PAGES, THAI_MONTHS
+
+
+_THAI = r"[\u0E00-\u0E7F]+"
+_MONTHS = "|".join(re.escape(m) for m in sorted(THAI_MONTHS, key=len, reverse=True))
+_HEADING_PREFIX = r"^\s*(?:ส่วนที่\s*\d*\s*|\(?\d{1,2}[.)]\s*)?(?:ข้อมูล|รายละเอียด(?:ประกอบ)?(?:รายการ)?)?\s*"
+
+# Asset detail sections -> asset_type_main_type_name in asset_type.csv
+ASSET_SECTIONS = {
+    "ที่ดิน": "ที่ดิน",
+    "โรงเรือน": "โรงเรือนและสิ่งปลูกสร้าง",
+    "ยานพาหนะ": "ยานพาหนะ",
+    "สิทธิ": "สิทธิและสัมปทาน",
+    "ทรัพย์สินอื่น": "ทรัพย์สินอื่น",
+}
+# Statement groups and the detail sections listed item by item
+STATEMENT_SECTIONS = list(STATEMENT_TYPE_LABELS) + ["เงินสด", "เงินฝาก", "เงินลงทุน", "เงินให้กู้ยืม", "เงินเบิกเกินบัญชี"]
+RELATIVE_WORDS = ["บิดาคู่สมรส", "มารดาคู่สมรส", "บิดา", "มารดา", "พี่น้อง", "บุตร"]
+AGENCY_WORDS = r"(?:กระทรวง|กรม|สำนักงาน|สำนัก|สภา|มหาวิทยาลัย|บริษัท|ธนาคาร|องค์การ|จังหวัด|เทศบาล|คณะ|พรรค)"
+
+# One scanner for every token kind; headings only match at line start.
+# Alternatives are tried in order at each position, so dates win over amounts.
+SCANNER_PATTERNS = [
+    ("h_positions", _HEADING_PREFIX + r"ตำแหน่ง"),
+    ("h_spouse", _HEADING_PREFIX + r"คู่สมรส\s*$"),
+    ("h_relatives", _HEADING_PREFIX + r"(?:" + "|".join(RELATIVE_WORDS) + r")"),
+    ("h_assets", _HEADING_PREFIX + r"(?:" + "|".join(ASSET_SECTIONS) + r")"),
+    ("h_statements", _HEADING_PREFIX + r"(?:" + "|".join(STATEMENT_SECTIONS) + r")"),
+    ("name", r"(?:" + "|".join(re.escape(t) for t in TITLES) + r")\s*" + _THAI + r"\s+" + _THAI),
+    ("age", r"อายุ\s*\d{1,3}\s*ปี"),
+    ("date", r"\d{1,2}\s*(?:" + _MONTHS + r")\s*\d{4}|\d{1,2}[/.-]\d{1,2}[/.-]\d{4}"),
+    ("amount", r"\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+\.\d{2}\b"),
+]
+SCANNER = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in SCANNER_PATTERNS), re.MULTILINE)
+
+_PAGE_MARKER = re.compile(r"^=== หน้า \d+ ===$")
+_PAGE_SPLIT = re.compile(r"=== หน้า (\d+) ===")
+_AGENCY = re.compile(r"(?:^|(?<=\s))" + AGENCY_WORDS)  # Agency names start a word
+_DIGITS = re.compile(r"\d+")
+
+
+def scan_line(line: str) -> Dict[str, List[str]]:
+    """Tokenize one OCR line: {token kind: [matched texts]}"""
+    tokens: Dict[str, List[str]] = {}
+    for match in SCANNER.finditer(line):
+        tokens.setdefault(match.lastgroup, []).append(match.group())
+    return tokens
 
 
 class OCRExtractor:
     """Extract text from PDF using Tesseract OCR"""
-    
+
     def __init__(self):
         """Initialize OCR extractor"""
-        # Configure Tesseract for Thai language
-        self.ocr_config = r'--oem 3 --psm 6 -l tha+eng'
-        
+        # Resident tha+eng Tesseract engines, shared across documents
+        self.pool = get_tesseract_pool()
+        self.rule_extractor = RuleExtractor(enabled=True)
+        self._stats_lock = threading.Lock()
+        self.stats = {"documents": 0, "pages": 0, "ocr_seconds": 0.0, "scan_seconds": 0.0, "rows": 0}
+
     def extract_text_from_pdf(self, pdf_path: Path, max_pages: int = None) -> str:
         """
         Extract text from PDF using OCR
-        
+
         Args:
             pdf_path: Path to PDF file
             max_pages: Maximum pages to process (None = all)
-            
+
         Returns:
             Extracted text from all pages
         """
         print(f"   🖼️  Converting PDF to images...")
-        
+
         # Convert PDF to images
         images = convert_from_path(pdf_path, dpi=300, fmt='png')
-        
+
         if max_pages:
             images = images[:max_pages]
-        
+
         print(f"   📸 Converted {len(images)} pages to images")
         print(f"   🔍 Running OCR on {len(images)} pages...")
-        
+
+        # Pages run in parallel on pooled engines, images stay in memory
+        page_texts = self.pool.ocr_pages(images)
+
         full_text = ""
-        for page_num, image in enumerate(images):
-            try:
-                # Extract text using Tesseract
-                page_text = pytesseract.image_to_string(image, config=self.ocr_config)
-                
-                if page_text.strip():
-                    full_text += f"\n\n=== หน้า {page_num + 1} ===\n{page_text}"
-                    
-                # Show progress
-                if (page_num + 1) % 5 == 0:
-                    print(f"   ... processed {page_num + 1}/{len(images)} pages")
-                    
-            except Exception as e:
-                print(f"   ⚠️ Error OCR page {page_num + 1}: {e}")
-                continue
-        
+        for page_num, page_text in enumerate(page_texts):
+            if page_text.strip():
+                full_text += f"\n\n=== หน้า {page_num + 1} ===\n{page_text}"
+
         print(f"   ✅ OCR complete: extracted {len(full_text)} characters")
-        
+
+        with self._stats_lock:
+            self.stats["pages"] += len(images)
         return full_text
-    
-    def extract_structured_data(self, text: str) -> Dict:
+
+    def extract_from_pdf(
+        self,
+        pdf_path: Path,
+        submitter_info: Dict,
+        nacc_detail: Dict,
+        enum_mappings: Dict
+    ) -> Dict:
+        """
+        Offline extraction: OCR + pattern scanner, no API calls
+
+        Args:
+            pdf_path: Path to PDF file
+            submitter_info: Submitter information (unused, same interface as other extractors)
+            nacc_detail: NACC detail information
+            enum_mappings: Enum type mappings
+
+        Returns:
+            Extracted data in the pipeline schema
+        """
+        start = time.time()
+        text = self.extract_text_from_pdf(pdf_path)
+        ocr_seconds = time.time() - start
+
+        start = time.time()
+        data = self.extract_structured_data(text, enum_mappings)
+        scan_seconds = time.time() - start
+
+        with self._stats_lock:
+            self.stats["documents"] += 1
+            self.stats["ocr_seconds"] += ocr_seconds
+            self.stats["scan_seconds"] += scan_seconds
+
+        print(f"   📊 Offline scan ({scan_seconds * 1000:.0f} ms): {len(data['assets'])} assets, "
+              f"{len(data['statements'])} statements, {len(data['submitter_positions'])} positions, "
+              f"{len(data['relatives'])} relatives")
+        return data
+
+    def extract_structured_data(self, text: str, enum_mappings: Optional[Dict] = None) -> Dict:
         """
         Extract structured data from OCR text using patterns
-        
+
         Args:
             text: Raw OCR text
-            
+            enum_mappings: Enum type mappings (asset/statement/relationship ids)
+
         Returns:
             Structured data dictionary
         """
+        enum_mappings = enum_mappings or {}
         data = {
             "assets": [],
             "statements": [],
+            "statement_details": [],
             "submitter_positions": [],
             "spouse_info": None,
             "relatives": []
         }
-        
-        # Extract asset information using patterns
-        # Pattern for money: จำนวนเงิน / มูลค่า followed by numbers
-        asset_values = re.findall(r'(?:จำนวนเงิน|มูลค่า|ราคา)[:\s]*([0-9,]+(?:\.[0-9]+)?)', text)
-        
-        # Pattern for dates: วันที่ DD/MM/YYYY or DD-MM-YYYY
-        dates = re.findall(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})', text)
-        
-        # Pattern for names: Thai names (ขื่อ / นามสกุล)
-        names = re.findall(r'(?:ชื่อ|นาม)[:\s]*([ก-๙a-zA-Z\s]+)', text)
-        
-        print(f"   📊 Found: {len(asset_values)} values, {len(dates)} dates, {len(names)} names")
-        
+
+        # Spouse name/age/marriage date come from the form fields
+        parts = _PAGE_SPLIT.split(text)
+        page_texts = dict(zip(map(int, parts[1::2]), parts[2::2]))
+        known_fields = self.rule_extractor.extract(first_pages_text(page_texts, RULE_FIELD_PAGES) if page_texts else text)
+        data = self.rule_extractor.apply(data, known_fields)
+
+        state = None
+        context = {}
+        detail_rows = []
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line or _PAGE_MARKER.match(line):
+                continue
+
+            tokens = scan_line(line)
+            headings = [kind for kind in tokens if kind.startswith("h_")]
+
+            # Section heading switches state; a value line inside a value
+            # section (e.g. "ที่ดิน 2,000,000.00" in the summary) stays data
+            from_heading = False
+            if headings and ("amount" not in tokens or state not in ("statements", "assets")):
+                state, context = self._enter_section(headings[0], line, enum_mappings)
+                if "amount" not in tokens:
+                    # The rest of a label line may still hold a row ("บิดา นาย ...")
+                    line = line[len(tokens[headings[0]][0]):].strip(" :")
+                    if not line:
+                        continue
+                    tokens = scan_line(line)
+                    from_heading = True
+
+            if "name" in tokens and (state == "relatives" or self._relationship_id(line, enum_mappings)):
+                relative = self._relative_row(line, tokens, enum_mappings, context)
+                if relative:
+                    data["relatives"].append(relative)
+            elif state == "positions" and "amount" not in tokens and (from_heading or _AGENCY.search(line) or "date" in tokens):
+                data["submitter_positions"].append(self._position_row(line, tokens))
+            elif state == "statements" and "amount" in tokens:
+                row = self._statement_row(line, tokens, enum_mappings, context)
+                if row:
+                    detail_rows.append(row)
+            elif state == "assets" and "amount" in tokens:
+                asset = self._asset_row(line, tokens, enum_mappings, context)
+                if asset:
+                    data["assets"].append(asset)
+
+        data["statements"], data["statement_details"] = TableParser.group_statements(detail_rows)
+        for i, asset in enumerate(data["assets"]):
+            asset["asset_id"] = i + 1
+            asset["index"] = i + 1
+        for i, relative in enumerate(data["relatives"]):
+            relative["relative_id"] = i + 1
+
+        with self._stats_lock:
+            self.stats["rows"] += sum(len(data[key]) for key in ("assets", "statement_details", "submitter_positions", "relatives"))
+
         return data
 
+    @classmethod
+    def _enter_section(cls, heading: str, line: str, enum_mappings: Dict):
+        """State machine transition for a heading line -> (state, context)"""
+        if heading == "h_positions":
+            return "positions", {}
+        if heading == "h_spouse":
+            return None, {}
+        if heading == "h_relatives":
+            return "relatives", {"relationship_id": cls._relationship_id(line, enum_mappings)}
+        if heading == "h_assets":
+            main_type = next(main for key, main in ASSET_SECTIONS.items() if key in line)
+            return "assets", {"asset_type_id": cls._fallback_asset_type(main_type, enum_mappings)}
+
+        # Statement group (รายได้, หนี้สิน, ...) or detail section (เงินฝาก, ...)
+        matched = TableParser.statement_detail_type(line, enum_mappings)
+        if matched:
+            return "statements", {"statement_detail_type_id": matched[0], "statement_type_id": matched[1]}
+        statement_type_id = next((tid for name, tid in STATEMENT_TYPE_LABELS.items() if name in line), None)
+        return "statements", {"statement_type_id": statement_type_id}
+
+    @staticmethod
+    def _relationship_id(text: str, enum_mappings: Dict) -> Optional[int]:
+        """Longest relationship name contained in text"""
+        best = None
+        for entry in enum_mappings.get("relationship", []):
+            name = str(entry.get("relationship_name", ""))
+            if name and name in text and (best is None or len(name) > len(best[1])):
+                best = (int(entry["relationship_id"]), name)
+        return best[0] if best else None
+
+    @staticmethod
+    def _fallback_asset_type(main_type: str, enum_mappings: Dict) -> Optional[int]:
+        """The "other" asset_type_id of a main asset type (last sub type listed)"""
+        candidates = [
+            entry for entry in enum_mappings.get("asset_type", [])
+            if entry.get("asset_type_main_type_name") == main_type
+        ]
+        others = [entry for entry in candidates if "อื่น" in str(entry.get("asset_type_sub_type_name", ""))]
+        chosen = (others or candidates[-1:])
+        return int(chosen[0]["asset_type_id"]) if chosen else None
+
+    @staticmethod
+    def _strip_tokens(line: str) -> str:
+        """Line text without amounts/dates/ages, for names and labels"""
+        text = SCANNER.sub(lambda m: "" if m.lastgroup in ("amount", "date", "age") else m.group(), line)
+        return re.sub(r"\s+", " ", text.replace("บาท", "")).strip(" |:-")
+
+    def _relative_row(self, line: str, tokens: Dict, enum_mappings: Dict, context: Dict) -> Optional[Dict]:
+        """Relative from a line with a name (relationship from the line or its section)"""
+        relationship_id = self._relationship_id(line.split(tokens["name"][0])[0], enum_mappings) or context.get("relationship_id")
+        if relationship_id is None:
+            return None
+
+        name = tokens["name"][0]
+        title = next(t for t in TITLES if name.startswith(t))
+        first_name, last_name = name[len(title):].split()[:2]
+        age = int(_DIGITS.search(tokens["age"][0]).group()) if "age" in tokens else None
+        return {
+            "relationship_id": relationship_id,
+            "title": title,
+            "first_name": first_name,
+            "last_name": last_name,
+            "age": age,
+        }
+
+    def _position_row(self, line: str, tokens: Dict) -> Dict:
+        """Position title/agency and start/end dates"""
+        label = self._strip_tokens(line)
+        agency = _AGENCY.search(label)
+        position = {
+            "position_title": label[:agency.start()].strip() if agency else label,
+            "position_agency": label[agency.start():].strip() if agency else "",
+        }
+        dates = tokens.get("date", [])
+        position.update(parse_thai_date(dates[0] if dates else "", prefix="position_start"))
+        position.update(parse_thai_date(dates[1] if len(dates) > 1 else "", prefix="position_end"))
+        return position
+
+    def _statement_row(self, line: str, tokens: Dict, enum_mappings: Dict, context: Dict) -> Optional[Dict]:
+        """Statement detail row: label + submitter/spouse/child amounts in column order"""
+        label = self._strip_tokens(line)
+        if not label or any(total in label for total in TOTAL_LABELS):
+            return None
+
+        matched = TableParser.statement_detail_type(label, enum_mappings)
+        if matched:
+            detail_type_id, statement_type_id = matched
+        else:
+            statement_type_id = context.get("statement_type_id")
+            detail_type_id = context.get("statement_detail_type_id")
+            if detail_type_id is None and statement_type_id is not None:
+                detail_type_id = TableParser.other_detail_type(statement_type_id, enum_mappings)
+            if detail_type_id is None:
+                return None
+
+        amounts = [parse_amount(a) or 0.0 for a in tokens["amount"]][:3] + [0.0, 0.0]
+        return {
+            "statement_type_id": statement_type_id,
+            "statement_detail_type_id": detail_type_id,
+            "statement_detail_name": label,
+            "valuation_submitter": amounts[0],
+            "valuation_spouse": amounts[1],
+            "valuation_child": amounts[2],
+        }
+
+    def _asset_row(self, line: str, tokens: Dict, enum_mappings: Dict, context: Dict) -> Optional[Dict]:
+        """Asset row: type from the line (or section), value is the last amount"""
+        label = self._strip_tokens(line)
+        if any(total in label for total in TOTAL_LABELS):
+            return None
+
+        asset_type_id = TableParser.asset_type_id(label, enum_mappings) or context.get("asset_type_id")
+        if asset_type_id is None:
+            return None
+
+        owner_spouse = "คู่สมรส" in label
+        owner_child = "บุตร" in label
+        asset = {
+            "asset_type_id": asset_type_id,
+            "asset_name": label[:200],
+            "valuation": parse_amount(tokens["amount"][-1]),
+            "owner_by_submitter": not (owner_spouse or owner_child),
+            "owner_by_spouse": owner_spouse,
+            "owner_by_child": owner_child,
+        }
+        asset.update(parse_thai_date(tokens["date"][0] if "date" in tokens else ""))
+        return asset
+
+    def get_stats(self) -> Dict:
+        """Offline throughput (documents/sec, OCR vs scan time)"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        total = stats["ocr_seconds"] + stats["scan_seconds"]
+        stats["docs_per_second"] = stats["documents"] / total if total else 0.0
+        stats["scan_docs_per_second"] = stats["documents"] / stats["scan_seconds"] if stats["scan_seconds"] else 0.0
+        return stats
+
+    def print_stats(self):
+        """Print offline extraction throughput"""
+        s = self.get_stats()
+        print(f"\n📴 Offline Extraction (no API calls):")
+        print(f"   {s['documents']} documents, {s['pages']} pages, {s['rows']} rows")
+        print(f"   OCR {s['ocr_seconds']:.1f}s + scan {s['scan_seconds']:.2f}s → {s['docs_per_second']:.2f} docs/sec "
+              f"(scanner alone {s['scan_docs_per_second']:.0f} docs/sec)")
+
 
 if __name__ == "__main__":
     # Test OCR extraction
     extractor = OCRExtractor()
     sample_pdf = Path("data/training/train input/Train_pdf/pdf/วทันยา_บุนนาค_สมาชิกสภาผู้แทนราษฎร_(ส.ส.)_กรณีพ้นจากตำแหน่ง_13_ธ.ค._2565.pdf")
-    
+
     if sample_pdf.exists():
         text = extractor.extract_text_from_pdf(sample_pdf, max_pages=3)
         print(f"\n📄 Extracted text (first 500 chars):\n{text[:500]}")
-        
+
         data = extractor.extract_structured_data(text)
         print(f"\n📊 Structured data: {data}")
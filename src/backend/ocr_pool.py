@@ -0,0 +1,176 @@
+"""
+EasyOCR Reader Pool - Load OCR models once per process
+
+easyocr.Reader loads its detection and recognition models on construction
+(several seconds each time). The pool keeps readers alive across documents
+and hands them out one per thread. Readers loaded before a fork are
+inherited by worker processes (copy-on-write), and spawned workers load
+their own once via init_worker(). Model load time is tracked separately
+from OCR time.
+"""
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .config import EASYOCR_LANGS, EASYOCR_POOL_SIZE, EASYOCR_GPU
+except ImportError:
+    from config import EASYOCR_LANGS, EASYOCR_POOL_SIZE, EASYOCR_GPU
+
+
+class EasyOCRReaderPool:
+    """
+    Thread-safe pool of long-lived easyocr.Reader instances.
+
+    Readers are created lazily up to `size`; a thread borrows one with
+    acquire() and returns it when done, so concurrent OCR never shares a
+    reader.
+    """
+
+    def __init__(self, size: int = EASYOCR_POOL_SIZE, langs: Optional[List[str]] = None, gpu: bool = EASYOCR_GPU):
+        """
+        Initialize an empty pool
+
+        Args:
+            size: Max readers (= max concurrent OCR threads)
+            langs: OCR languages
+            gpu: Run readers on GPU
+        """
+        self.size = max(1, size)
+        self.langs = langs or EASYOCR_LANGS
+        self.gpu = gpu
+        self._readers: List = []
+        self._loading = 0
+        self._reset_sync()
+        self._stats = {"readers_loaded": 0, "load_seconds": 0.0, "pages": 0, "ocr_seconds": 0.0}
+
+    def _reset_sync(self):
+        """(Re)create lock and queue - needed after fork, keeps loaded readers"""
+        self._lock = threading.Lock()
+        self._loading = 0
+        self._available: "queue.Queue" = queue.Queue()
+        for reader in self._readers:
+            self._available.put(reader)
+        self._pid = os.getpid()
+
+    def _check_process(self):
+        """Locks copied by fork may be held by a parent thread - rebuild them"""
+        if self._pid != os.getpid():
+            self._reset_sync()
+
+    def _reserve_slot(self) -> bool:
+        """Claim room for one more reader (False if the pool is full)"""
+        with self._lock:
+            if len(self._readers) + self._loading >= self.size:
+                return False
+            self._loading += 1
+            return True
+
+    def _load_reader(self):
+        """Create one reader (slot already reserved) and time its model load"""
+        import easyocr
+
+        start = time.time()
+        try:
+            reader = easyocr.Reader(self.langs, gpu=self.gpu, verbose=False)
+        except Exception:
+            with self._lock:
+                self._loading -= 1
+            raise
+        elapsed = time.time() - start
+
+        with self._lock:
+            self._readers.append(reader)
+            self._loading -= 1
+            self._stats["readers_loaded"] += 1
+            self._stats["load_seconds"] += elapsed
+        print(f"   🔧 EasyOCR reader loaded in {elapsed:.1f}s ({len(self._readers)}/{self.size})")
+        return reader
+
+    def preload(self, count: Optional[int] = None):
+        """
+        Load readers now (e.g. before forking workers or at startup).
+
+        Args:
+            count: Readers to have loaded (default: pool size)
+        """
+        self._check_process()
+        target = min(count or self.size, self.size)
+        while len(self._readers) < target and self._reserve_slot():
+            self._available.put(self._load_reader())
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a reader for the duration of the with-block"""
+        self._check_process()
+        try:
+            reader = self._available.get_nowait()
+        except queue.Empty:
+            reader = self._load_reader() if self._reserve_slot() else self._available.get()
+
+        try:
+            yield reader
+        finally:
+            self._available.put(reader)
+
+    def readtext(self, image, **kwargs):
+        """
+        OCR one image with a pooled reader.
+
+        Args:
+            image: numpy array, PIL image bytes or path accepted by easyocr
+            **kwargs: Passed to Reader.readtext (e.g. detail=0)
+
+        Returns:
+            easyocr readtext result
+        """
+        with self.acquire() as reader:
+            start = time.time()
+            result = reader.readtext(image, **kwargs)
+            elapsed = time.time() - start
+
+        with self._lock:
+            self._stats["pages"] += 1
+            self._stats["ocr_seconds"] += elapsed
+        return result
+
+    def get_stats(self) -> Dict:
+        """Model load and OCR timing"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["seconds_per_page"] = stats["ocr_seconds"] / stats["pages"] if stats["pages"] else 0.0
+        return stats
+
+    def print_stats(self):
+        """Print model load vs OCR time"""
+        s = self.get_stats()
+        print(f"\n🔤 EasyOCR Reader Pool:")
+        print(f"   Readers loaded: {s['readers_loaded']} ({s['load_seconds']:.1f}s model load)")
+        print(f"   OCR: {s['pages']} pages in {s['ocr_seconds']:.1f}s ({s['seconds_per_page']:.2f}s/page)")
+
+
+# Per-process reader pool (inherited across fork, rebuilt lazily otherwise)
+_global_pool: Optional[EasyOCRReaderPool] = None
+_global_pool_lock = threading.Lock()
+
+
+def get_reader_pool() -> EasyOCRReaderPool:
+    """Get the process-wide EasyOCR reader pool"""
+    global _global_pool
+    if _global_pool is None:
+        with _global_pool_lock:
+            if _global_pool is None:
+                _global_pool = EasyOCRReaderPool()
+    return _global_pool
+
+
+def init_worker(readers: int = 1):
+    """ProcessPoolExecutor initializer: load this worker's readers once"""
+    get_reader_pool().preload(readers)
@@ -0,0 +1,212 @@
+"""
+Typed Output Formats - Parquet (Arrow) and JSON Lines next to the CSVs
+
+The 13 tables get a typed schema (ids and ages as integers, valuations as
+floats, owner flags as booleans, date parts as small integers, the rest as
+strings). Parquet lets analytics jobs memory-map columns instead of
+re-parsing CSV text, optionally partitioned by nacc_id range; JSON Lines is
+written incrementally alongside streamed CSVs. pyarrow is optional - only
+needed for Parquet.
+
+Tables are passed column-oriented ({column: values}, as held by
+TableBuffer.data).
+"""
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .config import PARQUET_ROW_GROUP_SIZE
+except ImportError:
+    from config import PARQUET_ROW_GROUP_SIZE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Date parts are stored as separate day/month/year columns
+_DATE_PART_SUFFIXES = ("_date", "_month", "_year")
+_INT_COLUMNS = {"age", "index", "statement_number", "vehicle_year"}
+_FLOAT_COLUMNS = {"valuation", "right_area_rai", "right_area_ngan", "right_area_wa"}
+
+
+def column_type(column: str) -> str:
+    """Logical type of a column: "int", "float", "bool" or "str" """
+    if column.startswith("owner_by_"):
+        return "bool"
+    if column in _FLOAT_COLUMNS:
+        return "float"
+    if column.endswith("_id") or column in _INT_COLUMNS:
+        return "int"
+    if column.endswith(_DATE_PART_SUFFIXES) and column != "latest_submitted_date":
+        return "int"
+    return "str"
+
+
+def coerce(value: Any, kind: str) -> Any:
+    """Convert one extracted value to its column type (None if empty/unreadable)"""
+    if value is None or value == "":
+        return None
+    try:
+        if kind == "bool":
+            return value.upper() == "TRUE" if isinstance(value, str) else bool(value)
+        if kind == "int":
+            return int(float(str(value).replace(",", "")))
+        if kind == "float":
+            return float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+    return str(value)
+
+
+def arrow_schema(columns: List[str]) -> "pa.Schema":
+    """Arrow schema for a table's columns"""
+    types = {"int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(), "str": pa.string()}
+    return pa.schema([(column, types[column_type(column)]) for column in columns])
+
+
+def to_arrow(data: Dict[str, List], columns: List[str]) -> "pa.Table":
+    """Column lists -> typed Arrow table"""
+    typed = {}
+    for column in columns:
+        kind = column_type(column)
+        typed[column] = [coerce(value, kind) for value in data[column]]
+    return pa.Table.from_pydict(typed, schema=arrow_schema(columns))
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+
+
+def write_parquet(
+    data: Dict[str, List],
+    columns: List[str],
+    path: Path,
+    partition_size: int = 0
+) -> Path:
+    """
+    Write one table as Parquet.
+
+    Args:
+        data: Column -> values
+        columns: Column order (schema)
+        path: Output file (or dataset directory when partitioned)
+        partition_size: Partition rows by nacc_id // partition_size (0 = single file;
+            tables without nacc_id are never partitioned)
+
+    Returns:
+        Written file or directory
+    """
+    _require_pyarrow()
+    table = to_arrow(data, columns)
+
+    if partition_size and "nacc_id" in columns:
+        path = path.with_suffix("")
+        ranges = [
+            None if nacc_id is None else nacc_id // partition_size * partition_size
+            for nacc_id in table.column("nacc_id").to_pylist()
+        ]
+        table = table.append_column("nacc_range", pa.array(ranges, pa.int64()))
+        pq.write_to_dataset(table, root_path=str(path), partition_cols=["nacc_range"])
+        return path
+
+    pq.write_table(table, str(path))
+    return path
+
+
+class ParquetStreamWriter:
+    """Streaming Parquet: one writer per table, a row group every N buffered rows"""
+
+    def __init__(self, paths: Dict[str, Path], table_columns: Dict[str, List[str]], row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        """
+        Args:
+            paths: Table -> output file
+            table_columns: Table -> column order
+            row_group_size: Rows buffered per table before a row group is written
+        """
+        _require_pyarrow()
+        self.table_columns = table_columns
+        self.row_group_size = row_group_size
+        self._buffers = {table: {column: [] for column in columns} for table, columns in table_columns.items()}
+        self._writers = {
+            table: pq.ParquetWriter(str(paths[table]), arrow_schema(columns))
+            for table, columns in table_columns.items()
+        }
+
+    def _buffered(self, table: str) -> int:
+        return len(self._buffers[table][self.table_columns[table][0]])
+
+    def _write_group(self, table: str):
+        buffer = self._buffers[table]
+        if self._buffered(table):
+            self._writers[table].write_table(to_arrow(buffer, self.table_columns[table]))
+            for values in buffer.values():
+                values.clear()
+
+    def write(self, table: str, data: Dict[str, List]):
+        """Buffer column values, writing a row group when the buffer is full"""
+        for column, values in self._buffers[table].items():
+            values.extend(data[column])
+        if self._buffered(table) >= self.row_group_size:
+            self._write_group(table)
+
+    def flush(self):
+        """Row groups are written when full - small groups would hurt column reads"""
+
+    def close(self):
+        """Write remaining rows and finalize the files (empty tables keep their schema)"""
+        for table, writer in self._writers.items():
+            self._write_group(table)
+            writer.close()
+        self._writers = {}
+
+
+class JsonlWriter:
+    """Streaming JSON Lines: one typed JSON object per row, appended per document"""
+
+    def __init__(self, paths: Dict[str, Path], table_columns: Dict[str, List[str]]):
+        """
+        Args:
+            paths: Table -> output file
+            table_columns: Table -> column order
+        """
+        self.table_columns = table_columns
+        self.types = {
+            table: [column_type(column) for column in columns]
+            for table, columns in table_columns.items()
+        }
+        self._files = {table: open(paths[table], "w", encoding="utf-8") for table in table_columns}
+
+    def write(self, table: str, data: Dict[str, List]):
+        handle = self._files[table]
+        columns = self.table_columns[table]
+        types = self.types[table]
+        for row in zip(*(data[column] for column in columns)):
+            record = {column: coerce(value, kind) for column, kind, value in zip(columns, types, row)}
+            handle.write(json.dumps(record, ensure_ascii=False))
+            handle.write("\n")
+
+    def flush(self):
+        for handle in self._files.values():
+            handle.flush()
+
+    def close(self):
+        for handle in self._files.values():
+            handle.close()
+        self._files = {}
+
+
+def write_jsonl(data: Dict[str, List], columns: List[str], path: Path) -> Path:
+    """Write one table as JSON Lines"""
+    writer = JsonlWriter({"table": path}, {"table": columns})
+    writer.write("table", data)
+    writer.close()
+    return path
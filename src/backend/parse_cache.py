@@ -0,0 +1,150 @@
+"""
+Persistent Docling Parse Cache - Skip OCR/layout on reruns
+
+Stores Docling's markdown, table structures and per-page markdown on disk,
+keyed by the PDF hash plus the Docling pipeline options. Reruns that only
+change prompts or model settings reuse the parse and never load OCR models.
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .pdf_cache import compute_file_hash
+    from .config import DOCLING_CACHE_DIR, USE_DOCLING_CACHE
+except ImportError:
+    from pdf_cache import compute_file_hash
+    from config import DOCLING_CACHE_DIR, USE_DOCLING_CACHE
+
+# Bump when the stored parse format changes
+CACHE_FORMAT_VERSION = 1
+
+
+def options_signature(options: Dict) -> str:
+    """
+    Hash Docling pipeline options (plus Docling version) into a cache key part.
+
+    Args:
+        options: Pipeline options that affect the parse (OCR langs, table structure, ...)
+
+    Returns:
+        Short hex digest
+    """
+    try:
+        from importlib.metadata import version
+        docling_version = version("docling")
+    except Exception:
+        docling_version = "unknown"
+
+    payload = json.dumps(
+        {"options": options, "docling": docling_version, "format": CACHE_FORMAT_VERSION},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class DoclingParseCache:
+    """On-disk cache of Docling parse results (one JSON file per PDF + options)"""
+
+    def __init__(self, cache_dir: Path = DOCLING_CACHE_DIR, enabled: bool = USE_DOCLING_CACHE):
+        """
+        Initialize cache
+
+        Args:
+            cache_dir: Directory for cached parses
+            enabled: Disable to always re-parse
+        """
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self._stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    def _path(self, pdf_path: Path, options: Dict) -> Path:
+        """Cache file path for a PDF and option set"""
+        return self.cache_dir / f"{compute_file_hash(pdf_path)}_{options_signature(options)}.json"
+
+    def get(self, pdf_path: Path, options: Dict) -> Optional[Dict]:
+        """
+        Get cached parse for PDF if available.
+
+        Args:
+            pdf_path: Path to PDF file
+            options: Docling pipeline options used for the parse
+
+        Returns:
+            Parse dict (markdown, tables, pages) or None
+        """
+        if not self.enabled:
+            return None
+
+        cache_file = self._path(pdf_path, options)
+        if not cache_file.exists():
+            self._stats["misses"] += 1
+            return None
+
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                parsed = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"   ⚠️ Ignoring unreadable parse cache {cache_file.name}: {e}")
+            self._stats["misses"] += 1
+            return None
+
+        # JSON object keys are strings - restore integer page numbers
+        parsed["pages"] = {int(k): v for k, v in parsed.get("pages", {}).items()}
+        self._stats["hits"] += 1
+        print(f"   ⚡ Parse cache HIT: Reusing Docling output ({len(parsed['pages'])} pages, no OCR)")
+        return parsed
+
+    def put(self, pdf_path: Path, options: Dict, parsed: Dict):
+        """
+        Store a parse result.
+
+        Writes to a temp file and renames it so concurrent readers never
+        see a partial file.
+        """
+        if not self.enabled:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = self._path(pdf_path, options)
+        record = {
+            "markdown": parsed["markdown"],
+            "tables": parsed["tables"],
+            "pages": parsed["pages"],
+            "created_at": time.time(),
+        }
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            os.replace(tmp_name, cache_file)
+            self._stats["writes"] += 1
+            print(f"   💾 Cached Docling parse for future runs")
+        except Exception as e:
+            Path(tmp_name).unlink(missing_ok=True)
+            print(f"   ⚠️ Could not write parse cache: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        total = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate_percent": (self._stats["hits"] / total * 100) if total else 0,
+        }
+
+
+# Global parse cache instance
+_global_parse_cache = DoclingParseCache()
+
+
+def get_parse_cache() -> DoclingParseCache:
+    """Get the global Docling parse cache instance"""
+    return _global_parse_cache
@@ -9,6 +9,23 @@ from PIL import Image
 import time
 
 
+def compute_file_hash(file_path: Path) -> str:
+    """
+    Compute SHA256 hash of a file (read in chunks for memory efficiency).
+
+    Args:
+        file_path: Path to file
+
+    Returns:
+        Hex string of file hash
+    """
+    hash_obj = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(8192), b''):
+            hash_obj.update(chunk)
+    return hash_obj.hexdigest()
+
+
 class PDFConversionCache:
     """
     Cache for PDF to image conversions to avoid redundant processing.
@@ -36,12 +53,7 @@ class PDFConversionCache:
         Returns:
             Hex string of file hash
         """
-        hash_obj = hashlib.sha256()
-        with open(pdf_path, 'rb') as f:
-            # Read in chunks for memory efficiency
-            for chunk in iter(lambda: f.read(8192), b''):
-                hash_obj.update(chunk)
-        return hash_obj.hexdigest()
+        return compute_file_hash(pdf_path)
 
     def get(self, pdf_path: Path) -> Optional[List[Image.Image]]:
         """
@@ -82,3 +82,55 @@ def should_use_high_dpi(complexity: float, threshold: float = 0.7) -> bool:
         True if high DPI needed
     """
     return complexity >= threshold
+
+
+def get_page_count(pdf_path: Path) -> int:
+    """
+    Get number of pages in a PDF without rendering it.
+
+    Args:
+        pdf_path: Path to PDF file
+
+    Returns:
+        Page count
+    """
+    import PyPDF2
+
+    with open(pdf_path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def convert_pdf_pages(pdf_path: Path, pages: List[int], dpi: int = 300) -> List[Image.Image]:
+    """
+    Render only selected pages of a PDF.
+
+    Contiguous page numbers are rendered with one pdf2image call each,
+    so re-rendering a section costs only its own pages.
+
+    Args:
+        pdf_path: Path to PDF file
+        pages: 1-based page numbers (sorted)
+        dpi: Render resolution
+
+    Returns:
+        List of PIL Images in the order of pages
+    """
+    images = []
+    runs = []
+    for page in pages:
+        if runs and page == runs[-1][1] + 1:
+            runs[-1][1] = page
+        else:
+            runs.append([page, page])
+
+    thread_count = min(os.cpu_count() or 4, 4)
+    for first, last in runs:
+        images.extend(convert_from_path(
+            str(pdf_path),
+            dpi=dpi,
+            first_page=first,
+            last_page=last,
+            thread_count=thread_count
+        ))
+
+    return images
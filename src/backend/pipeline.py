@@ -4,8 +4,11 @@ Main Pipeline - Orchestrates PDF extraction and CSV generation
 import pandas as pd
 from pathlib import Path
 from tqdm import tqdm
-from typing import Optional
+from typing import Dict, Optional, Tuple
+import os
+import socket
 import sys
+import time
 
 # Add current directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
@@ -16,20 +19,40 @@ try:
     from .vision_extractor import VisionExtractor
     from .transformer import DataTransformer
     from .imputer import DataImputer
-    from .config import DATA_DIR, OUTPUT_DIR, USE_VISION, USE_DOCLING, USE_IMPUTATION, IMPUTATION_STRATEGY, VALIDATE_PDF_BEFORE_EXTRACTION
+    from .hedging import get_hedger
+    from .usage_tracker import get_usage_tracker
+    from .refiner import SectionRefiner
+    from .ocr_pool import get_reader_pool
+    from .ocr_extractor import OCRExtractor
+    from .id_allocator import create_id_allocator
+    from .merge import shard_dir_name, worker_dir_name
+    from .work_queue import WorkQueue
+    from .sql_sink import build_summary
+    from .metadata_store import MetadataStore
+    from .config import DATA_DIR, OUTPUT_DIR, USE_VISION, USE_DOCLING, USE_OFFLINE, USE_IMPUTATION, USE_REFINEMENT, IMPUTATION_STRATEGY, VALIDATE_PDF_BEFORE_EXTRACTION, QUEUE_POLL_SECONDS, SQL_SUMMARY, ALLOCATE_IDS
 except ImportError:
     from extractor import GeminiExtractor
     from docling_extractor import DoclingExtractor
     from vision_extractor import VisionExtractor
     from transformer import DataTransformer
     from imputer import DataImputer
-    from config import DATA_DIR, OUTPUT_DIR, USE_VISION, USE_DOCLING, USE_IMPUTATION, IMPUTATION_STRATEGY, VALIDATE_PDF_BEFORE_EXTRACTION
+    from hedging import get_hedger
+    from usage_tracker import get_usage_tracker
+    from refiner import SectionRefiner
+    from ocr_pool import get_reader_pool
+    from ocr_extractor import OCRExtractor
+    from id_allocator import create_id_allocator
+    from merge import shard_dir_name, worker_dir_name
+    from work_queue import WorkQueue
+    from sql_sink import build_summary
+    from metadata_store import MetadataStore
+    from config import DATA_DIR, OUTPUT_DIR, USE_VISION, USE_DOCLING, USE_OFFLINE, USE_IMPUTATION, USE_REFINEMENT, IMPUTATION_STRATEGY, VALIDATE_PDF_BEFORE_EXTRACTION, QUEUE_POLL_SECONDS, SQL_SUMMARY, ALLOCATE_IDS
 
 
 class Pipeline:
     """Main pipeline for processing NACC asset declaration documents"""
 
-    def __init__(self, api_key: Optional[str] = None, use_vision: bool = USE_VISION, use_docling: bool = USE_DOCLING, use_imputation: bool = USE_IMPUTATION):
+    def __init__(self, api_key: Optional[str] = None, use_vision: bool = USE_VISION, use_docling: bool = USE_DOCLING, use_imputation: bool = USE_IMPUTATION, use_refinement: bool = USE_REFINEMENT, use_offline: bool = USE_OFFLINE):
         """
         Initialize pipeline with Gemini API key and extractor selection
 
@@ -38,8 +61,14 @@ class Pipeline:
             use_vision: Use Gemini Vision API (default: True, fastest & most accurate)
             use_docling: Use Docling extractor (default: False) or legacy EasyOCR extractor
             use_imputation: Use data imputation (default: True)
+            use_refinement: Re-extract low-confidence sections from their pages (default: True)
+            use_offline: Tesseract + pattern scanner only, no API calls (overrides the others)
         """
-        if use_vision:
+        if use_offline:
+            print("   📴 Using offline extractor (Tesseract OCR + pattern scanner, no API calls)")
+            self.extractor = OCRExtractor()
+            use_refinement = False  # Re-extraction needs Gemini
+        elif use_vision:
             print("   🚀 Using Gemini Vision API (direct image processing - FAST & ACCURATE)")
             self.extractor = VisionExtractor(api_key) if api_key else VisionExtractor()
         elif use_docling:
@@ -58,7 +87,16 @@ class Pipeline:
             print("   ⚠️  Skipping Data Imputation")
             self.imputer = None
 
+        # Confidence-triggered re-extraction of weak sections
+        if use_refinement:
+            print("   🔁 Using targeted re-extraction for low-confidence sections")
+            self.refiner = SectionRefiner()
+        else:
+            self.refiner = None
+
         self.enum_mappings = self._load_enum_mappings()
+        self.usage_tracker = get_usage_tracker()
+        self.last_usage = None
 
     def _load_enum_mappings(self) -> dict:
         """Load enum type mappings from CSV files"""
@@ -86,10 +124,148 @@ class Pipeline:
 
         return mappings
 
+    def _refine(self, extracted_data: dict, pdf_path: Path, submitter_info: dict, nacc_detail: dict) -> dict:
+        """Re-extract low-confidence sections (no-op if refinement is disabled)"""
+        if not self.refiner or not extracted_data:
+            return extracted_data
+        return self.refiner.refine(
+            self.extractor,
+            pdf_path,
+            extracted_data,
+            submitter_info,
+            nacc_detail,
+            self.enum_mappings
+        )
+
+    def dataset_paths(self, mode: str = "train") -> dict:
+        """Input files, default output directory and file prefix of a dataset"""
+        if mode == "train":
+            input_dir = DATA_DIR / "training" / "train input"
+            return {
+                "pdf_dir": input_dir / "Train_pdf" / "pdf",
+                "doc_info_file": input_dir / "Train_doc_info.csv",
+                "submitter_info_file": input_dir / "Train_submitter_info.csv",
+                "nacc_detail_file": input_dir / "Train_nacc_detail.csv",
+                "output_dir": OUTPUT_DIR / "train",
+                "prefix": "Train_",
+            }
+        # test
+        input_dir = DATA_DIR / "test final" / "test final input"
+        return {
+            "pdf_dir": input_dir / "Test final_pdf" / "pdf",
+            "doc_info_file": input_dir / "Test final_doc_info.csv",
+            "submitter_info_file": input_dir / "Test final_submitter_info.csv",
+            "nacc_detail_file": input_dir / "Test final_nacc_detail.csv",
+            "output_dir": OUTPUT_DIR / "test",
+            "prefix": "Test_",
+        }
+
+    def load_metadata(self, paths: dict) -> MetadataStore:
+        """Load (and impute) doc_info, submitter_info and nacc_detail into an indexed store"""
+        print(f"\n📋 Loading metadata...")
+        # Imputation Step: Clean and validate metadata
+        return MetadataStore.from_files(
+            paths["doc_info_file"],
+            paths["submitter_info_file"],
+            paths["nacc_detail_file"],
+            imputer=self.imputer if self.use_imputation else None
+        )
+
+    @staticmethod
+    def missing_inputs(doc_row: Optional[Dict], pdf_dir: Path, metadata: MetadataStore) -> Optional[str]:
+        """Why a document can't be processed at all (no doc_info row, PDF or metadata missing), or None"""
+        if doc_row is None:
+            return "not in doc_info"
+        if not (pdf_dir / doc_row['doc_location_url']).exists():
+            return f"PDF not found: {doc_row['doc_location_url']}"
+        nacc_id = doc_row['nacc_id']
+        if metadata.submitter(nacc_id) is None or metadata.nacc(nacc_id) is None:
+            return f"Missing metadata for nacc_id {nacc_id}"
+        return None
+
+    def process_document(
+        self,
+        doc_row: dict,
+        pdf_dir: Path,
+        metadata: MetadataStore,
+        transformer: DataTransformer
+    ) -> bool:
+        """
+        Extract, refine and transform one document of a dataset
+
+        Args:
+            doc_row: doc_info row (doc_id, nacc_id, doc_location_url)
+            pdf_dir: Directory holding the dataset's PDFs
+            metadata: Submitter and NACC metadata
+            transformer: Receives the document's rows
+
+        Returns:
+            True if rows were produced
+        """
+        doc_id = doc_row['doc_id']
+        nacc_id = doc_row['nacc_id']
+        pdf_filename = doc_row['doc_location_url']
+
+        problem = self.missing_inputs(doc_row, pdf_dir, metadata)
+        if problem:
+            print(f"\n⚠️  {problem}")
+            return False
+
+        # Find PDF file, get submitter and NACC info
+        pdf_path = pdf_dir / pdf_filename
+        submitter_info = metadata.submitter(nacc_id)
+        nacc_detail = metadata.nacc(nacc_id)
+
+        # Imputation Step: Validate PDF before extraction
+        if self.use_imputation and self.imputer and VALIDATE_PDF_BEFORE_EXTRACTION:
+            validation_result = self.imputer.validate_pdf(pdf_path)
+            if not validation_result["valid"]:
+                print(f"\n❌ PDF validation failed: {pdf_filename}")
+                for error in validation_result["errors"]:
+                    print(f"      {error}")
+                return False
+
+        self.usage_tracker.begin_document(pdf_filename)
+        try:
+            # Extract data from PDF
+            print(f"\n🔍 Extracting: {pdf_filename}")
+            extracted_data = self.extractor.extract_from_pdf(
+                pdf_path,
+                submitter_info,
+                nacc_detail,
+                self.enum_mappings
+            )
+            extracted_data = self._refine(extracted_data, pdf_path, submitter_info, nacc_detail)
+
+            if not extracted_data:
+                print(f"⚠️  No data extracted")
+                return False
+
+            # Transform to CSV format
+            transformer.transform_document(
+                extracted_data,
+                doc_id,
+                nacc_id,
+                nacc_id
+            )
+            print(f"✓ Successfully processed")
+            return True
+
+        except Exception as e:
+            print(f"\n❌ Error processing {pdf_filename}: {e}")
+            return False
+
+        finally:
+            doc_usage = self.usage_tracker.end_document()
+            print(f"   💰 {doc_usage['total_tokens']:,} tokens, ${doc_usage['cost_usd']:.4f}")
+
     def process_dataset(
         self,
         mode: str = "train",
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        shard: Optional[Tuple[int, int]] = None,
+        output_dir: Optional[Path] = None,
+        sql_summary: bool = SQL_SUMMARY
     ):
         """
         Process entire dataset (training or test)
@@ -97,124 +273,68 @@ class Pipeline:
         Args:
             mode: 'train' or 'test'
             limit: Optional limit on number of documents to process
+            shard: (index, count) - only process documents with doc_id % count == index,
+                into their own directory and ID range (combine with merge_shards)
+            output_dir: Output directory (default: output/<mode>, or output/<mode>/shard-i-of-n)
+            sql_summary: Also write <prefix>summary.csv by running validation_query.sql over the outputs
         """
-        # Determine input paths
-        if mode == "train":
-            input_dir = DATA_DIR / "training" / "train input"
-            pdf_dir = input_dir / "Train_pdf" / "pdf"
-            doc_info_file = input_dir / "Train_doc_info.csv"
-            submitter_info_file = input_dir / "Train_submitter_info.csv"
-            nacc_detail_file = input_dir / "Train_nacc_detail.csv"
-            output_dir = OUTPUT_DIR / "train"
-            prefix = "Train_"
-        else:  # test
-            input_dir = DATA_DIR / "test final" / "test final input"
-            pdf_dir = input_dir / "Test final_pdf" / "pdf"
-            doc_info_file = input_dir / "Test final_doc_info.csv"
-            submitter_info_file = input_dir / "Test final_submitter_info.csv"
-            nacc_detail_file = input_dir / "Test final_nacc_detail.csv"
-            output_dir = OUTPUT_DIR / "test"
-            prefix = "Test_"
+        paths = self.dataset_paths(mode)
+        pdf_dir = paths["pdf_dir"]
+        prefix = paths["prefix"]
+        if output_dir is None:
+            output_dir = paths["output_dir"]
+            if shard:
+                output_dir = output_dir / shard_dir_name(*shard)
+        output_dir = Path(output_dir)
 
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Load metadata
-        print(f"\n📋 Loading metadata...")
-        doc_info_df = pd.read_csv(doc_info_file, encoding='utf-8-sig')
-        submitter_info_df = pd.read_csv(submitter_info_file, encoding='utf-8-sig')
-        nacc_detail_df = pd.read_csv(nacc_detail_file, encoding='utf-8-sig')
-
-        # Imputation Step: Clean and validate metadata
-        if self.use_imputation and self.imputer:
-            print(f"\n🧹 Imputation: Cleaning metadata...")
-            doc_info_df = self.imputer.impute_metadata(doc_info_df, "doc_info")
-            submitter_info_df = self.imputer.impute_metadata(submitter_info_df, "submitter_info")
-            nacc_detail_df = self.imputer.impute_metadata(nacc_detail_df, "nacc_detail")
+        metadata = self.load_metadata(paths)
+        doc_info_df = metadata.doc_info
 
         # Limit if specified
         if limit:
             doc_info_df = doc_info_df.head(limit)
 
+        # Deterministic slice: same documents for a shard on every machine and re-run
+        id_allocator = None
+        if shard:
+            index, count = shard
+            doc_info_df = doc_info_df[doc_info_df['doc_id'] % count == index]
+            id_allocator = create_id_allocator(shard_index=index)
+            print(f"🧩 Shard {index}/{count}")
+
         print(f"✓ Found {len(doc_info_df)} documents to process")
 
-        # Initialize transformer
-        transformer = DataTransformer(output_dir)
+        # Initialize transformer (shards always allocate IDs: their outputs are merged)
+        transformer = DataTransformer(
+            output_dir,
+            prefix=prefix,
+            allocate_ids=True if shard else ALLOCATE_IDS,
+            id_allocator=id_allocator
+        )
 
         # Process each document
         successful = 0
         failed = 0
+        self.usage_tracker.reset()
+        run_start = time.time()
 
-        for idx, doc_row in tqdm(doc_info_df.iterrows(), total=len(doc_info_df), desc="Processing PDFs"):
-            doc_id = doc_row['doc_id']
-            nacc_id = doc_row['nacc_id']
-            pdf_filename = doc_row['doc_location_url']
-
-            # Find PDF file
-            pdf_path = pdf_dir / pdf_filename
-
-            if not pdf_path.exists():
-                print(f"\n⚠️  PDF not found: {pdf_filename}")
-                failed += 1
-                continue
-
-            # Get submitter and NACC info
-            submitter_row = submitter_info_df[
-                submitter_info_df['submitter_id'] == nacc_id
-            ]
-            nacc_row = nacc_detail_df[
-                nacc_detail_df['nacc_id'] == nacc_id
-            ]
-
-            if submitter_row.empty or nacc_row.empty:
-                print(f"\n⚠️  Missing metadata for nacc_id {nacc_id}")
+        for doc_row in tqdm(metadata.docs(doc_info_df), total=len(doc_info_df), desc="Processing PDFs"):
+            if self.process_document(doc_row, pdf_dir, metadata, transformer):
+                successful += 1
+            else:
                 failed += 1
-                continue
-
-            submitter_info = submitter_row.iloc[0].to_dict()
-            nacc_detail = nacc_row.iloc[0].to_dict()
-
-            # Imputation Step: Validate PDF before extraction
-            if self.use_imputation and self.imputer and VALIDATE_PDF_BEFORE_EXTRACTION:
-                validation_result = self.imputer.validate_pdf(pdf_path)
-                if not validation_result["valid"]:
-                    print(f"\n❌ PDF validation failed: {pdf_filename}")
-                    for error in validation_result["errors"]:
-                        print(f"      {error}")
-                    failed += 1
-                    continue
 
-            try:
-                # Extract data from PDF
-                print(f"\n🔍 Extracting: {pdf_filename}")
-                extracted_data = self.extractor.extract_from_pdf(
-                    pdf_path,
-                    submitter_info,
-                    nacc_detail,
-                    self.enum_mappings
-                )
-
-                if extracted_data:
-                    # Transform to CSV format
-                    transformer.transform_document(
-                        extracted_data,
-                        doc_id,
-                        nacc_id,
-                        nacc_id
-                    )
-                    successful += 1
-                    print(f"✓ Successfully processed")
-                else:
-                    print(f"⚠️  No data extracted")
-                    failed += 1
-
-            except Exception as e:
-                print(f"\n❌ Error processing {pdf_filename}: {e}")
-                failed += 1
-                continue
+        run_seconds = time.time() - run_start
 
         # Save all CSVs
         print(f"\n💾 Saving CSV files...")
         saved_files = transformer.save_all_csvs(prefix=prefix)
+        if sql_summary:
+            saved_files.append(build_summary(
+                output_dir, prefix, doc_info_df, metadata.submitter_info, metadata.nacc_detail
+            ))
 
         # Print summary
         print(f"\n" + "="*60)
@@ -222,12 +342,159 @@ class Pipeline:
         print(f"="*60)
         print(f"✓ Successful: {successful}/{len(doc_info_df)}")
         print(f"✗ Failed: {failed}/{len(doc_info_df)}")
+        if run_seconds:
+            print(f"⏱️  Throughput: {len(doc_info_df) / run_seconds:.2f} docs/sec ({run_seconds:.1f}s)")
         print(f"\n📁 Output files ({len(saved_files)}):")
         for f in saved_files:
             print(f"   - {f.name}")
         print(f"\n💾 Output directory: {output_dir}")
         print(f"="*60)
 
+        self.usage_tracker.print_run_summary()
+        if self.refiner:
+            self.refiner.print_stats()
+        if isinstance(self.extractor, GeminiExtractor):
+            get_reader_pool().print_stats()
+            self.extractor.print_stats()
+        if isinstance(self.extractor, OCRExtractor):
+            self.extractor.pool.print_stats()
+            self.extractor.print_stats()
+        rule_extractor = getattr(self.extractor, "rule_extractor", None)
+        if rule_extractor and rule_extractor.documents:
+            rule_extractor.print_stats()
+        table_parser = getattr(self.extractor, "table_parser", None)
+        if table_parser and table_parser.enabled:
+            table_parser.print_stats()
+        compactor = getattr(self.extractor, "compactor", None)
+        if compactor and compactor.stats["documents"]:
+            compactor.print_stats()
+        if get_hedger().enabled:
+            get_hedger().print_stats()
+
+        return output_dir
+
+    def enqueue_dataset(self, queue: WorkQueue, mode: str = "train", limit: Optional[int] = None) -> int:
+        """
+        Coordinator: put every document of a dataset on the work queue
+
+        Returns:
+            Number of newly queued documents
+        """
+        doc_info_df = self.load_metadata(self.dataset_paths(mode)).doc_info
+        if limit:
+            doc_info_df = doc_info_df.head(limit)
+        added = queue.enqueue(mode, doc_info_df['doc_id'])
+        print(f"📬 Queued {added} new documents ({len(doc_info_df) - added} already queued) in {queue.path}")
+        queue.print_stats(mode)
+        return added
+
+    def process_queue(
+        self,
+        queue: WorkQueue,
+        mode: str = "train",
+        worker_name: Optional[str] = None,
+        output_dir: Optional[Path] = None
+    ) -> Path:
+        """
+        Worker: lease documents from the queue until none are left
+
+        A document's rows are held until it has been processed, then
+        written and flushed before its task is marked done, so a done
+        document is always in some worker's output. A crashed worker loses
+        at most the document it was on (which goes back on the queue when
+        its lease expires); a document finished by two workers (lost lease)
+        is in both outputs and merge_shards keeps one copy. Documents whose
+        PDF or metadata is missing are marked failed at once.
+
+        Args:
+            queue: Shared work queue
+            mode: 'train' or 'test'
+            worker_name: Label in the queue (default: host-pid)
+            output_dir: Output directory (default: output/<mode>/worker-<slot>)
+
+        Returns:
+            Output directory (combine worker outputs with merge_shards)
+        """
+        paths = self.dataset_paths(mode)
+        metadata = self.load_metadata(paths)
+
+        slot = queue.register_worker(worker_name or f"{socket.gethostname()}-{os.getpid()}")
+        worker = f"{worker_name or socket.gethostname()}#{slot}"
+        output_dir = Path(output_dir) if output_dir else paths["output_dir"] / worker_dir_name(slot)
+        print(f"👷 Worker {worker} -> {output_dir}")
+
+        transformer = DataTransformer(
+            output_dir,
+            streaming=True,
+            prefix=paths["prefix"],
+            flush_interval=1,
+            allocate_ids=True,  # Worker outputs are merged
+            id_allocator=create_id_allocator(worker_slot=slot),
+            hold_rows=True
+        )
+
+        successful = 0
+        failed = 0
+        lost = 0
+        self.usage_tracker.reset()
+        run_start = time.time()
+
+        while True:
+            doc_id = queue.lease(mode, worker)
+            if doc_id is None:
+                if queue.counts(mode)["leased"]:
+                    # Other workers still busy - their leases may expire back to us
+                    time.sleep(QUEUE_POLL_SECONDS)
+                    continue
+                break
+
+            doc_row = metadata.doc(doc_id)
+            problem = self.missing_inputs(doc_row, paths["pdf_dir"], metadata)
+            if problem:
+                # Retrying can't help - fail now instead of after QUEUE_MAX_ATTEMPTS leases
+                print(f"\n⚠️  {problem}")
+                if queue.fail(mode, doc_id, worker, problem, permanent=True):
+                    failed += 1
+                continue
+
+            with queue.keep_alive(mode, doc_id, worker):
+                ok = self.process_document(doc_row, paths["pdf_dir"], metadata, transformer)
+
+            if ok:
+                # Written and flushed before the task is marked done: a crash in
+                # between re-runs the document, and the merge keeps one copy
+                transformer.write_held_rows()
+                if queue.complete(mode, doc_id, worker):
+                    successful += 1
+                else:
+                    # Expired and leased again - the merge keeps one of the two copies
+                    print(f"   ⚠️ Lease on doc {doc_id} lost before it was marked done")
+                    lost += 1
+                continue
+
+            transformer.discard_held_rows()
+            if queue.fail(mode, doc_id, worker, "no rows extracted"):
+                failed += 1
+            else:
+                print(f"   ⚠️ Lease on doc {doc_id} lost")
+                lost += 1
+
+        run_seconds = time.time() - run_start
+        transformer.save_all_csvs()
+
+        print(f"\n" + "="*60)
+        print(f"👷 WORKER SUMMARY ({worker})")
+        print(f"="*60)
+        print(f"✓ Successful: {successful}")
+        print(f"✗ Failed: {failed}")
+        if lost:
+            print(f"↩️  Leases lost: {lost}")
+        if run_seconds and successful + failed:
+            print(f"⏱️  Throughput: {(successful + failed) / run_seconds:.2f} docs/sec ({run_seconds:.1f}s)")
+        print(f"💾 Output directory: {output_dir}")
+        queue.print_stats(mode)
+        self.usage_tracker.print_run_summary()
+
         return output_dir
 
     def process_single_pdf(
@@ -249,12 +516,18 @@ class Pipeline:
         nacc_detail = {"nacc_id": nacc_id}
 
         print(f"🔍 Extracting: {pdf_path.name}")
-        extracted_data = self.extractor.extract_from_pdf(
-            pdf_path,
-            submitter_info,
-            nacc_detail,
-            self.enum_mappings
-        )
+        self.usage_tracker.begin_document(pdf_path.name)
+        try:
+            extracted_data = self.extractor.extract_from_pdf(
+                pdf_path,
+                submitter_info,
+                nacc_detail,
+                self.enum_mappings
+            )
+            extracted_data = self._refine(extracted_data, pdf_path, submitter_info, nacc_detail)
+        finally:
+            self.last_usage = self.usage_tracker.end_document()
+        print(f"   💰 {self.last_usage['total_tokens']:,} tokens, ${self.last_usage['cost_usd']:.4f}")
 
         if extracted_data:
             # Transform and save
@@ -0,0 +1,291 @@
+"""
+Prompt Compactor - Smaller, de-duplicated document content for Gemini
+
+Docling's markdown already contains every table, so appending the tables
+again doubles their tokens. The compactor normalizes table rows, drops
+tables that are already present in the markdown, collapses whitespace,
+dot leaders and repeated form boilerplate, and trims the content to a
+token budget. Trimming uses a local character estimate; the finished
+prompt is counted once with the model's own tokenizer.
+"""
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .config import (
+        USE_PROMPT_COMPACTION,
+        PROMPT_TOKEN_BUDGET,
+        BOILERPLATE_MIN_REPEATS,
+    )
+except ImportError:
+    from config import (
+        USE_PROMPT_COMPACTION,
+        PROMPT_TOKEN_BUDGET,
+        BOILERPLATE_MIN_REPEATS,
+    )
+
+
+# Rough chars/token for mixed Thai + digits, used while trimming
+CHARS_PER_TOKEN_ESTIMATE = 3.0
+
+# Safety margin when re-cutting with the chars/token measured on the prompt
+MEASURED_RATIO_MARGIN = 0.95
+
+# A table is a duplicate if this share of its rows already appears in the markdown
+TABLE_DUPLICATE_THRESHOLD = 0.9
+
+TRUNCATION_MARKER = "\n\n... [document continues]"
+
+_SEPARATOR_CELL = re.compile(r"^:?-+:?$")
+_DOT_LEADER = re.compile(r"([._…])\1{3,}")
+_INLINE_SPACE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_IMAGE_PLACEHOLDER = re.compile(r"<!--\s*image\s*-->")
+_HAS_DIGIT = re.compile(r"\d")
+
+
+def compact_table_row(line: str) -> str:
+    """
+    Normalize one markdown table row.
+
+    Strips cell padding and collapses separator rows, e.g.
+    "|  ที่ดิน   |  1,000  |" -> "|ที่ดิน|1,000|" and "|-----|:---:|" -> "|-|-|".
+    """
+    cells = [_INLINE_SPACE.sub(" ", cell).strip() for cell in line.strip().strip("|").split("|")]
+    if cells and all(_SEPARATOR_CELL.match(cell) for cell in cells):
+        cells = ["-"] * len(cells)
+    return "|" + "|".join(cells) + "|"
+
+
+def compact_text(text: str) -> str:
+    """Collapse whitespace, dot leaders and table padding in markdown"""
+    text = _IMAGE_PLACEHOLDER.sub("", text)
+    text = _DOT_LEADER.sub(r"\1\1\1", text)
+
+    lines = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith("|"):
+            lines.append(compact_table_row(stripped))
+        else:
+            lines.append(_INLINE_SPACE.sub(" ", stripped))
+
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _is_table_row(line: str) -> bool:
+    return line.startswith("|")
+
+
+def _is_separator_row(line: str) -> bool:
+    return _is_table_row(line) and set(line) <= {"|", "-"}
+
+
+def remove_boilerplate(text: str, min_repeats: int = BOILERPLATE_MIN_REPEATS) -> Tuple[str, int]:
+    """
+    Keep only the first occurrence of form boilerplate lines.
+
+    Boilerplate = non-table, non-heading lines without digits that repeat
+    at least min_repeats times (page headers/footers, signature lines,
+    form instructions). Table rows and lines with numbers are data and
+    are never removed.
+
+    Returns:
+        (text, number of lines removed)
+    """
+    lines = text.split("\n")
+
+    def candidate(line: str) -> bool:
+        return (
+            len(line) >= 8
+            and not _is_table_row(line)
+            and not line.startswith("#")
+            and not _HAS_DIGIT.search(line)
+        )
+
+    counts = Counter(line for line in lines if candidate(line))
+    repeated = {line for line, count in counts.items() if count >= min_repeats}
+    if not repeated:
+        return text, 0
+
+    seen = set()
+    kept = []
+    removed = 0
+    for line in lines:
+        if line in repeated:
+            if line in seen:
+                removed += 1
+                continue
+            seen.add(line)
+        kept.append(line)
+
+    return _BLANK_LINES.sub("\n\n", "\n".join(kept)).strip(), removed
+
+
+class PromptCompactor:
+    """Compact document content and fit it to a prompt token budget"""
+
+    def __init__(
+        self,
+        enabled: bool = USE_PROMPT_COMPACTION,
+        token_budget: int = PROMPT_TOKEN_BUDGET,
+        boilerplate_min_repeats: int = BOILERPLATE_MIN_REPEATS,
+    ):
+        """
+        Initialize compactor
+
+        Args:
+            enabled: Compact content (otherwise only the budget is enforced)
+            token_budget: Max tokens for the whole prompt
+            boilerplate_min_repeats: Repeats before a line counts as boilerplate
+        """
+        self.enabled = enabled
+        self.token_budget = token_budget
+        self.boilerplate_min_repeats = boilerplate_min_repeats
+        self.stats = {
+            "documents": 0,
+            "chars_before": 0,
+            "chars_after": 0,
+            "tables_deduplicated": 0,
+            "boilerplate_lines_removed": 0,
+            "documents_truncated": 0,
+        }
+
+    def count_tokens(self, model: Any, text: str) -> int:
+        """
+        Count tokens with the model's tokenizer.
+
+        Falls back to a character estimate if the API call fails.
+        """
+        if model is not None:
+            try:
+                return model.count_tokens(text).total_tokens
+            except Exception as e:
+                print(f"   ⚠️ count_tokens failed ({e}), estimating")
+        return int(len(text) / CHARS_PER_TOKEN_ESTIMATE)
+
+    def compact(self, markdown: str, tables: List[Dict]) -> Dict:
+        """
+        Compact markdown and drop tables already contained in it.
+
+        Args:
+            markdown: Docling markdown export
+            tables: Table dicts from _extract_tables_structure
+
+        Returns:
+            Dictionary with compacted markdown, remaining tables and stats
+        """
+        chars_before = len(markdown) + sum(len(t.get("content", "")) for t in tables)
+
+        markdown = compact_text(markdown)
+        markdown, boilerplate_removed = remove_boilerplate(markdown, self.boilerplate_min_repeats)
+        markdown_rows = {line for line in markdown.split("\n") if _is_table_row(line)}
+
+        remaining = []
+        for table in tables:
+            content = compact_text(table.get("content", ""))
+            rows = [
+                line for line in content.split("\n")
+                if _is_table_row(line) and not _is_separator_row(line)
+            ]
+            found = sum(1 for row in rows if row in markdown_rows)
+            if rows and found / len(rows) >= TABLE_DUPLICATE_THRESHOLD:
+                continue
+            remaining.append({**table, "content": content})
+
+        chars_after = len(markdown) + sum(len(t["content"]) for t in remaining)
+        stats = {
+            "chars_before": chars_before,
+            "chars_after": chars_after,
+            "tables_deduplicated": len(tables) - len(remaining),
+            "boilerplate_lines_removed": boilerplate_removed,
+        }
+
+        self.stats["documents"] += 1
+        for key, value in stats.items():
+            self.stats[key] += value
+
+        return {"markdown": markdown, "tables": remaining, "stats": stats}
+
+    @staticmethod
+    def estimate_tokens(text: str, chars_per_token: float = CHARS_PER_TOKEN_ESTIMATE) -> int:
+        """Estimate tokens from the character count (no API call)"""
+        return int(len(text) / chars_per_token)
+
+    def fit_to_budget(
+        self,
+        text: str,
+        budget: int,
+        chars_per_token: float = CHARS_PER_TOKEN_ESTIMATE
+    ) -> Tuple[str, int]:
+        """
+        Cut text (at a line boundary) to a length estimated to fit budget tokens.
+
+        Args:
+            text: Content to fit
+            budget: Max tokens for the content
+            chars_per_token: Ratio used to turn the budget into characters
+
+        Returns:
+            (text, estimated token count)
+        """
+        tokens = self.estimate_tokens(text, chars_per_token)
+        if tokens <= budget:
+            return text, tokens
+
+        keep_chars = max(int(max(budget, 0) * chars_per_token) - len(TRUNCATION_MARKER), 0)
+        cut = text.rfind("\n", 0, keep_chars)
+        # Prefer a line boundary unless it would throw away most of the allowance
+        text = text[:cut if cut > keep_chars // 2 else keep_chars] + TRUNCATION_MARKER
+        return text, self.estimate_tokens(text, chars_per_token)
+
+    def fit_prompt(self, model: Any, render: Callable[[str], str], content: str) -> Tuple[str, int]:
+        """
+        Render a prompt whose content is trimmed to fit token_budget.
+
+        The content is trimmed with the character estimate, then the
+        rendered prompt is counted once with the model's tokenizer. If that
+        count is over budget the estimate was too optimistic for this
+        document, so the content is cut again using the chars/token ratio
+        just measured - without another count_tokens call.
+
+        Args:
+            model: Model used for the single token count
+            render: Builds the full prompt around the given content
+            content: Document content to fit
+
+        Returns:
+            (prompt, token count)
+        """
+        overhead = self.estimate_tokens(render(""))
+        fitted, _ = self.fit_to_budget(content, self.token_budget - overhead)
+        prompt = render(fitted)
+        tokens = self.count_tokens(model, prompt)
+
+        if tokens > self.token_budget:
+            chars_per_token = len(prompt) / tokens * MEASURED_RATIO_MARGIN
+            overhead = self.estimate_tokens(render(""), chars_per_token)
+            fitted, _ = self.fit_to_budget(content, self.token_budget - overhead, chars_per_token)
+            prompt = render(fitted)
+            tokens = self.estimate_tokens(prompt, chars_per_token)
+
+        if fitted is not content:
+            self.stats["documents_truncated"] += 1
+            print(f"   ⚠️ Content truncated from {len(content):,} to {len(fitted):,} chars "
+                  f"(budget {self.token_budget:,} tokens)")
+        return prompt, tokens
+
+    def print_stats(self):
+        """Print compaction statistics"""
+        s = self.stats
+        saved = 1 - s["chars_after"] / s["chars_before"] if s["chars_before"] else 0.0
+        print(f"\n🗜️ Prompt Compaction:")
+        print(f"   Content: {s['chars_before']:,} → {s['chars_after']:,} chars ({saved:.0%} smaller)")
+        print(f"   Duplicate tables dropped: {s['tables_deduplicated']}")
+        print(f"   Boilerplate lines removed: {s['boilerplate_lines_removed']}")
+        print(f"   Documents truncated to budget: {s['documents_truncated']}/{s['documents']}")
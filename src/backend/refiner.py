@@ -0,0 +1,380 @@
+"""
+Section Refiner - Targeted re-extraction of low-confidence sections
+
+After the first (cheap) extraction pass, sections whose confidence falls
+below a threshold are re-extracted from only the pages that contain them,
+at higher DPI or with a focused prompt. The better result is merged back,
+so most documents need a single pass and the rest avoid a full rerun.
+"""
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .confidence_scorer import ConfidenceScorer
+    from .config import (
+        REFINE_CONFIDENCE_THRESHOLD,
+        REFINE_SECTIONS,
+        SECTION_PAGE_HINTS,
+    )
+except ImportError:
+    from confidence_scorer import ConfidenceScorer
+    from config import (
+        REFINE_CONFIDENCE_THRESHOLD,
+        REFINE_SECTIONS,
+        SECTION_PAGE_HINTS,
+    )
+
+
+# Thai headings/labels that mark pages belonging to each section
+SECTION_ANCHORS = {
+    "submitter_positions": ["ตำแหน่ง", "หน่วยงาน", "สังกัด"],
+    "relatives": ["บุตร", "บิดา", "มารดา", "พี่น้อง"],
+    "statements": ["รายได้", "รายจ่าย", "หนี้สิน", "เงินเดือน", "เงินกู้"],
+    "assets": ["ที่ดิน", "โรงเรือน", "สิ่งปลูกสร้าง", "ยานพาหนะ", "เงินฝาก", "เงินลงทุน", "ทรัพย์สินอื่น"],
+}
+
+# Data keys that belong to each section (replaced together on merge)
+SECTION_KEYS = {
+    "submitter_positions": ["submitter_positions"],
+    "relatives": ["relatives"],
+    "statements": ["statements", "statement_details"],
+    "assets": ["assets", "asset_land_info", "asset_building_info", "asset_vehicle_info", "asset_other_info"],
+}
+
+# JSON skeletons for focused prompts (one section at a time)
+SECTION_SCHEMAS = {
+    "submitter_positions": """"submitter_positions": [
+    {{
+      "submitter_id": {nacc_id},
+      "nacc_id": {nacc_id},
+      "index": 1,
+      "position_category_type_id": null,
+      "position_name": "",
+      "position_title": "",
+      "position_agency": "",
+      "position_start_year": "",
+      "position_start_month": "",
+      "position_start_date": "",
+      "position_period_type_id": null
+    }}
+  ]""",
+    "relatives": """"relatives": [
+    {{
+      "relative_id": 1,
+      "submitter_id": {nacc_id},
+      "nacc_id": {nacc_id},
+      "index": 1,
+      "title": "",
+      "first_name": "",
+      "last_name": "",
+      "age": null,
+      "relationship_id": null
+    }}
+  ]""",
+    "statements": """"statements": [
+    {{
+      "statement_id": 1,
+      "submitter_id": {nacc_id},
+      "nacc_id": {nacc_id},
+      "statement_type_id": null,
+      "statement_name": "",
+      "valuation": null,
+      "owner_by_submitter": false,
+      "owner_by_spouse": false,
+      "owner_by_child": false
+    }}
+  ],
+  "statement_details": [
+    {{
+      "statement_detail_id": 1,
+      "statement_id": 1,
+      "statement_detail_type_id": null,
+      "statement_detail_name": "",
+      "valuation": null
+    }}
+  ]""",
+    "assets": """"assets": [
+    {{
+      "asset_id": 1,
+      "submitter_id": {nacc_id},
+      "nacc_id": {nacc_id},
+      "index": 1,
+      "asset_type_id": null,
+      "asset_name": "",
+      "valuation": null,
+      "acquiring_year": "",
+      "acquiring_month": "",
+      "acquiring_date": "",
+      "owner_by_submitter": false,
+      "owner_by_spouse": false,
+      "owner_by_child": false
+    }}
+  ],
+  "asset_land_info": [
+    {{
+      "asset_land_id": 1,
+      "asset_id": 1,
+      "title_deed_number": "",
+      "land_parcel_number": "",
+      "survey_page_number": "",
+      "sub_district": "",
+      "district": "",
+      "province": "",
+      "right_area_rai": null,
+      "right_area_ngan": null,
+      "right_area_wa": null
+    }}
+  ],
+  "asset_building_info": [
+    {{
+      "asset_building_id": 1,
+      "asset_id": 1,
+      "building_type": "",
+      "house_number": "",
+      "sub_district": "",
+      "district": "",
+      "province": ""
+    }}
+  ],
+  "asset_vehicle_info": [
+    {{
+      "asset_vehicle_id": 1,
+      "asset_id": 1,
+      "vehicle_brand": "",
+      "vehicle_model": "",
+      "vehicle_year": null,
+      "license_plate_number": "",
+      "license_plate_province": ""
+    }}
+  ],
+  "asset_other_info": [
+    {{
+      "asset_other_id": 1,
+      "asset_id": 1,
+      "other_asset_description": ""
+    }}
+  ]""",
+}
+
+# Enum tables (data/enum_type) listed in a section's prompt, so its *_type_id values aren't guessed
+SECTION_ENUMS = {
+    "submitter_positions": ["position_category_type", "position_period_type"],
+    "relatives": ["relationship"],
+    "statements": ["statement_type", "statement_detail_type"],
+    "assets": ["asset_type", "asset_acquisition_type"],
+}
+
+SECTION_TITLES = {
+    "submitter_positions": "ตำแหน่ง (Positions held by the submitter)",
+    "relatives": "บุตร/บิดา/มารดา/พี่น้อง (Relatives)",
+    "statements": "รายได้-รายจ่าย/หนี้สิน (Income, expenses and liabilities)",
+    "assets": "ทรัพย์สิน (Assets) - every row of every asset table",
+}
+
+
+def format_enums(section: str, enum_mappings: Optional[Dict]) -> str:
+    """ID lists of the section's enum tables ("1 = ที่ดิน / โฉนด" per line)"""
+    blocks = []
+    for name in SECTION_ENUMS.get(section, []):
+        entries = (enum_mappings or {}).get(name) or []
+        if not entries:
+            continue
+        lines = []
+        id_column = next(iter(entries[0]))
+        for entry in entries:
+            labels = [
+                str(value) for column, value in entry.items()
+                if not column.endswith(("_id", "_number")) and value is not None and str(value) not in ("", "nan")
+            ]
+            lines.append(f"{entry[id_column]} = {' / '.join(labels)}")
+        blocks.append(f"**{id_column} values:**\n" + "\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def build_section_prompt(section: str, nacc_detail: Dict, pages: List[int], enum_mappings: Optional[Dict] = None) -> str:
+    """
+    Build a focused extraction prompt for a single section.
+
+    Args:
+        section: Section name (key of SECTION_SCHEMAS)
+        nacc_detail: NACC detail information
+        pages: 1-based page numbers included in the request
+        enum_mappings: Enum type mappings (the section's ID lists are included)
+
+    Returns:
+        Prompt text
+    """
+    nacc_id = nacc_detail.get('nacc_id', 1)
+    schema = SECTION_SCHEMAS[section].format(nacc_id=nacc_id)
+    page_list = ", ".join(str(p) for p in pages)
+    enums = format_enums(section, enum_mappings)
+    enums = f"\n{enums}\n" if enums else ""
+
+    return f"""You are an expert data extraction assistant for Thailand's NACC (National Anti-Corruption Commission).
+
+**CRITICAL CONTEXT:** This is OFFICIAL PUBLIC government transparency data required by Thai law.
+
+**FOCUSED TASK:** The content below is pages {page_list} of a Thai asset declaration.
+Extract ONLY this section: {SECTION_TITLES[section]}
+
+**RULES:**
+1. Read every row of every table on these pages - do not skip or merge rows
+2. DATES: separate into day, month, year. Convert Buddhist year (พ.ศ.) to Christian year by subtracting 543
+3. MONEY: numbers only, remove "บาท" and ","
+4. OWNERSHIP: check "ผู้ยื่น" (submitter), "คู่สมรส" (spouse), "บุตร" (child)
+5. MISSING DATA: null for numbers, "" for strings, false for booleans
+6. TYPE IDs: use only the IDs listed below
+{enums}
+**JSON STRUCTURE (return ONLY valid JSON, no markdown, no other text):**
+
+{{
+  {schema}
+}}
+"""
+
+
+class SectionRefiner:
+    """Decide which sections need a second pass and merge improved results"""
+
+    def __init__(
+        self,
+        threshold: float = REFINE_CONFIDENCE_THRESHOLD,
+        sections: Optional[List[str]] = None,
+    ):
+        """
+        Initialize refiner
+
+        Args:
+            threshold: Sections with mean confidence below this are re-extracted
+            sections: Sections eligible for refinement (default: REFINE_SECTIONS)
+        """
+        self.threshold = threshold
+        self.sections = sections or REFINE_SECTIONS
+        self.scorer = ConfidenceScorer()
+        self.stats = {
+            "documents": 0,
+            "documents_refined": 0,
+            "sections_refined": 0,
+            "sections_improved": 0,
+        }
+
+    def weak_sections(self, scored: Dict) -> List[str]:
+        """Sections whose mean confidence is below the threshold"""
+        section_confidence = scored.get("section_confidence", {})
+        return [
+            section for section in self.sections
+            if section in section_confidence and section_confidence[section] < self.threshold
+        ]
+
+    def locate_pages(
+        self,
+        section: str,
+        num_pages: int,
+        page_texts: Optional[Dict[int, str]] = None,
+    ) -> List[int]:
+        """
+        Find the pages that contain a section.
+
+        Uses Thai anchors on page text when available, otherwise the
+        typical page range of the section in the NACC form.
+
+        Args:
+            section: Section name
+            num_pages: Total pages in the PDF
+            page_texts: Optional {page_no: text} (1-based)
+
+        Returns:
+            Sorted list of 1-based page numbers
+        """
+        if page_texts:
+            anchors = SECTION_ANCHORS.get(section, [])
+            pages = [
+                page_no for page_no, text in sorted(page_texts.items())
+                if any(anchor in text for anchor in anchors)
+            ]
+            if pages:
+                return pages
+
+        start, end = SECTION_PAGE_HINTS.get(section, (1, None))
+        end = num_pages if end is None else min(end, num_pages)
+        return list(range(min(start, num_pages), end + 1))
+
+    def _section_score(self, data: Dict, section: str) -> float:
+        """Mean confidence of one section in data"""
+        scored = self.scorer.score_extracted_data({section: data.get(section) or []})
+        return scored["section_confidence"].get(section, 0.0)
+
+    def refine(
+        self,
+        extractor,
+        pdf_path: Path,
+        data: Dict,
+        submitter_info: Dict,
+        nacc_detail: Dict,
+        enum_mappings: Dict,
+    ) -> Dict:
+        """
+        Re-extract weak sections and merge improvements into data.
+
+        Args:
+            extractor: Extractor implementing extract_sections()
+            pdf_path: Path to PDF file
+            data: First-pass extracted data
+            submitter_info, nacc_detail, enum_mappings: As passed to extract_from_pdf
+
+        Returns:
+            Data with improved sections merged in
+        """
+        self.stats["documents"] += 1
+        if not data or not hasattr(extractor, "extract_sections"):
+            return data
+
+        scored = self.scorer.score_extracted_data(data)
+        weak = self.weak_sections(scored)
+        if not weak:
+            return data
+
+        self.stats["documents_refined"] += 1
+        num_pages = extractor.page_count(pdf_path)
+        page_texts = extractor.page_texts(pdf_path) if hasattr(extractor, "page_texts") else None
+
+        for section in weak:
+            old_score = scored["section_confidence"][section]
+            pages = self.locate_pages(section, num_pages, page_texts)
+            print(f"   🔁 Refining {section} ({old_score:.0%} confidence) from pages {pages[0]}-{pages[-1]}")
+            self.stats["sections_refined"] += 1
+
+            refined = extractor.extract_sections(
+                pdf_path, section, pages, submitter_info, nacc_detail, enum_mappings
+            )
+            if not refined or not refined.get(section):
+                print(f"      ⚠️ No {section} data from refinement, keeping first pass")
+                continue
+
+            new_score = self._section_score(refined, section)
+            old_rows = len(data.get(section) or [])
+            new_rows = len(refined[section])
+            if new_rows < old_rows:
+                # Higher confidence on fewer rows is not an improvement (missed rows score nothing)
+                print(f"      ○ {section}: {new_rows} rows vs {old_rows} in first pass, keeping first pass")
+            elif new_score > old_score:
+                # Replace the whole section: detail rows reference the section's (renumbered) IDs,
+                # so first-pass details the refinement didn't return would point at the wrong rows
+                for key in SECTION_KEYS[section]:
+                    data[key] = refined.get(key) or []
+                self.stats["sections_improved"] += 1
+                print(f"      ✅ {section}: {old_score:.0%} → {new_score:.0%}")
+            else:
+                print(f"      ○ {section}: no improvement ({new_score:.0%}), keeping first pass")
+
+        return data
+
+    def print_stats(self):
+        """Print refinement statistics"""
+        s = self.stats
+        print(f"\n🔁 Section Refinement:")
+        print(f"   Documents refined: {s['documents_refined']}/{s['documents']}")
+        print(f"   Sections improved: {s['sections_improved']}/{s['sections_refined']}")
@@ -0,0 +1,226 @@
+"""
+Rule-based Form Field Extractor - Fixed fields without LLM tokens
+
+Spouse name, title, age and marriage date sit in fixed labelled positions
+on the first pages of the NACC form. Precompiled label anchors read them
+from Docling/OCR text into extracted["spouse"]["info"] (spouse_info.csv);
+only fields the rules cannot resolve are left for Gemini. The submitter's
+own name and address are not read: no output table holds them.
+"""
+import re
+import sys
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .table_parser import parse_thai_date
+    from .config import USE_RULE_EXTRACTION
+except ImportError:
+    from table_parser import parse_thai_date
+    from config import USE_RULE_EXTRACTION
+
+
+# Name titles, longest first so "นางสาว" wins over "นาง"
+TITLES = sorted([
+    "นาย", "นาง", "นางสาว", "ว่าที่ร้อยตรี", "ว่าที่ร้อยตรีหญิง", "ดร.", "ศาสตราจารย์",
+    "รองศาสตราจารย์", "ผู้ช่วยศาสตราจารย์", "พลเอก", "พลโท", "พลตรี", "พันเอก",
+    "พลเรือเอก", "พลเรือโท", "พลเรือตรี", "พลอากาศเอก", "พลอากาศโท", "พลอากาศตรี",
+    "พลตำรวจเอก", "พลตำรวจโท", "พลตำรวจตรี", "พันตำรวจเอก", "คุณหญิง", "ท่านผู้หญิง",
+], key=len, reverse=True)
+
+MARITAL_STATUSES = sorted([
+    "จดทะเบียนสมรส", "ไม่ได้จดทะเบียนสมรส", "อยู่กินกันฉันสามีภริยา",
+    "สมรส", "โสด", "หย่า", "หม้าย",
+], key=len, reverse=True)
+
+# Statuses whose date is the marriage date in spouse_info
+MARRIED_STATUSES = {"จดทะเบียนสมรส", "ไม่ได้จดทะเบียนสมรส", "อยู่กินกันฉันสามีภริยา", "สมรส"}
+
+_THAI_WORD = r"[\u0E00-\u0E7FA-Za-z.]+"
+_TITLE_ALT = "|".join(re.escape(t) for t in TITLES)
+
+# Precompiled label anchors
+PATTERNS = {
+    "name": re.compile(
+        rf"ชื่อ(?:ผู้ยื่นบัญชี|คู่สมรส)?(?:\s*-?\s*(?:นาม)?สกุล)?\s*[:：]?\s*({_TITLE_ALT})\s*({_THAI_WORD})\s+({_THAI_WORD})"
+    ),
+    "age": re.compile(r"อายุ\s*[:：]?\s*(\d{1,3})\s*ปี"),
+    "status": re.compile(
+        r"สถานภาพ\S*\s*[:：]?\s*(?:[☑☒■✓/xX]\s*)?(" + "|".join(re.escape(s) for s in MARITAL_STATUSES) + ")"
+    ),
+    "status_since": re.compile(r"(?:เมื่อวันที่|ตั้งแต่วันที่|วันที่)\s*([0-9/\u0E00-\u0E7F. ]{6,30}?\d{4})"),
+    "sub_district": re.compile(rf"(?:ตำบล|แขวง)\s*[:：]?\s*({_THAI_WORD})"),
+    "district": re.compile(rf"(?:อำเภอ|เขต)\s*[:：]?\s*({_THAI_WORD})"),
+    "province": re.compile(rf"จังหวัด\s*[:：]?\s*({_THAI_WORD})"),
+    "post_code": re.compile(r"รหัสไปรษณีย์\s*[:：]?\s*(\d{5})"),
+}
+
+# Where the spouse block starts, and the sections that end it
+SPOUSE_ANCHOR = re.compile(r"(?:ข้อมูล|ชื่อ)\s*คู่สมรส")
+SPOUSE_END_ANCHOR = re.compile(r"บุตร|บิดา|มารดา|พี่น้อง|ทรัพย์สิน|รายได้")
+
+# Output table -> columns the rules try to resolve (only tables the transformer writes)
+RULE_FIELDS = {
+    "spouse_info": [
+        "title", "first_name", "last_name", "age",
+        "marriage_date", "marriage_month", "marriage_year",
+    ],
+}
+
+
+def extract_person_fields(text: str, with_status_date: bool = False) -> Dict:
+    """
+    Read labelled fields for one person from a block of form text.
+
+    Args:
+        text: Text of the person's block
+        with_status_date: Also read the marriage date following a married status
+
+    Returns:
+        Dictionary of resolved fields only
+    """
+    fields = {}
+
+    name = PATTERNS["name"].search(text)
+    if name:
+        fields["title"], fields["first_name"], fields["last_name"] = name.groups()
+
+    age = PATTERNS["age"].search(text)
+    if age and 18 <= int(age.group(1)) <= 120:
+        fields["age"] = int(age.group(1))
+
+    status = PATTERNS["status"].search(text)
+    if status:
+        fields["status"] = status.group(1)
+        if with_status_date and status.group(1) in MARRIED_STATUSES:
+            since = PATTERNS["status_since"].search(text, status.end())
+            if since:
+                date = parse_thai_date(since.group(1), prefix="marriage", keep_buddhist_year=True)
+                fields.update({key: value for key, value in date.items() if value})
+
+    for key in ("sub_district", "district", "province", "post_code"):
+        match = PATTERNS[key].search(text)
+        if match:
+            fields[key] = match.group(1)
+
+    return fields
+
+
+class RuleExtractor:
+    """Resolve fixed form fields from text and track per-field coverage"""
+
+    def __init__(self, enabled: bool = USE_RULE_EXTRACTION):
+        """
+        Initialize rule extractor
+
+        Args:
+            enabled: Run rules (otherwise Gemini extracts every field)
+        """
+        self.enabled = enabled
+        self.documents = 0
+        self.resolved = {
+            section: {field: 0 for field in fields}
+            for section, fields in RULE_FIELDS.items()
+        }
+
+    def extract(self, text: str) -> Dict:
+        """
+        Resolve spouse fields from the first pages' text.
+
+        Args:
+            text: Docling markdown or OCR text of the first form pages
+
+        Returns:
+            {"spouse_info": {...}} with resolved fields only
+        """
+        if not self.enabled or not text:
+            return {"spouse_info": {}}
+
+        spouse_start = SPOUSE_ANCHOR.search(text)
+        spouse = {}
+        if spouse_start:
+            end = SPOUSE_END_ANCHOR.search(text, spouse_start.end())
+            spouse_text = text[spouse_start.start():end.start() if end else None]
+            spouse = extract_person_fields(spouse_text, with_status_date=True)
+
+        result = {
+            "spouse_info": {k: v for k, v in spouse.items() if k in RULE_FIELDS["spouse_info"]},
+        }
+
+        self.documents += 1
+        for section, fields in result.items():
+            for field in fields:
+                self.resolved[section][field] += 1
+
+        return result
+
+    @staticmethod
+    def prompt_note(resolved: Dict) -> str:
+        """
+        Prompt text telling Gemini which fields are already known.
+
+        Returns:
+            Note to include in the prompt ("" if nothing was resolved)
+        """
+        known = [
+            f"{section}.{field} = {value}"
+            for section, fields in resolved.items()
+            for field, value in fields.items()
+        ]
+        if not known:
+            return ""
+
+        missing = [
+            f"{section}.{field}"
+            for section, fields in RULE_FIELDS.items()
+            for field in fields
+            if field not in resolved.get(section, {})
+        ]
+        note = "\n**ALREADY READ FROM THE FORM (do not extract these again):**\n"
+        note += "\n".join(f"- {item}" for item in known)
+        if missing:
+            note += f"\nOnly extract the remaining personal fields: {', '.join(missing)}\n"
+        return note
+
+    @staticmethod
+    def apply(extracted: Dict, resolved: Dict) -> Dict:
+        """
+        Fill rule-resolved fields into Gemini's output (rules win).
+
+        Spouse fields go to extracted["spouse"]["info"], where the transformer
+        reads spouse_info.csv rows; Gemini's own top-level "spouse_info" is
+        folded in underneath so its other columns (occupation, ...) are kept.
+        """
+        if extracted is None:
+            return extracted
+
+        fields = resolved.get("spouse_info")
+        if fields:
+            spouse = extracted.get("spouse") or {}
+            info = {**(extracted.get("spouse_info") or {}), **(spouse.get("info") or {}), **fields}
+            extracted["spouse"] = {**spouse, "info": info}
+        return extracted
+
+    def coverage(self) -> Dict[str, float]:
+        """Share of documents where each written column was resolved by rules"""
+        if not self.documents:
+            return {}
+        return {
+            f"{section}.{field}": count / self.documents
+            for section, fields in self.resolved.items()
+            for field, count in fields.items()
+        }
+
+    def print_stats(self):
+        """Print per-column rule coverage of the written tables"""
+        print(f"\n📏 Rule-based Column Coverage ({self.documents} documents):")
+        for field, share in self.coverage().items():
+            print(f"   {field}: {share:.0%}")
+
+
+def first_pages_text(page_texts: Dict[int, str], pages: int) -> str:
+    """Join the text of the first N pages"""
+    return "\n".join(text for page_no, text in sorted(page_texts.items()) if page_no <= pages)
+
@@ -0,0 +1,89 @@
+"""
+Benchmark: Docling conversion wall time vs. number of worker processes
+แปลง PDF ด้วย Docling แบบแบ่งช่วงหน้า แล้ววัดเวลาตามจำนวน core
+
+Usage:
+    python src/backend/scripts/benchmark_docling_parallel.py [PDF_PATH] --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Get project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from docling_extractor import (
+    _build_converter, _warm_worker, convert_parallel, create_worker_pool, split_page_ranges, write_warmup_pdf
+)
+from pdf_optimizer import get_page_count
+
+DEFAULT_PDF = (
+    PROJECT_ROOT / "data/training/train input/Train_pdf/pdf"
+    / "วทันยา_บุนนาค_สมาชิกสภาผู้แทนราษฎร_(ส.ส.)_กรณีพ้นจากตำแหน่ง_13_ธ.ค._2565.pdf"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Docling page-range parallel benchmark")
+    parser.add_argument("pdf", nargs="?", default=str(DEFAULT_PDF), help="PDF to convert")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 4])
+    args = parser.parse_args()
+
+    pdf_path = Path(args.pdf)
+    num_pages = get_page_count(pdf_path)
+
+    print("=" * 70)
+    print("DOCLING PARALLEL CONVERSION BENCHMARK")
+    print("=" * 70)
+    print(f"PDF: {pdf_path.name} ({num_pages} pages), CPU cores: {os.cpu_count()}")
+
+    # Building the converter doesn't load the layout/OCR weights - the first
+    # conversion does, so a throwaway conversion runs before anything is timed
+    warmup_pdf = str(write_warmup_pdf(Path(tempfile.mkdtemp(prefix="docling_bench_")) / "warmup.pdf"))
+
+    # Baseline: whole document in this process (model load excluded)
+    start = time.time()
+    converter, use_gpu = _build_converter()
+    converter.convert(warmup_pdf)
+    baseline_load = time.time() - start
+    start = time.time()
+    converter.convert(str(pdf_path))
+    baseline = time.time() - start
+    print(f"\nSingle process: {baseline:.1f}s (model load {baseline_load:.1f}s)" + (" (GPU)" if use_gpu else ""))
+
+    results = []
+    for workers in sorted(set(args.workers)):
+        pool = create_worker_pool(workers)
+        try:
+            # Warm conversion in every worker (until each pid has answered)
+            # so model load isn't counted as conversion time
+            start = time.time()
+            warmed = set()
+            for _ in range(5):
+                warmed.update(pool.map(_warm_worker, [warmup_pdf] * workers))
+                if len(warmed) >= workers:
+                    break
+            load_time = time.time() - start
+            if len(warmed) < workers:
+                print(f"⚠️ Only {len(warmed)}/{workers} workers warmed - timing includes model load")
+
+            start = time.time()
+            parsed = convert_parallel(pool, pdf_path, workers)
+            wall_time = time.time() - start
+        finally:
+            pool.shutdown()
+
+        ranges = split_page_ranges(num_pages, workers)
+        results.append((workers, len(ranges), wall_time, load_time, len(parsed["pages"])))
+
+    print(f"\n{'workers':>8} {'ranges':>7} {'wall (s)':>9} {'speedup':>8} {'load (s)':>9} {'pages':>6}")
+    for workers, n_ranges, wall_time, load_time, pages in results:
+        print(f"{workers:>8} {n_ranges:>7} {wall_time:>9.1f} {baseline / wall_time:>7.2f}x {load_time:>9.1f} {pages:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: CSV vs Parquet vs JSON Lines - file size and load time
+เทียบขนาดไฟล์และเวลาโหลดของ CSV / Parquet / JSON Lines จากข้อมูลจำลอง
+
+Usage:
+    python src/backend/scripts/benchmark_output_formats.py --docs 20000 [--partition-size 1000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Get project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pyarrow.parquet as pq
+from output_formats import write_jsonl, write_parquet
+from synthetic_data import synthetic_document
+from transformer import TABLE_COLUMNS, DataTransformer
+
+
+def _size(path: Path) -> int:
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return path.stat().st_size
+
+
+def _timed(load):
+    start = time.time()
+    result = load()
+    return time.time() - start, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Output format size/load benchmark")
+    parser.add_argument("--docs", type=int, default=20000, help="Synthetic documents")
+    parser.add_argument("--partition-size", type=int, default=0, help="Parquet nacc_id partition size (0 = off)")
+    parser.add_argument("--tables", nargs="+", default=["asset", "statement_detail", "relative_info"])
+    args = parser.parse_args()
+
+    output_dir = Path(tempfile.mkdtemp(prefix="formats_"))
+    transformer = DataTransformer(output_dir, formats=[])
+    for doc_no in range(1, args.docs + 1):
+        transformer.transform_document(synthetic_document(doc_no), doc_no, doc_no, doc_no)
+    transformer.save_all_csvs()
+
+    print("=" * 78)
+    print(f"OUTPUT FORMAT BENCHMARK ({args.docs} documents, {output_dir})")
+    print("=" * 78)
+    print(f"{'table':<18} {'rows':>8} {'format':<9} {'size (MB)':>10} {'load (s)':>9} {'vs CSV':>8}")
+
+    for table in args.tables:
+        data = transformer.data_lists[table].data
+        columns = TABLE_COLUMNS[table]
+        csv_path = output_dir / f"{table}.csv"
+        parquet_path = write_parquet(data, columns, output_dir / f"{table}.parquet", args.partition_size)
+        jsonl_path = write_jsonl(data, columns, output_dir / f"{table}.jsonl")
+
+        loads = [
+            ("csv", csv_path, lambda: pd.read_csv(csv_path, encoding="utf-8-sig")),
+            ("parquet", parquet_path, lambda: pq.read_table(str(parquet_path), memory_map=True)),
+            ("jsonl", jsonl_path, lambda: pd.read_json(jsonl_path, lines=True)),
+        ]
+        csv_time = None
+        for fmt, path, load in loads:
+            seconds, count = _timed(load)
+            csv_time = csv_time or seconds
+            print(f"{table:<18} {count:>8} {fmt:<9} {_size(path) / 1e6:>10.2f} {seconds:>9.3f} {csv_time / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
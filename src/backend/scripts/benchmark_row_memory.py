@@ -0,0 +1,84 @@
+"""
+Benchmark: memory of accumulated rows - list of dicts vs. column buffers
+วัดหน่วยความจำที่ใช้เก็บแถวระหว่างแปลงข้อมูล (dict ต่อแถว เทียบกับ list ต่อคอลัมน์)
+
+Usage:
+    python src/backend/scripts/benchmark_row_memory.py --docs 20000
+"""
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+# Get project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from synthetic_data import synthetic_document
+from transformer import DataTransformer
+
+
+def accumulate(docs: int, as_dicts: bool):
+    """
+    Transform `docs` synthetic documents and keep every row in memory.
+
+    as_dicts re-packs each document's rows into one dict per row (the
+    previous data_lists layout) before the next document is transformed.
+
+    Returns:
+        (tables, retained bytes, peak bytes, seconds to build DataFrames)
+    """
+    transformer = DataTransformer(Path(tempfile.mkdtemp(prefix="rowmem_")), streaming=False, formats=[])
+    dict_rows = {key: [] for key in transformer.data_lists}
+
+    gc.collect()
+    tracemalloc.start()
+    for doc_no in range(1, docs + 1):
+        transformer.transform_document(synthetic_document(doc_no), doc_no, doc_no, doc_no)
+        if as_dicts:
+            for key, buffer in transformer.data_lists.items():
+                dict_rows[key].extend(buffer.to_dicts())
+                buffer.clear()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.time()
+    if as_dicts:
+        frames = [pd.DataFrame(rows) for rows in dict_rows.values() if rows]
+    else:
+        frames = [buffer.to_dataframe() for buffer in transformer.data_lists.values() if buffer]
+    to_frames = time.time() - start
+
+    rows = sum(len(frame) for frame in frames)
+    return rows, retained, peak, to_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row storage memory benchmark")
+    parser.add_argument("--docs", type=int, default=20000, help="Synthetic documents")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"ROW MEMORY BENCHMARK ({args.docs} documents)")
+    print("=" * 72)
+    print(f"{'layout':<16} {'rows':>9} {'retained (MB)':>14} {'peak (MB)':>10} {'bytes/row':>10} {'to DataFrame':>13}")
+
+    results = {}
+    for name, as_dicts in (("list of dicts", True), ("column buffers", False)):
+        rows, retained, peak, to_frames = accumulate(args.docs, as_dicts)
+        results[name] = retained
+        print(f"{name:<16} {rows:>9} {retained / 1e6:>14.1f} {peak / 1e6:>10.1f} "
+              f"{retained / rows:>10.0f} {to_frames:>12.2f}s")
+
+    print(f"\nRetained memory: {results['list of dicts'] / results['column buffers']:.1f}x smaller with column buffers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark: summary generation - per-document filtering vs. groupby + joins
+วัดเวลาสร้าง summary จากข้อมูลจำลองขนาดใหญ่ (กรองทีละเอกสาร เทียบกับ groupby/join ครั้งเดียว)
+
+The per-document loop filters every table once per document, so it only
+runs on a sample of the documents (against the full tables) and its total
+time is extrapolated. Both results are compared on the sample.
+
+Usage:
+    python src/backend/scripts/benchmark_summary.py --docs 100000 --loop-docs 500
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Get project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from create_summary_v2_template import NACC_FIELDS, SUBMITTER_FIELDS, asset_groups, build_summary
+
+
+def synthetic_tables(docs: int, assets: int = 12, statements: int = 5, relatives: int = 4, seed: int = 0) -> dict:
+    """Metadata + extracted tables for `docs` documents (some documents without statements/assets)"""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, docs + 1)
+
+    def rows_for(per_doc: int, coverage: float) -> np.ndarray:
+        """submitter_id per row; a `coverage` share of documents has rows"""
+        covered = ids[rng.random(docs) < coverage]
+        return np.repeat(covered, per_doc)
+
+    asset_ids = rows_for(assets, 0.95)
+    statement_ids = rows_for(statements, 0.9)
+    relative_ids = rows_for(relatives, 0.8)
+    return {
+        "doc_info": pd.DataFrame({
+            "doc_id": ids + 1000,
+            "doc_location_url": [f"doc_{i}.pdf" for i in ids],
+            "type_id": 1,
+            "nacc_id": ids,
+        }),
+        "nacc_detail": pd.DataFrame({
+            "nacc_id": ids[rng.random(docs) < 0.98],
+            **{source: "x" for source in NACC_FIELDS.values()},
+        }),
+        "submitter_info": pd.DataFrame({
+            "submitter_id": ids[rng.random(docs) < 0.98],
+            **{source: "ชื่อ" for source in SUBMITTER_FIELDS.values()},
+        }),
+        "assets": pd.DataFrame({
+            "asset_id": np.arange(len(asset_ids)),
+            "submitter_id": asset_ids,
+            "asset_type_id": rng.integers(1, 40, len(asset_ids)),
+            "valuation": rng.uniform(1000, 2e7, len(asset_ids)).round(2),
+            "owner_by_submitter": rng.random(len(asset_ids)) < 0.7,
+            "owner_by_spouse": rng.random(len(asset_ids)) < 0.3,
+            "owner_by_child": rng.random(len(asset_ids)) < 0.05,
+        }),
+        "statements": pd.DataFrame({
+            "submitter_id": statement_ids,
+            "valuation_submitter": rng.uniform(0, 5e6, len(statement_ids)).round(2),
+            "valuation_spouse": np.where(rng.random(len(statement_ids)) < 0.5, np.nan, 1000.0),
+            "valuation_child": np.nan,
+        }),
+        "relatives": pd.DataFrame({"submitter_id": relative_ids, "relationship_id": 1}),
+    }
+
+
+def loop_summary(reference, doc_info, nacc_detail, submitter_info, assets, statements, relatives) -> pd.DataFrame:
+    """The previous implementation: boolean filters per document"""
+    output_rows = []
+    for idx, doc_row in doc_info.iterrows():
+        nacc_id = doc_row['nacc_id']
+        submitter_id = idx + 1
+        row = reference.iloc[idx % len(reference)].to_dict()
+
+        nacc_info = nacc_detail[nacc_detail['nacc_id'] == nacc_id]
+        nacc_info = nacc_info.iloc[0].to_dict() if len(nacc_info) > 0 else {}
+        submitter_row = submitter_info[submitter_info['submitter_id'] == submitter_id]
+        submitter = submitter_row.iloc[0].to_dict() if len(submitter_row) > 0 else {}
+        doc_assets = assets[assets['submitter_id'] == submitter_id]
+        doc_statements = statements[statements['submitter_id'] == submitter_id]
+        doc_relatives = relatives[relatives['submitter_id'] == submitter_id]
+
+        row['id'] = nacc_id
+        row['doc_id'] = doc_row['doc_id']
+        row['submitter_id'] = submitter_id
+        if nacc_info:
+            for column, source in NACC_FIELDS.items():
+                row[column] = nacc_info.get(source, 'NONE')
+        if submitter:
+            for column, source in SUBMITTER_FIELDS.items():
+                row[column] = submitter.get(source, row[column])
+        if len(doc_statements) > 0:
+            row['statement_valuation_submitter_total'] = float(doc_statements['valuation_submitter'].fillna(0).sum())
+            row['statement_valuation_spouse_total'] = float(doc_statements['valuation_spouse'].fillna(0).sum())
+            row['statement_valuation_child_total'] = float(doc_statements['valuation_child'].fillna(0).sum())
+            row['statement_detail_count'] = len(doc_statements)
+        if len(doc_assets) > 0:
+            row['asset_count'] = len(doc_assets)
+            row['asset_total_valuation_amount'] = float(doc_assets['valuation'].sum())
+            for group, mask in asset_groups(doc_assets['asset_type_id']).items():
+                count_column = 'asset_other_count' if group == 'other_asset' else f'asset_{group}_count'
+                row[count_column] = int(len(doc_assets[mask]))
+                row[f'asset_{group}_valuation_amount'] = float(doc_assets[mask]['valuation'].sum())
+            for owner in ('submitter', 'spouse', 'child'):
+                owned = doc_assets[f'owner_by_{owner}'] == True
+                row[f'asset_valuation_{owner}_amount'] = float(doc_assets[owned]['valuation'].sum())
+        row['relative_count'] = len(doc_relatives)
+        output_rows.append(row)
+    return pd.DataFrame(output_rows)
+
+
+def same_summary(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Same columns, dtypes and values (floats to summation rounding)"""
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for column in a.columns:
+        x, y = a[column], b[column]
+        if x.dtype != y.dtype:
+            return False
+        if pd.api.types.is_float_dtype(x):
+            if not np.allclose(x, y, rtol=1e-12, equal_nan=True):
+                return False
+        elif not x.equals(y):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summary generation benchmark")
+    parser.add_argument("--docs", type=int, default=100000, help="Synthetic documents")
+    parser.add_argument("--loop-docs", type=int, default=500, help="Documents timed with the per-document loop")
+    args = parser.parse_args()
+
+    reference = pd.read_csv(PROJECT_ROOT / 'data/reference/summary.csv')
+    tables = synthetic_tables(args.docs)
+    rows = sum(len(tables[name]) for name in ("assets", "statements", "relatives"))
+
+    print("=" * 72)
+    print(f"SUMMARY BENCHMARK ({args.docs} documents, {rows} extracted rows)")
+    print("=" * 72)
+
+    start = time.time()
+    summary = build_summary(reference, **tables)
+    vectorized = time.time() - start
+
+    sample = dict(tables, doc_info=tables["doc_info"].head(args.loop_docs))
+    start = time.time()
+    expected = loop_summary(reference, **sample)
+    loop = (time.time() - start) / args.loop_docs * args.docs
+
+    print(f"{'per-document loop':<20} {loop:>10.1f}s  (extrapolated from {args.loop_docs} documents)")
+    print(f"{'groupby + joins':<20} {vectorized:>10.1f}s  ({len(summary)} rows)")
+    print(f"\nSpeedup: {loop / vectorized:.0f}x")
+    print(f"Sample matches loop output: {same_summary(build_summary(reference, **sample), expected)}")
+
+
+if __name__ == "__main__":
+    main()
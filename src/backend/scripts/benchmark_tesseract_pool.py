@@ -0,0 +1,75 @@
+"""
+Benchmark: Tesseract per-page subprocess vs. resident engine pool
+เทียบ pytesseract (เปิด process ใหม่ทุกหน้า) กับ engine ที่โหลดค้างไว้ + OCR หลายหน้าพร้อมกัน
+
+Usage:
+    python src/backend/scripts/benchmark_tesseract_pool.py [PDF_PATH] --pages 10 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Get project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pdf2image import convert_from_path
+from tesseract_pool import TESSEROCR_AVAILABLE, TesseractEnginePool
+from config import TESSERACT_LANG, TESSERACT_PSM
+
+DEFAULT_PDF = (
+    PROJECT_ROOT / "data/training/train input/Train_pdf/pdf"
+    / "วทันยา_บุนนาค_สมาชิกสภาผู้แทนราษฎร_(ส.ส.)_กรณีพ้นจากตำแหน่ง_13_ธ.ค._2565.pdf"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tesseract engine pool benchmark")
+    parser.add_argument("pdf", nargs="?", default=str(DEFAULT_PDF), help="PDF to OCR")
+    parser.add_argument("--pages", type=int, default=10, help="Max pages to OCR")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 4])
+    args = parser.parse_args()
+
+    images = convert_from_path(args.pdf, dpi=300, fmt="png")[:args.pages]
+
+    print("=" * 70)
+    print("TESSERACT OCR BENCHMARK")
+    print("=" * 70)
+    print(f"PDF: {Path(args.pdf).name} ({len(images)} pages), CPU cores: {os.cpu_count()}")
+
+    # Baseline: the previous OCRExtractor loop (one tesseract process per page)
+    import pytesseract
+
+    config = f"--oem 3 --psm {TESSERACT_PSM} -l {TESSERACT_LANG}"
+    start = time.time()
+    baseline_chars = sum(len(pytesseract.image_to_string(image, config=config)) for image in images)
+    baseline = time.time() - start
+    print(f"\nSerial subprocess: {baseline:.1f}s ({baseline / len(images):.2f}s/page, {baseline_chars} chars)")
+
+    if not TESSEROCR_AVAILABLE:
+        print("⚠️ tesserocr not installed - pool rows below use the pytesseract fallback")
+
+    results = []
+    for workers in sorted(set(args.workers)):
+        pool = TesseractEnginePool(size=workers)
+
+        # Load every engine up front so model load isn't counted as OCR time
+        start = time.time()
+        pool.ocr_pages(images[:1] * workers, workers=workers)
+        load_time = time.time() - start
+
+        start = time.time()
+        texts = pool.ocr_pages(images, workers=workers)
+        wall_time = time.time() - start
+        results.append((workers, wall_time, load_time, sum(len(text) for text in texts)))
+
+    print(f"\n{'workers':>8} {'wall (s)':>9} {'s/page':>7} {'speedup':>8} {'warmup (s)':>11} {'chars':>7}")
+    for workers, wall_time, load_time, chars in results:
+        print(f"{workers:>8} {wall_time:>9.1f} {wall_time / len(images):>7.2f} "
+              f"{baseline / wall_time:>7.2f}x {load_time:>11.1f} {chars:>7}")
+
+
+if __name__ == "__main__":
+    main()
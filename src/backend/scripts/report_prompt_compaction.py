@@ -0,0 +1,166 @@
+"""
+Report: prompt token savings (and DQS impact) of Docling prompt compaction
+วัดจำนวน token ที่ลดลงจากการตัดตารางซ้ำ/ข้อความซ้ำ และผลต่อคะแนน DQS บนชุด training
+
+Token counts use the Gemini tokenizer (count_tokens). With --extract, every
+document is extracted twice (uncompacted vs compacted) and scored with a
+DQS proxy against data/training/train summary/Train_summary.csv.
+
+Usage:
+    python src/backend/scripts/report_prompt_compaction.py --limit 10 [--extract]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Get project root
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import DQS_WEIGHTS
+from docling_extractor import DoclingExtractor
+from usage_tracker import get_usage_tracker
+
+TRAIN_INPUT = PROJECT_ROOT / "data/training/train input"
+TRAIN_SUMMARY = PROJECT_ROOT / "data/training/train summary/Train_summary.csv"
+
+
+def _num(value) -> float:
+    """Summary value as float ("NONE"/blank = 0)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _closeness(predicted: float, expected: float) -> float:
+    """1.0 for an exact match, falling linearly with relative error"""
+    if expected == 0:
+        return 1.0 if predicted == 0 else 0.0
+    return max(0.0, 1 - abs(predicted - expected) / abs(expected))
+
+
+def _count_ratio(predicted: int, expected: int) -> float:
+    """min/max ratio of two counts (1.0 if both are zero)"""
+    if max(predicted, expected) == 0:
+        return 1.0
+    return min(predicted, expected) / max(predicted, expected)
+
+
+def dqs_proxy(data: dict, truth: pd.Series) -> float:
+    """
+    Approximate DQS from the summary row of a training document.
+
+    Uses the DQS section weights with per-section agreement on spouse
+    name, statement totals, asset count/valuation and relative count.
+    """
+    spouse = data.get("spouse_info") or {}
+    if str(truth["spouse_first_name"]) in ("NONE", "nan"):
+        spouse_score = 1.0 if not spouse.get("first_name") else 0.0
+    else:
+        spouse_score = (
+            (spouse.get("first_name") == truth["spouse_first_name"])
+            + (spouse.get("last_name") == truth["spouse_last_name"])
+        ) / 2
+
+    statements_total = sum(_num(s.get("valuation")) for s in data.get("statements", []))
+    expected_statements = sum(
+        _num(truth[col]) for col in (
+            "statement_valuation_submitter_total",
+            "statement_valuation_spouse_total",
+            "statement_valuation_child_total",
+        )
+    )
+
+    assets = data.get("assets", [])
+    asset_score = (
+        _count_ratio(len(assets), int(_num(truth["asset_count"])))
+        + _closeness(
+            sum(_num(a.get("valuation")) for a in assets),
+            _num(truth["asset_total_valuation_amount"]),
+        )
+    ) / 2
+
+    scores = {
+        "submitter_spouse": spouse_score,
+        "statement_details": _closeness(statements_total, expected_statements),
+        "assets": asset_score,
+        "relatives": _count_ratio(len(data.get("relatives", [])), int(_num(truth["relative_count"]))),
+    }
+    return sum(DQS_WEIGHTS[section] * score for section, score in scores.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Docling prompt compaction report")
+    parser.add_argument("--limit", type=int, default=None, help="Max documents")
+    parser.add_argument("--extract", action="store_true", help="Also run Gemini both ways and compare DQS proxy")
+    args = parser.parse_args()
+
+    doc_info = pd.read_csv(TRAIN_INPUT / "Train_doc_info.csv", encoding="utf-8-sig")
+    submitter_info = pd.read_csv(TRAIN_INPUT / "Train_submitter_info.csv", encoding="utf-8-sig")
+    nacc_detail = pd.read_csv(TRAIN_INPUT / "Train_nacc_detail.csv", encoding="utf-8-sig")
+    summary = pd.read_csv(TRAIN_SUMMARY, encoding="utf-8-sig")
+    if args.limit:
+        doc_info = doc_info.head(args.limit)
+
+    extractor = DoclingExtractor()
+    compactor = extractor.compactor
+    tracker = get_usage_tracker()
+
+    rows = []
+    for _, doc in doc_info.iterrows():
+        pdf_path = TRAIN_INPUT / "Train_pdf" / "pdf" / doc["doc_location_url"]
+        if not pdf_path.exists():
+            continue
+
+        print(f"\n📄 {pdf_path.name}")
+        parsed = extractor._parse_pdf(pdf_path)
+        baseline = parsed["markdown"] + extractor._format_table_context(parsed["tables"])
+        compacted = compactor.compact(parsed["markdown"], parsed["tables"])
+        compact = compacted["markdown"] + extractor._format_table_context(compacted["tables"])
+
+        row = {
+            "doc_id": doc["doc_id"],
+            "tokens_before": compactor.count_tokens(extractor.model, baseline),
+            "tokens_after": compactor.count_tokens(extractor.model, compact),
+            "tables_dropped": compacted["stats"]["tables_deduplicated"],
+        }
+
+        if args.extract:
+            submitter = submitter_info[submitter_info["submitter_id"] == doc["nacc_id"]].iloc[0].to_dict()
+            nacc = nacc_detail[nacc_detail["nacc_id"] == doc["nacc_id"]].iloc[0].to_dict()
+            truth = summary[summary["doc_id"] == doc["doc_id"]].iloc[0]
+
+            for label, enabled in (("before", False), ("after", True)):
+                compactor.enabled = enabled
+                tracker.begin_document(f"{pdf_path.name} ({label})")
+                data = extractor.extract_from_pdf(pdf_path, submitter, nacc, {})
+                usage = tracker.end_document()
+                row[f"prompt_tokens_{label}"] = usage["prompt_tokens"]
+                row[f"dqs_{label}"] = dqs_proxy(data, truth)
+            compactor.enabled = True
+
+        rows.append(row)
+
+    report = pd.DataFrame(rows)
+    if report.empty:
+        print("No documents found")
+        return
+
+    report["saved_percent"] = (1 - report["tokens_after"] / report["tokens_before"]) * 100
+
+    print("\n" + "=" * 70)
+    print("PROMPT COMPACTION REPORT (training set)")
+    print("=" * 70)
+    print(report.to_string(index=False))
+    print(f"\nContent tokens: {report['tokens_before'].sum():,} → {report['tokens_after'].sum():,} "
+          f"({(1 - report['tokens_after'].sum() / report['tokens_before'].sum()) * 100:.1f}% saved)")
+    if args.extract:
+        print(f"Prompt tokens billed: {report['prompt_tokens_before'].sum():,} → {report['prompt_tokens_after'].sum():,}")
+        print(f"DQS proxy: {report['dqs_before'].mean():.3f} → {report['dqs_after'].mean():.3f}")
+
+
+if __name__ == "__main__":
+    main()
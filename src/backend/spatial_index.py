@@ -0,0 +1,153 @@
+"""
+Spatial Word Index - OCR words with boxes, queried by region
+
+OCR is run once per page with geometry kept: every word is stored with its
+bounding box and confidence in a uniform grid. Region extraction (frontend
+rectangles) is then a grid lookup instead of another OCR pass.
+
+Words are dicts: {"text", "box": (x0, y0, x1, y1), "confidence"} with
+confidence in 0..1 and boxes in the index's coordinate space.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+Box = Tuple[float, float, float, float]
+
+
+def _overlap_ratio(box: Box, region: Box) -> float:
+    """Share of box's area inside region"""
+    width = min(box[2], region[2]) - max(box[0], region[0])
+    height = min(box[3], region[3]) - max(box[1], region[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    return width * height / area if area > 0 else 1.0
+
+
+def _center(box: Box) -> Tuple[float, float]:
+    return (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+
+
+class PageIndex:
+    """Uniform-grid index over one page's words"""
+
+    def __init__(self, page: int = 1, cell_size: float = 100.0, scale: float = 1.0):
+        """
+        Initialize an empty page index
+
+        Args:
+            page: Page number (1-indexed)
+            cell_size: Grid cell size in index units (about 2-3 text lines)
+            scale: Multiplier applied to OCR pixel boxes (e.g. 72/dpi -> PDF points)
+        """
+        self.page = page
+        self.cell_size = cell_size
+        self.scale = scale
+        self.words: List[Dict] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+
+    def _cells(self, box: Box) -> Iterable[Tuple[int, int]]:
+        size = self.cell_size
+        for cx in range(int(box[0] // size), int(box[2] // size) + 1):
+            for cy in range(int(box[1] // size), int(box[3] // size) + 1):
+                yield cx, cy
+
+    def add(self, text: str, box: Box, confidence: float = 1.0):
+        """Add one word (box in OCR pixels, scaled into index units)"""
+        text = (text or "").strip()
+        if not text:
+            return
+        box = tuple(coord * self.scale for coord in box)
+        word_id = len(self.words)
+        self.words.append({"text": text, "box": box, "confidence": confidence})
+        for cell in self._cells(box):
+            self._grid[cell].append(word_id)
+
+    # ----- builders for each OCR engine -----
+
+    @classmethod
+    def from_easyocr(cls, result: List, page: int = 1, scale: float = 1.0) -> "PageIndex":
+        """From easyocr readtext(detail=1): [(4 corner points, text, confidence), ...]"""
+        index = cls(page, scale=scale)
+        for points, text, confidence in result:
+            xs = [float(p[0]) for p in points]
+            ys = [float(p[1]) for p in points]
+            index.add(text, (min(xs), min(ys), max(xs), max(ys)), float(confidence))
+        return index
+
+    @classmethod
+    def from_tesseract_data(cls, data: Dict, page: int = 1, scale: float = 1.0) -> "PageIndex":
+        """From pytesseract image_to_data(output_type=Output.DICT); conf is 0-100 (-1 = no text)"""
+        index = cls(page, scale=scale)
+        for i, text in enumerate(data.get("text", [])):
+            conf = float(data["conf"][i])
+            if conf < 0:
+                continue
+            left, top = float(data["left"][i]), float(data["top"][i])
+            index.add(text, (left, top, left + float(data["width"][i]), top + float(data["height"][i])), conf / 100)
+        return index
+
+    # ----- queries -----
+
+    def _candidates(self, region: Box) -> List[int]:
+        ids = set()
+        for cell in self._cells(region):
+            ids.update(self._grid.get(cell, ()))
+        return sorted(ids)
+
+    def query(self, region: Box, min_overlap: float = 0.5, min_confidence: float = 0.0) -> List[Dict]:
+        """
+        Words inside a region, in reading order.
+
+        Args:
+            region: (x0, y0, x1, y1) in index units
+            min_overlap: Share of a word's box that must fall inside the region
+            min_confidence: Drop words OCR was less sure about
+
+        Returns:
+            Word dicts sorted top-to-bottom, left-to-right
+        """
+        words = [
+            self.words[i] for i in self._candidates(region)
+            if self.words[i]["confidence"] >= min_confidence
+            and _overlap_ratio(self.words[i]["box"], region) >= min_overlap
+        ]
+        return sort_reading_order(words)
+
+    def text_in(self, region: Box, **kwargs) -> str:
+        """Text inside a region (lines joined with newlines)"""
+        return words_to_text(self.query(region, **kwargs))
+
+    def text(self) -> str:
+        """Whole page text in reading order"""
+        return words_to_text(sort_reading_order(self.words))
+
+
+def sort_reading_order(words: List[Dict]) -> List[Dict]:
+    """Group words into lines by vertical center, then order each line left to right"""
+    lines: List[List[Dict]] = []
+    for word in sorted(words, key=lambda w: _center(w["box"])[1]):
+        height = word["box"][3] - word["box"][1]
+        if lines:
+            last = lines[-1][-1]["box"]
+            if abs(_center(word["box"])[1] - (last[1] + last[3]) / 2) <= max(height, last[3] - last[1]) / 2:
+                lines[-1].append(word)
+                continue
+        lines.append([word])
+    return [word for line in lines for word in sorted(line, key=lambda w: w["box"][0])]
+
+
+def words_to_text(words: List[Dict]) -> str:
+    """Join reading-ordered words: same line -> space, new line -> newline"""
+    parts = []
+    previous = None
+    for word in words:
+        if previous is not None:
+            same_line = word["box"][0] >= previous["box"][0] and abs(
+                _center(word["box"])[1] - _center(previous["box"])[1]
+            ) <= (previous["box"][3] - previous["box"][1]) / 2
+            parts.append(" " if same_line else "\n")
+        parts.append(word["text"])
+        previous = word
+    return "".join(parts)
+
@@ -0,0 +1,268 @@
+"""
+SQL Sink - Load the output tables into SQLite and run validation_query.sql
+
+The summary used to be rebuilt by hand from the CSVs; the shipped
+data/validation_query.sql is the definition of what it should contain.
+The sink bulk-loads the 13 tables plus the run's metadata (nacc_detail,
+submitter_info, doc_info) and the asset_type enum into one SQLite file,
+indexes the join keys and executes the query file unchanged, so the
+summary and the query can't drift apart.
+
+The query is written against the official schema. Where a loaded table is
+in the transformer's schema instead (no nacc_id on child tables, no doc_id
+on nacc_detail, ...), it is loaded as raw_<table> and an adapter view with
+the query's columns takes its name. Tables already in the
+official schema are used as they are.
+"""
+import csv
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .transformer import CSV_FILES, TABLE_COLUMNS
+    from .config import DATA_DIR, VALIDATION_QUERY_FILE, SQL_LOAD_CHUNK_ROWS
+except ImportError:
+    from transformer import CSV_FILES, TABLE_COLUMNS
+    from config import DATA_DIR, VALIDATION_QUERY_FILE, SQL_LOAD_CHUNK_ROWS
+
+
+# Query table -> (columns the query needs that the transformer schema lacks, adapter view over raw_<table>)
+# In the pipeline submitter_id is the document's nacc_id, and child tables reach it through their parent.
+ADAPTER_VIEWS = {
+    "nacc_detail": (
+        ("doc_id",),
+        "SELECT n.*, d.doc_id FROM raw_nacc_detail n JOIN doc_info d ON d.nacc_id = n.nacc_id",
+    ),
+    "spouse_info": (
+        ("nacc_id", "status", "status_date", "status_month", "status_year"),
+        "SELECT s.*, s.submitter_id AS nacc_id, NULL AS status, NULL AS status_date, "
+        "NULL AS status_month, NULL AS status_year FROM raw_spouse_info s",
+    ),
+    "relative_info": (
+        ("nacc_id", "is_death"),
+        "SELECT r.*, r.submitter_id AS nacc_id, 0 AS is_death FROM raw_relative_info r",
+    ),
+    # Outputs from before the transformer kept per-owner amounts: a valuation
+    # goes to its only owner, shared statements have no per-owner amount (NULL)
+    "statement": (
+        ("valuation_submitter", "valuation_spouse", "valuation_child"),
+        "SELECT s.*, "
+        "CASE WHEN s.owner_by_submitter AND NOT s.owner_by_spouse AND NOT s.owner_by_child "
+        "THEN s.valuation END AS valuation_submitter, "
+        "CASE WHEN s.owner_by_spouse AND NOT s.owner_by_submitter AND NOT s.owner_by_child "
+        "THEN s.valuation END AS valuation_spouse, "
+        "CASE WHEN s.owner_by_child AND NOT s.owner_by_submitter AND NOT s.owner_by_spouse "
+        "THEN s.valuation END AS valuation_child "
+        "FROM raw_statement s",
+    ),
+    "statement_detail": (
+        ("nacc_id", "note"),
+        "SELECT d.*, s.nacc_id, NULL AS note FROM raw_statement_detail d "
+        "LEFT JOIN statement s ON s.statement_id = d.statement_id",
+    ),
+    "asset_land_info": (
+        ("nacc_id",),
+        "SELECT i.*, a.nacc_id FROM raw_asset_land_info i LEFT JOIN asset a ON a.asset_id = i.asset_id",
+    ),
+    "asset_building_info": (
+        ("nacc_id",),
+        "SELECT i.*, a.nacc_id FROM raw_asset_building_info i LEFT JOIN asset a ON a.asset_id = i.asset_id",
+    ),
+    "asset_vehicle_info": (
+        ("nacc_id",),
+        "SELECT i.*, a.nacc_id FROM raw_asset_vehicle_info i LEFT JOIN asset a ON a.asset_id = i.asset_id",
+    ),
+    "asset_other_asset_info": (
+        ("nacc_id", "count"),
+        "SELECT i.*, a.nacc_id, 1 AS count FROM raw_asset_other_asset_info i "
+        "LEFT JOIN asset a ON a.asset_id = i.asset_id",
+    ),
+}
+
+# Join keys indexed on every loaded table that has them
+INDEX_COLUMNS = ("nacc_id", "submitter_id", "doc_id", "statement_id", "asset_id", "asset_type_id")
+
+
+class SQLSink:
+    """One SQLite file with the output tables, metadata and the validation query"""
+
+    def __init__(self, db_path: Path, query_file: Path = VALIDATION_QUERY_FILE, chunk_rows: int = SQL_LOAD_CHUNK_ROWS):
+        """
+        Create a fresh database (an existing file is replaced)
+
+        Args:
+            db_path: SQLite file to build
+            query_file: SQL run by write_summary()
+            chunk_rows: Rows read from a CSV and inserted per batch
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_path.unlink(missing_ok=True)
+        self.query_file = Path(query_file)
+        self.chunk_rows = chunk_rows
+        self.conn = sqlite3.connect(str(self.db_path))
+        # Rebuildable artifact - no journal, no fsync while loading
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+
+        self.tables: Dict[str, str] = {}  # query name -> loaded table (itself or raw_<name>)
+        self.stats = {"rows_loaded": 0, "load_seconds": 0.0, "query_seconds": 0.0, "summary_rows": 0}
+
+    def _target(self, name: str, columns) -> str:
+        """Table to load into: the query name, or raw_<name> if an adapter view is needed"""
+        if name in ADAPTER_VIEWS and not set(ADAPTER_VIEWS[name][0]) <= set(columns):
+            target = f"raw_{name}"
+        else:
+            target = name
+        self.tables[name] = target
+        return target
+
+    def load_frame(self, name: str, df: pd.DataFrame) -> int:
+        """Load a DataFrame as table `name`; returns rows loaded"""
+        start = time.time()
+        target = self._target(name, df.columns)
+        df.to_sql(target, self.conn, if_exists="replace", index=False, chunksize=self.chunk_rows)
+        self.stats["rows_loaded"] += len(df)
+        self.stats["load_seconds"] += time.time() - start
+        return len(df)
+
+    def load_csv(self, name: str, path: Path, columns: List[str]) -> int:
+        """
+        Bulk-load a CSV in chunks as table `name`.
+
+        Missing files and empty placeholder files (older runs wrote a bare ""
+        file for empty tables) become an empty table with `columns`.
+        """
+        start = time.time()
+        path = Path(path)
+        header = []
+        if path.exists():
+            with open(path, newline="", encoding="utf-8-sig") as handle:
+                header = next(csv.reader(handle), [])
+        if not any(header):
+            target = self._target(name, columns)
+            pd.DataFrame(columns=columns).to_sql(target, self.conn, if_exists="replace", index=False)
+            return 0
+
+        target = self._target(name, header)
+        rows = 0
+        self.conn.execute(f'DROP TABLE IF EXISTS "{target}"')
+        for chunk in pd.read_csv(path, encoding="utf-8-sig", chunksize=self.chunk_rows):
+            chunk.to_sql(target, self.conn, if_exists="append", index=False)
+            rows += len(chunk)
+        self.stats["rows_loaded"] += rows
+        self.stats["load_seconds"] += time.time() - start
+        return rows
+
+    def load_tables(self, tables_dir: Path, prefix: str = "") -> Dict[str, int]:
+        """Load the 13 output CSVs of a run (or a merge); returns rows per table"""
+        return {
+            table: self.load_csv(table, Path(tables_dir) / f"{prefix}{filename}", TABLE_COLUMNS[table])
+            for table, filename in CSV_FILES.items()
+        }
+
+    def load_metadata(
+        self,
+        doc_info_df: pd.DataFrame,
+        submitter_info_df: pd.DataFrame,
+        nacc_detail_df: pd.DataFrame,
+        asset_type_file: Path = DATA_DIR / "enum_type" / "asset_type.csv"
+    ):
+        """
+        Load the run's metadata and the asset_type enum.
+
+        doc_info limits the summary to the documents of the run (a limited or
+        sharded run doesn't report every nacc_detail row).
+        """
+        self.load_frame("doc_info", doc_info_df)
+        self.load_frame("submitter_info", submitter_info_df)
+        self.load_frame("nacc_detail", nacc_detail_df)
+        self.load_csv("asset_type", asset_type_file, ["asset_type_id", "asset_type_main_type_name"])
+
+    def finalize(self):
+        """Index the join keys of every loaded table and create the adapter views"""
+        start = time.time()
+        for target in self.tables.values():
+            columns = {row[1] for row in self.conn.execute(f'PRAGMA table_info("{target}")')}
+            for column in INDEX_COLUMNS:
+                if column in columns:
+                    self.conn.execute(f'CREATE INDEX IF NOT EXISTS "{target}_{column}" ON "{target}" ("{column}")')
+        # Views in ADAPTER_VIEWS order - later views read earlier ones (statement_detail -> statement)
+        for name, (_, select) in ADAPTER_VIEWS.items():
+            if self.tables.get(name) == f"raw_{name}":
+                self.conn.execute(f'CREATE VIEW "{name}" AS {select}')
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+        self.stats["load_seconds"] += time.time() - start
+
+    def write_summary(self, output_path: Path) -> int:
+        """Run the query file and stream its result to a CSV; returns rows written"""
+        start = time.time()
+        sql = self.query_file.read_text(encoding="utf-8")
+        cursor = self.conn.execute(sql)
+        rows = 0
+        with open(output_path, "w", newline="", encoding="utf-8-sig") as handle:
+            writer = csv.writer(handle, lineterminator="\n")
+            writer.writerow(column[0] for column in cursor.description)
+            while True:
+                batch = cursor.fetchmany(self.chunk_rows)
+                if not batch:
+                    break
+                writer.writerows(batch)
+                rows += len(batch)
+        self.stats["summary_rows"] = rows
+        self.stats["query_seconds"] = time.time() - start
+        return rows
+
+    def close(self):
+        self.conn.close()
+
+    def print_stats(self):
+        """Print load and query timings"""
+        s = self.stats
+        print(f"\n🗄️  SQL Sink ({self.db_path.name}):")
+        print(f"   Loaded {s['rows_loaded']} rows into {len(self.tables)} tables in {s['load_seconds']:.2f}s")
+        print(f"   {self.query_file.name}: {s['summary_rows']} summary rows in {s['query_seconds']:.2f}s")
+
+
+def build_summary(
+    tables_dir: Path,
+    prefix: str,
+    doc_info_df: pd.DataFrame,
+    submitter_info_df: pd.DataFrame,
+    nacc_detail_df: pd.DataFrame,
+    output_dir: Optional[Path] = None
+) -> Path:
+    """
+    Load a run's CSVs and metadata into {prefix}tables.sqlite and write
+    {prefix}summary.csv from validation_query.sql.
+
+    Args:
+        tables_dir: Directory with the 13 output CSVs
+        prefix: File name prefix of the CSVs (e.g. "Train_")
+        doc_info_df, submitter_info_df, nacc_detail_df: Metadata of the run
+        output_dir: Where the database and summary go (default: tables_dir)
+
+    Returns:
+        Summary CSV path
+    """
+    output_dir = Path(output_dir or tables_dir)
+    sink = SQLSink(output_dir / f"{prefix}tables.sqlite")
+    try:
+        sink.load_tables(tables_dir, prefix)
+        sink.load_metadata(doc_info_df, submitter_info_df, nacc_detail_df)
+        sink.finalize()
+        summary_path = output_dir / f"{prefix}summary.csv"
+        rows = sink.write_summary(summary_path)
+        print(f"✓ Saved {summary_path} ({rows} rows)")
+        sink.print_stats()
+    finally:
+        sink.close()
+    return summary_path
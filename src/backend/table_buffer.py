@@ -0,0 +1,52 @@
+"""
+Table Buffer - Column-oriented row storage for the 13 output tables
+
+A dict per row costs a hash table (~650 bytes for the 21 asset columns)
+on top of the values themselves. TableBuffer keeps one plain list per
+column instead, so a row costs one pointer per column, and hands the
+columns straight to pandas/Arrow at save time without re-pivoting rows.
+
+The column lists are never replaced (clear() empties them in place), so
+row builders can hold on to their bound append methods.
+"""
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pandas as pd
+
+
+class TableBuffer:
+    """Column lists for one table"""
+
+    __slots__ = ("columns", "data", "appends")
+
+    def __init__(self, columns: List[str]):
+        """
+        Args:
+            columns: Column order (file order)
+        """
+        self.columns = columns
+        self.data: Dict[str, List[Any]] = {column: [] for column in columns}
+        self.appends = tuple(values.append for values in self.data.values())
+
+    def __len__(self) -> int:
+        return len(self.data[self.columns[0]])
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def rows(self) -> Iterator[Tuple]:
+        """Rows as tuples in column order"""
+        return zip(*self.data.values())
+
+    def to_dicts(self) -> List[Dict]:
+        """Rows as dicts (for callers that still want records)"""
+        return [dict(zip(self.columns, row)) for row in self.rows()]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Columns -> DataFrame (no per-row conversion)"""
+        return pd.DataFrame(self.data, columns=self.columns)
+
+    def clear(self):
+        """Drop all rows, keeping the column lists (and their appends) alive"""
+        for values in self.data.values():
+            values.clear()
@@ -0,0 +1,472 @@
+"""
+Deterministic Table Parser - Fast path for known NACC table templates
+
+The asset list and the income/expense/liability tables of the NACC form
+have a fixed column layout. When Docling's table-structure pass is on,
+those tables are mapped straight to assets / statements /
+statement_details rows here; only tables that don't match a template
+(or have rows the parser can't read) are left to Gemini.
+"""
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .config import THAI_MONTHS
+    from .prompt_compactor import compact_table_row
+except ImportError:
+    from config import THAI_MONTHS
+    from prompt_compactor import compact_table_row
+
+
+# Known table templates. A template matches when every group in "required"
+# has at least one keyword in the header; "columns" maps header keywords
+# to field roles (first matching column wins).
+TABLE_TEMPLATES = [
+    {
+        "name": "asset_list",
+        "target": "assets",
+        "required": [["มูลค่า", "ราคา"], ["ได้มา"]],
+        "columns": {
+            "index": ["ลำดับ"],
+            "asset_type": ["ประเภท"],
+            "asset_name": ["รายการ", "รายละเอียด", "ทรัพย์สิน"],
+            "acquiring": ["วันที่ได้มา", "ได้มา"],
+            "valuation": ["มูลค่า", "ราคา"],
+            "owner": ["เจ้าของ", "กรรมสิทธิ์"],
+            "owner_submitter": ["ผู้ยื่น"],
+            "owner_spouse": ["คู่สมรส"],
+            "owner_child": ["บุตร"],
+        },
+    },
+    {
+        "name": "statement_summary",
+        "target": "statements",
+        "required": [["รายการ", "ประเภท"], ["ผู้ยื่น"], ["คู่สมรส"]],
+        "columns": {
+            "label": ["รายการ", "ประเภท"],
+            "valuation_submitter": ["ผู้ยื่น"],
+            "valuation_spouse": ["คู่สมรส"],
+            "valuation_child": ["บุตร"],
+        },
+    },
+]
+
+# Statement group headers (statement_type_id) used when a row names a group
+STATEMENT_TYPE_LABELS = {
+    "รายได้": 1,
+    "รายจ่าย": 2,
+    "ภาษี": 3,
+    "ทรัพย์สิน": 4,
+    "หนี้สิน": 5,
+}
+
+OWNER_MARKS = {"/", "✓", "✔", "x", "X", "√", "ü"}
+TOTAL_LABELS = ("รวม", "ยอดรวม")
+
+_AMOUNT = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+_SLASH_DATE = re.compile(r"(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})")
+_YEAR = re.compile(r"(\d{4})")
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """Parse '1,234,567.89 บาท' -> 1234567.89 (None if no number)"""
+    match = _AMOUNT.search(text or "")
+    if not match:
+        return None
+    try:
+        return float(match.group().replace(",", ""))
+    except ValueError:
+        return None
+
+
+def parse_thai_date(text: str, prefix: str = "acquiring", keep_buddhist_year: bool = False) -> Dict[str, str]:
+    """
+    Parse a Thai date into Christian year/month/day strings.
+
+    Handles '6 ก.ค. 2554', '6 กรกฎาคม 2554', '06/07/2554' and bare years.
+    Missing parts are returned as "".
+
+    Args:
+        text: Date text
+        prefix: Output key prefix ("acquiring" -> acquiring_date/_month/_year)
+        keep_buddhist_year: Don't convert พ.ศ. years (status dates are stored in พ.ศ.)
+    """
+    text = (text or "").strip()
+    result = {f"{prefix}_date": "", f"{prefix}_month": "", f"{prefix}_year": ""}
+    if not text:
+        return result
+
+    day = month = year = None
+    slash = _SLASH_DATE.search(text)
+    if slash:
+        day, month, year = (int(part) for part in slash.groups())
+    else:
+        # Longest month names first so "มกราคม" wins over "ม.ค."
+        for name in sorted(THAI_MONTHS, key=len, reverse=True):
+            if name in text:
+                month = THAI_MONTHS[name]
+                before = text.split(name, 1)[0]
+                day_match = re.search(r"(\d{1,2})\s*$", before)
+                day = int(day_match.group(1)) if day_match else None
+                break
+        year_match = _YEAR.search(text)
+        year = int(year_match.group(1)) if year_match else None
+
+    if year and year > 2400 and not keep_buddhist_year:
+        year -= 543  # Buddhist -> Christian year
+
+    result[f"{prefix}_date"] = str(day) if day else ""
+    result[f"{prefix}_month"] = str(month) if month else ""
+    result[f"{prefix}_year"] = str(year) if year else ""
+    return result
+
+
+def _split_row(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _table_rows(content: str) -> List[List[str]]:
+    """Markdown table -> list of cell lists (separator rows removed)"""
+    rows = []
+    for line in content.split("\n"):
+        line = line.strip()
+        if not line.startswith("|"):
+            continue
+        cells = _split_row(line)
+        if all(re.fullmatch(r":?-*:?", cell) for cell in cells):
+            continue
+        rows.append(cells)
+    return rows
+
+
+def _is_marked(cell: str) -> bool:
+    cell = cell.strip()
+    return bool(cell) and (cell in OWNER_MARKS or (parse_amount(cell) or 0) > 0)
+
+
+class TableParser:
+    """Map known NACC tables to extraction rows without an LLM call"""
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize parser
+
+        Args:
+            enabled: Parse known tables locally (otherwise everything goes to Gemini)
+        """
+        self.enabled = enabled
+        self.stats = {
+            "tables_seen": 0,
+            "tables_parsed": 0,
+            "rows_parsed": 0,
+        }
+
+    @staticmethod
+    def match_template(header: List[str]) -> Optional[Tuple[Dict, Dict[str, int]]]:
+        """
+        Find the template for a table header.
+
+        Args:
+            header: Header cells (multi-row headers already joined per column)
+
+        Returns:
+            (template, {role: column index}) or None
+        """
+        header_text = " ".join(header)
+        for template in TABLE_TEMPLATES:
+            if not all(any(k in header_text for k in group) for group in template["required"]):
+                continue
+
+            columns = {}
+            for role, keywords in template["columns"].items():
+                for col, cell in enumerate(header):
+                    if col not in columns.values() and any(k in cell for k in keywords):
+                        columns[role] = col
+                        break
+            return template, columns
+        return None
+
+    @staticmethod
+    def _split_header(rows: List[List[str]]) -> Tuple[List[str], List[List[str]]]:
+        """Join up to two leading header rows (mostly filled, no amounts) per column"""
+        header_rows = []
+        for row in rows[:2]:
+            if any(parse_amount(cell) for cell in row if not cell.isdigit()):
+                break
+            # A group label in the first cell only ("รายได้") is data, not header
+            if header_rows and sum(1 for cell in row if cell) * 2 < len(row):
+                break
+            header_rows.append(row)
+        if not header_rows:
+            return [], rows
+
+        width = max(len(row) for row in header_rows)
+        header = [
+            " ".join(row[col] for row in header_rows if col < len(row)).strip()
+            for col in range(width)
+        ]
+        return header, rows[len(header_rows):]
+
+    @staticmethod
+    def asset_type_id(text: str, enum_mappings: Dict) -> Optional[int]:
+        """Longest asset_type sub-type name contained in text"""
+        best = None
+        for entry in enum_mappings.get("asset_type", []):
+            name = str(entry.get("asset_type_sub_type_name", ""))
+            if name and name in text and (best is None or len(name) > len(best[1])):
+                best = (int(entry["asset_type_id"]), name)
+        return best[0] if best else None
+
+    @staticmethod
+    def statement_detail_type(label: str, enum_mappings: Dict) -> Optional[Tuple[int, int]]:
+        """(statement_detail_type_id, statement_type_id) whose name matches label"""
+        best = None
+        for entry in enum_mappings.get("statement_detail_type", []):
+            name = str(entry.get("statement_detail_sub_type_name", ""))
+            if name and name in label and (best is None or len(name) > len(best[2])):
+                best = (int(entry["statement_detail_type_id"]), int(entry["statement_type_id"]), name)
+        return best[:2] if best else None
+
+    @staticmethod
+    def other_detail_type(statement_type_id: int, enum_mappings: Dict) -> Optional[int]:
+        """The "other" (อื่น) detail type of a statement type, for unlisted rows"""
+        for entry in enum_mappings.get("statement_detail_type", []):
+            if int(entry["statement_type_id"]) == statement_type_id and "อื่น" in str(entry.get("statement_detail_sub_type_name", "")):
+                return int(entry["statement_detail_type_id"])
+        return None
+
+    def _parse_asset_rows(self, rows: List[List[str]], columns: Dict[str, int], enum_mappings: Dict) -> Optional[List[Dict]]:
+        """Asset list rows -> asset dicts (None if any data row is unreadable)"""
+
+        def cell(row, role):
+            col = columns.get(role)
+            return row[col] if col is not None and col < len(row) else ""
+
+        assets = []
+        for row in rows:
+            if not any(row) or any(label in " ".join(row) for label in TOTAL_LABELS):
+                continue
+
+            valuation = parse_amount(cell(row, "valuation"))
+            type_text = f"{cell(row, 'asset_type')} {cell(row, 'asset_name')}"
+            asset_type_id = self.asset_type_id(type_text, enum_mappings)
+            if valuation is None or asset_type_id is None:
+                return None
+
+            owner_text = cell(row, "owner")
+            if "owner" in columns:
+                owners = ("ผู้ยื่น" in owner_text, "คู่สมรส" in owner_text, "บุตร" in owner_text)
+            else:
+                owners = tuple(_is_marked(cell(row, role)) for role in ("owner_submitter", "owner_spouse", "owner_child"))
+            if not any(owners):
+                owners = (True, False, False)  # Default owner is the submitter
+
+            asset = {
+                "asset_type_id": asset_type_id,
+                "asset_name": cell(row, "asset_name") or cell(row, "asset_type"),
+                "valuation": valuation,
+                "owner_by_submitter": owners[0],
+                "owner_by_spouse": owners[1],
+                "owner_by_child": owners[2],
+            }
+            asset.update(parse_thai_date(cell(row, "acquiring")))
+            assets.append(asset)
+
+        return assets or None
+
+    def _parse_statement_rows(self, rows: List[List[str]], columns: Dict[str, int], enum_mappings: Dict) -> Optional[List[Dict]]:
+        """Statement table rows -> statement_detail dicts (None if unreadable)"""
+
+        def amount(row, role):
+            col = columns.get(role)
+            return parse_amount(row[col]) if col is not None and col < len(row) else None
+
+        details = []
+        current_type = None
+        for row in rows:
+            label = row[columns["label"]] if columns.get("label", 0) < len(row) else ""
+            if not any(row) or any(total in label for total in TOTAL_LABELS):
+                continue
+
+            values = {
+                role: amount(row, role)
+                for role in ("valuation_submitter", "valuation_spouse", "valuation_child")
+            }
+            matched = self.statement_detail_type(label, enum_mappings)
+
+            if matched is None:
+                group = next((tid for name, tid in STATEMENT_TYPE_LABELS.items() if label.startswith(name)), None)
+                if group is not None and not any(values.values()):
+                    current_type = group  # Group header row
+                    continue
+                if current_type is None or not any(values.values()):
+                    return None
+                detail_type_id = self.other_detail_type(current_type, enum_mappings)
+                statement_type_id = current_type
+            else:
+                detail_type_id, statement_type_id = matched
+
+            details.append({
+                "statement_type_id": statement_type_id,
+                "statement_detail_type_id": detail_type_id,
+                "statement_detail_name": label,
+                **{role: value or 0.0 for role, value in values.items()},
+            })
+
+        return details or None
+
+    def parse_tables(self, tables: List[Dict], enum_mappings: Dict) -> Dict:
+        """
+        Parse every table that matches a known template.
+
+        Args:
+            tables: Table dicts from _extract_tables_structure
+            enum_mappings: Enum type mappings (asset_type, statement_detail_type)
+
+        Returns:
+            {"data": {assets, statements, statement_details}, "parsed": [tables], "unparsed": [tables]}
+        """
+        result = {
+            "data": {"assets": [], "statements": [], "statement_details": []},
+            "parsed": [],
+            "unparsed": [],
+        }
+        if not self.enabled:
+            result["unparsed"] = list(tables)
+            return result
+
+        detail_rows = []
+        for table in tables:
+            self.stats["tables_seen"] += 1
+            header, body = self._split_header(_table_rows(table.get("content", "")))
+            matched = self.match_template(header) if header else None
+
+            rows = None
+            if matched:
+                template, columns = matched
+                if template["target"] == "assets":
+                    rows = self._parse_asset_rows(body, columns, enum_mappings)
+                    if rows:
+                        result["data"]["assets"].extend(rows)
+                elif "label" in columns:
+                    rows = self._parse_statement_rows(body, columns, enum_mappings)
+                    if rows:
+                        detail_rows.extend(rows)
+
+            if rows:
+                result["parsed"].append(table)
+                self.stats["tables_parsed"] += 1
+                self.stats["rows_parsed"] += len(rows)
+            else:
+                result["unparsed"].append(table)
+
+        for i, asset in enumerate(result["data"]["assets"]):
+            asset["asset_id"] = i + 1
+            asset["index"] = i + 1
+
+        statements, details = self.group_statements(detail_rows)
+        result["data"]["statements"] = statements
+        result["data"]["statement_details"] = details
+        return result
+
+    @staticmethod
+    def group_statements(detail_rows: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """One statement per statement_type_id with its details linked by statement_id"""
+        statements = {}
+        details = []
+        for row in detail_rows:
+            type_id = row["statement_type_id"]
+            stmt = statements.get(type_id)
+            if stmt is None:
+                stmt = {
+                    "statement_id": len(statements) + 1,
+                    "statement_type_id": type_id,
+                    "valuation_submitter": 0.0,
+                    "valuation_spouse": 0.0,
+                    "valuation_child": 0.0,
+                }
+                statements[type_id] = stmt
+
+            for role in ("valuation_submitter", "valuation_spouse", "valuation_child"):
+                stmt[role] += row[role]
+
+            details.append({
+                "statement_detail_id": len(details) + 1,
+                "statement_id": stmt["statement_id"],
+                "statement_detail_type_id": row["statement_detail_type_id"],
+                "statement_detail_name": row["statement_detail_name"],
+                "valuation": row["valuation_submitter"] + row["valuation_spouse"] + row["valuation_child"],
+                "valuation_submitter": row["valuation_submitter"],
+                "valuation_spouse": row["valuation_spouse"],
+                "valuation_child": row["valuation_child"],
+            })
+
+        for stmt in statements.values():
+            stmt["valuation"] = stmt["valuation_submitter"] + stmt["valuation_spouse"] + stmt["valuation_child"]
+            stmt["owner_by_submitter"] = stmt["valuation_submitter"] > 0
+            stmt["owner_by_spouse"] = stmt["valuation_spouse"] > 0
+            stmt["owner_by_child"] = stmt["valuation_child"] > 0
+
+        return list(statements.values()), details
+
+    def print_stats(self):
+        """Print table parser statistics"""
+        s = self.stats
+        print(f"\n📐 Deterministic Table Parser:")
+        print(f"   Tables parsed locally: {s['tables_parsed']}/{s['tables_seen']}")
+        print(f"   Rows parsed without Gemini: {s['rows_parsed']}")
+
+
+def remove_parsed_rows(markdown: str, parsed_tables: List[Dict]) -> str:
+    """Drop the rows of locally parsed tables from markdown sent to Gemini"""
+    parsed_rows = {
+        compact_table_row(line)
+        for table in parsed_tables
+        for line in table.get("content", "").split("\n")
+        if line.strip().startswith("|")
+    }
+    if not parsed_rows:
+        return markdown
+
+    return "\n".join(
+        line for line in markdown.split("\n")
+        if not (line.strip().startswith("|") and compact_table_row(line) in parsed_rows)
+    )
+
+
+def merge_parsed_data(extracted: Dict, parsed: Dict) -> Dict:
+    """
+    Merge locally parsed rows with Gemini's rows for the remaining content.
+
+    Parsed rows come first; Gemini rows are renumbered after them and
+    their foreign keys (asset detail asset_id, statement_detail
+    statement_id) are shifted to match.
+    """
+    asset_offset = len(parsed["assets"])
+    if asset_offset:
+        for asset in extracted.get("assets", []):
+            asset["asset_id"] = (asset.get("asset_id") or 0) + asset_offset
+            asset["index"] = (asset.get("index") or 0) + asset_offset
+        for key in ("asset_land_info", "asset_building_info", "asset_vehicle_info", "asset_other_info"):
+            for info in extracted.get(key, []):
+                if info.get("asset_id") is not None:
+                    info["asset_id"] += asset_offset
+        extracted["assets"] = parsed["assets"] + extracted.get("assets", [])
+
+    statement_offset = len(parsed["statements"])
+    if statement_offset:
+        for stmt in extracted.get("statements", []):
+            stmt["statement_id"] = (stmt.get("statement_id") or 0) + statement_offset
+        detail_offset = len(parsed["statement_details"])
+        for detail in extracted.get("statement_details", []):
+            detail["statement_detail_id"] = (detail.get("statement_detail_id") or 0) + detail_offset
+            if detail.get("statement_id") is not None:
+                detail["statement_id"] += statement_offset
+        extracted["statements"] = parsed["statements"] + extracted.get("statements", [])
+        extracted["statement_details"] = parsed["statement_details"] + extracted.get("statement_details", [])
+
+    return extracted
@@ -0,0 +1,240 @@
+"""
+Tesseract Engine Pool - Resident Tesseract engines, page-parallel OCR
+
+pytesseract.image_to_string starts a tesseract process per page, reloads
+the tha+eng traineddata and round-trips the image through a temp file.
+With tesserocr installed, the pool keeps initialized PyTessBaseAPI engines
+in memory (one per thread) and hands them images directly; Recognize()
+releases the GIL, so pages run in parallel across cores. Without
+tesserocr it falls back to pytesseract, still page-parallel. The same
+recognition pass yields the page text and a PageIndex of word boxes.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .spatial_index import PageIndex
+    from .config import TESSERACT_LANG, TESSERACT_PSM, TESSERACT_POOL_SIZE
+except ImportError:
+    from spatial_index import PageIndex
+    from config import TESSERACT_LANG, TESSERACT_PSM, TESSERACT_POOL_SIZE
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+
+def to_pil(image):
+    """Accept PIL images and in-memory numpy arrays (no temp files)"""
+    from PIL import Image
+
+    if isinstance(image, Image.Image):
+        return image
+    return Image.fromarray(image)
+
+
+class TesseractEnginePool:
+    """
+    Thread-safe pool of initialized tesserocr engines.
+
+    Engines are created lazily up to `size` and reused for every page of
+    every document in this process.
+    """
+
+    def __init__(
+        self,
+        size: int = TESSERACT_POOL_SIZE,
+        lang: str = TESSERACT_LANG,
+        psm: int = TESSERACT_PSM,
+        use_api: bool = TESSEROCR_AVAILABLE
+    ):
+        """
+        Initialize an empty pool
+
+        Args:
+            size: Max engines (= max concurrent OCR threads)
+            lang: Tesseract languages (e.g. "tha+eng")
+            psm: Page segmentation mode
+            use_api: Keep engines resident via tesserocr (else pytesseract)
+        """
+        self.size = max(1, size)
+        self.lang = lang
+        self.psm = psm
+        self.use_api = use_api
+        self._engines: List = []
+        self._loading = 0
+        self._reset_sync()
+        self._stats = {"engines_loaded": 0, "load_seconds": 0.0, "pages": 0, "ocr_seconds": 0.0}
+
+    def _reset_sync(self):
+        """(Re)create lock and queue - needed after fork, keeps loaded engines"""
+        self._lock = threading.Lock()
+        self._loading = 0
+        self._available: "queue.Queue" = queue.Queue()
+        for engine in self._engines:
+            self._available.put(engine)
+        self._pid = os.getpid()
+
+    def _check_process(self):
+        """Locks copied by fork may be held by a parent thread - rebuild them"""
+        if self._pid != os.getpid():
+            self._reset_sync()
+
+    def _reserve_slot(self) -> bool:
+        """Claim room for one more engine (False if the pool is full)"""
+        with self._lock:
+            if len(self._engines) + self._loading >= self.size:
+                return False
+            self._loading += 1
+            return True
+
+    def _load_engine(self):
+        """Create one engine (slot already reserved) and time its model load"""
+        start = time.time()
+        try:
+            engine = tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm, oem=tesserocr.OEM.DEFAULT)
+        except Exception:
+            with self._lock:
+                self._loading -= 1
+            raise
+        elapsed = time.time() - start
+
+        with self._lock:
+            self._engines.append(engine)
+            self._loading -= 1
+            self._stats["engines_loaded"] += 1
+            self._stats["load_seconds"] += elapsed
+        return engine
+
+    @contextmanager
+    def acquire(self):
+        """Borrow an engine for the duration of the with-block"""
+        self._check_process()
+        try:
+            engine = self._available.get_nowait()
+        except queue.Empty:
+            engine = self._load_engine() if self._reserve_slot() else self._available.get()
+
+        try:
+            yield engine
+        finally:
+            self._available.put(engine)
+
+    def ocr_page(self, image, page: int = 1, scale: float = 1.0) -> Tuple[str, PageIndex]:
+        """
+        OCR one page image into text and word boxes (single recognition pass).
+
+        Args:
+            image: PIL image or numpy array
+            page: Page number for the index
+            scale: Multiplier from image pixels to index units (e.g. 72/dpi)
+
+        Returns:
+            (page text, PageIndex of words)
+        """
+        image = to_pil(image)
+        if self.use_api:
+            with self.acquire() as engine:
+                start = time.time()
+                engine.SetImage(image)
+                text = engine.GetUTF8Text()
+                index = PageIndex(page, scale=scale)
+                level = tesserocr.RIL.WORD
+                for word in tesserocr.iterate_level(engine.GetIterator(), level):
+                    box = word.BoundingBox(level)
+                    if box:
+                        index.add(word.GetUTF8Text(level), box, word.Confidence(level) / 100)
+                elapsed = time.time() - start
+        else:
+            import pytesseract
+
+            start = time.time()
+            data = pytesseract.image_to_data(
+                image,
+                config=f"--oem 3 --psm {self.psm} -l {self.lang}",
+                output_type=pytesseract.Output.DICT
+            )
+            index = PageIndex.from_tesseract_data(data, page, scale=scale)
+            text = index.text()
+            elapsed = time.time() - start
+
+        with self._lock:
+            self._stats["pages"] += 1
+            self._stats["ocr_seconds"] += elapsed
+        return text, index
+
+    def ocr_image(self, image) -> str:
+        """OCR one page image (PIL or numpy) to text"""
+        return self.ocr_page(image)[0]
+
+    def index_pages(self, images: List, workers: Optional[int] = None, scale: float = 1.0) -> List[Tuple[str, PageIndex]]:
+        """
+        OCR pages in parallel into (text, PageIndex), in page order.
+
+        A page that fails yields an empty text and index (and a warning)
+        rather than failing the document.
+
+        Args:
+            images: Page images (PIL or numpy)
+            workers: Threads (default: pool size)
+            scale: Multiplier from image pixels to index units
+
+        Returns:
+            One (text, PageIndex) per page
+        """
+        def run(page):
+            page_num, image = page
+            try:
+                return self.ocr_page(image, page_num + 1, scale)
+            except Exception as e:
+                print(f"   ⚠️ Error OCR page {page_num + 1}: {e}")
+                return "", PageIndex(page_num + 1, scale=scale)
+
+        workers = min(workers or self.size, len(images)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tesseract") as executor:
+            return list(executor.map(run, enumerate(images)))
+
+    def ocr_pages(self, images: List, workers: Optional[int] = None) -> List[str]:
+        """OCR pages in parallel, returning texts in page order"""
+        return [text for text, _ in self.index_pages(images, workers)]
+
+    def get_stats(self) -> Dict:
+        """Engine load and OCR timing"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["seconds_per_page"] = stats["ocr_seconds"] / stats["pages"] if stats["pages"] else 0.0
+        return stats
+
+    def print_stats(self):
+        """Print engine load vs OCR time"""
+        s = self.get_stats()
+        backend = "tesserocr" if self.use_api else "pytesseract subprocess"
+        print(f"\n🔠 Tesseract Engine Pool ({backend}):")
+        print(f"   Engines loaded: {s['engines_loaded']} ({s['load_seconds']:.1f}s model load)")
+        print(f"   OCR: {s['pages']} pages, {s['ocr_seconds']:.1f}s engine time ({s['seconds_per_page']:.2f}s/page)")
+
+
+# Per-process engine pool
+_global_pool: Optional[TesseractEnginePool] = None
+_global_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool() -> TesseractEnginePool:
+    """Get the process-wide Tesseract engine pool"""
+    global _global_pool
+    if _global_pool is None:
+        with _global_pool_lock:
+            if _global_pool is None:
+                _global_pool = TesseractEnginePool()
+    return _global_pool
@@ -0,0 +1,316 @@
+"""
+Token and Cost Accounting - Measure what every Gemini call actually costs
+
+Reads usage_metadata from every response (including retries and hedged
+duplicates), rolls token counts up per document and per run, and enforces
+an optional per-document token budget so runaway calls are aborted.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .hedging import get_hedger
+    from .config import (
+        DOC_TOKEN_BUDGET,
+        GEMINI_INPUT_PRICE_PER_M,
+        GEMINI_OUTPUT_PRICE_PER_M,
+        GEMINI_TOKENS_PER_IMAGE,
+    )
+except ImportError:
+    from hedging import get_hedger
+    from config import (
+        DOC_TOKEN_BUDGET,
+        GEMINI_INPUT_PRICE_PER_M,
+        GEMINI_OUTPUT_PRICE_PER_M,
+        GEMINI_TOKENS_PER_IMAGE,
+    )
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a document has used up its token budget"""
+
+
+def _empty_totals() -> Dict:
+    """Zeroed token/cost counters"""
+    return {
+        "calls": 0,
+        "failed_calls": 0,
+        "prompt_tokens": 0,
+        "image_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "call_seconds": 0.0,
+        "cost_usd": 0.0,
+    }
+
+
+def _add_totals(target: Dict, source: Dict):
+    """Accumulate counters from source into target"""
+    for key in _empty_totals():
+        target[key] += source.get(key, 0)
+
+
+def _finalize(totals: Dict) -> Dict:
+    """Add derived metrics (tokens/sec) to a totals dict"""
+    result = dict(totals)
+    result["output_tokens_per_second"] = (
+        totals["output_tokens"] / totals["call_seconds"] if totals["call_seconds"] > 0 else 0.0
+    )
+    return result
+
+
+def usage_from_response(response: Any, num_images: int = 0) -> Dict:
+    """
+    Extract token counts from a Gemini response.
+
+    Args:
+        response: generate_content() response
+        num_images: Images sent in the request (used if the API gives no modality breakdown)
+
+    Returns:
+        Dictionary with prompt/image/output/total token counts and cost
+    """
+    usage = _empty_totals()
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is None:
+        return usage
+
+    prompt_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+    # Thinking tokens are billed as output on Gemini 2.5
+    output_tokens = (getattr(metadata, "candidates_token_count", 0) or 0) + \
+        (getattr(metadata, "thoughts_token_count", 0) or 0)
+    total_tokens = getattr(metadata, "total_token_count", 0) or (prompt_tokens + output_tokens)
+
+    # Image tokens: use modality breakdown if available, otherwise estimate
+    image_tokens = 0
+    details = getattr(metadata, "prompt_tokens_details", None) or []
+    for detail in details:
+        if "IMAGE" in str(getattr(detail, "modality", "")).upper():
+            image_tokens += getattr(detail, "token_count", 0) or 0
+    if not details and num_images:
+        image_tokens = min(prompt_tokens, num_images * GEMINI_TOKENS_PER_IMAGE)
+
+    usage["prompt_tokens"] = prompt_tokens
+    usage["image_tokens"] = image_tokens
+    usage["output_tokens"] = output_tokens
+    usage["total_tokens"] = total_tokens
+    usage["cost_usd"] = (
+        prompt_tokens * GEMINI_INPUT_PRICE_PER_M + output_tokens * GEMINI_OUTPUT_PRICE_PER_M
+    ) / 1_000_000
+    return usage
+
+
+class UsageTracker:
+    """
+    Roll up Gemini token usage per call, per document and per run.
+
+    The pipeline calls begin_document()/end_document() around each PDF;
+    extractors route their model calls through generate() so every
+    attempt is counted and the document budget is enforced.
+
+    A document belongs to the thread that began it. generate() binds its
+    calls to that thread's document, or to the document passed in by
+    worker threads (see document_totals()), so a hedge loser finishing
+    after end_document() is still billed to its own document. Calls with
+    no document count towards the run only.
+    """
+
+    def __init__(self, token_budget: int = DOC_TOKEN_BUDGET):
+        """
+        Initialize tracker
+
+        Args:
+            token_budget: Max total tokens per document (0 = unlimited)
+        """
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self._run = _empty_totals()
+        self._documents: List[Dict] = []
+        self._local = threading.local()  # Document begun by this thread
+        self._run_start = time.time()
+
+    def _document(self) -> Optional[Dict]:
+        """Totals dict of the document begun by the calling thread"""
+        return getattr(self._local, "document", None)
+
+    def document_totals(self) -> Optional[Dict]:
+        """
+        The calling thread's document, to pass to generate(document=...)
+        from executor threads (which have no document of their own)
+        """
+        return self._document()
+
+    def begin_document(self, name: str):
+        """Start accounting for a new document (in the calling thread)"""
+        self._local.document = {"document": name, **_empty_totals(), "call_log": [], "ended": False}
+
+    def end_document(self) -> Dict:
+        """
+        Finish the current document and fold it into the run totals.
+
+        Calls of the document that complete later are still added to it
+        (and to the run) by record().
+
+        Returns:
+            Usage summary for the document (so far)
+        """
+        with self._lock:
+            doc = self._document() or {"document": None, **_empty_totals(), "call_log": [], "ended": False}
+            self._local.document = None
+            doc["ended"] = True
+            _add_totals(self._run, doc)
+            self._documents.append(doc)
+            return _finalize(doc)
+
+    def current_document(self) -> Optional[Dict]:
+        """Usage of the document in progress (None if not tracking)"""
+        with self._lock:
+            doc = self._document()
+            return _finalize(doc) if doc else None
+
+    def record(
+        self,
+        usage: Dict,
+        request_class: str,
+        seconds: float,
+        failed: bool = False,
+        document: Optional[Dict] = None
+    ):
+        """
+        Record one model call
+
+        Args:
+            document: Totals dict the call belongs to (captured by generate()), None = run only
+        """
+        with self._lock:
+            entry = dict(usage)
+            entry["calls"] = 1
+            entry["failed_calls"] = 1 if failed else 0
+            entry["call_seconds"] = seconds
+
+            if document is not None:
+                _add_totals(document, entry)
+                if document["ended"]:
+                    # Late call (e.g. hedge loser) - the document was already folded into the run
+                    _add_totals(self._run, entry)
+                document["call_log"].append({
+                    "request_class": request_class,
+                    "prompt_tokens": entry["prompt_tokens"],
+                    "image_tokens": entry["image_tokens"],
+                    "output_tokens": entry["output_tokens"],
+                    "seconds": round(seconds, 2),
+                    "failed": failed,
+                })
+            else:
+                # Calls outside a document still count towards the run
+                _add_totals(self._run, entry)
+
+    def remaining_tokens(self, document: Optional[Dict] = None) -> Optional[int]:
+        """Tokens left in the document's budget (default: current document; None = unlimited)"""
+        if not self.token_budget:
+            return None
+        with self._lock:
+            doc = document if document is not None else self._document()
+            used = doc["total_tokens"] if doc else 0
+        return self.token_budget - used
+
+    def check_budget(self, document: Optional[Dict] = None):
+        """Raise TokenBudgetExceeded if the document (default: current) is over budget"""
+        remaining = self.remaining_tokens(document)
+        if remaining is not None and remaining <= 0:
+            raise TokenBudgetExceeded(
+                f"Document token budget exhausted ({self.token_budget} tokens)"
+            )
+
+    def generate(
+        self,
+        model: Any,
+        contents: Any,
+        generation_config: Dict,
+        request_class: str,
+        num_images: int = 0,
+        document: Optional[Dict] = None,
+    ) -> Any:
+        """
+        Call model.generate_content with budget enforcement and accounting.
+
+        The output token limit is lowered to whatever is left of the
+        document budget, so a runaway response cannot exceed it.
+
+        Args:
+            model: genai.GenerativeModel
+            contents: Prompt or list of prompt parts
+            generation_config: Generation config dict
+            request_class: Request class for hedging/latency ("vision", "docling", "chunk")
+            num_images: Number of images in contents (for token estimates)
+            document: Document to bill and budget (default: the calling thread's)
+
+        Returns:
+            Gemini response
+
+        Raises:
+            TokenBudgetExceeded: If the document budget is already used up
+        """
+        if document is None:
+            document = self._document()
+        self.check_budget(document)
+
+        config = generation_config
+        remaining = self.remaining_tokens(document)
+        if remaining is not None and remaining < config.get("max_output_tokens", remaining + 1):
+            config = {**generation_config, "max_output_tokens": remaining}
+
+        def _call():
+            start = time.time()
+            try:
+                response = model.generate_content(contents, generation_config=config)
+            except Exception:
+                self.record(_empty_totals(), request_class, time.time() - start, failed=True, document=document)
+                raise
+            self.record(usage_from_response(response, num_images), request_class, time.time() - start, document=document)
+            return response
+
+        return get_hedger().call(request_class, _call)
+
+    def run_summary(self) -> Dict:
+        """Usage totals for the whole run"""
+        with self._lock:
+            summary = _finalize(self._run)
+            summary["documents"] = len(self._documents)
+            summary["wall_seconds"] = time.time() - self._run_start
+        summary["cost_per_document_usd"] = (
+            summary["cost_usd"] / summary["documents"] if summary["documents"] else 0.0
+        )
+        return summary
+
+    def reset(self):
+        """Clear all accumulated usage"""
+        with self._lock:
+            self._run = _empty_totals()
+            self._documents = []
+            self._local.document = None
+            self._run_start = time.time()
+
+    def print_run_summary(self):
+        """Print token and cost totals for the run"""
+        s = self.run_summary()
+        print(f"\n💰 Token Usage & Cost:")
+        print(f"   Model calls: {s['calls']} ({s['failed_calls']} failed)")
+        print(f"   Prompt tokens: {s['prompt_tokens']:,} (images: {s['image_tokens']:,})")
+        print(f"   Output tokens: {s['output_tokens']:,}")
+        print(f"   Output speed: {s['output_tokens_per_second']:.1f} tokens/s")
+        print(f"   Total cost: ${s['cost_usd']:.4f} (${s['cost_per_document_usd']:.4f} per document)")
+
+
+# Global usage tracker instance
+_global_tracker = UsageTracker()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get the global usage tracker instance"""
+    return _global_tracker
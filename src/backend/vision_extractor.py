@@ -15,20 +15,28 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 try:
     from .pdf_cache import get_cache
+    from .pdf_optimizer import convert_pdf_pages, get_page_count
+    from .refiner import build_section_prompt
+    from .usage_tracker import get_usage_tracker, TokenBudgetExceeded
     from .config import (
         GEMINI_API_KEY,
         GEMINI_MODEL,
         MAX_RETRIES,
+        REFINE_DPI,
         TEMPERATURE,
         TOP_P,
         TOP_K,
     )
 except ImportError:
     from pdf_cache import get_cache
+    from pdf_optimizer import convert_pdf_pages, get_page_count
+    from refiner import build_section_prompt
+    from usage_tracker import get_usage_tracker, TokenBudgetExceeded
     from config import (
         GEMINI_API_KEY,
         GEMINI_MODEL,
         MAX_RETRIES,
+        REFINE_DPI,
         TEMPERATURE,
         TOP_P,
         TOP_K,
@@ -138,9 +146,12 @@ class VisionExtractor:
                             print(f"      📄 Added page {i + 1}/{len(images)}")
 
                     # Single API call with all images
-                    response = self.model.generate_content(
+                    response = get_usage_tracker().generate(
+                        self.model,
                         content,
-                        generation_config=self.generation_config,
+                        self.generation_config,
+                        "vision",
+                        num_images=len(images)
                     )
 
                     if response.candidates and response.candidates[0].content.parts:
@@ -156,6 +167,9 @@ class VisionExtractor:
                     else:
                         print(f"   ⚠️ Attempt {attempt + 1}: Response blocked")
 
+                except TokenBudgetExceeded as e:
+                    print(f"   🛑 {e} - aborting extraction")
+                    break
                 except Exception as e:
                     print(f"   ⚠️ Attempt {attempt + 1} error: {e}")
                     if attempt < MAX_RETRIES - 1:
@@ -171,6 +185,67 @@ class VisionExtractor:
             traceback.print_exc()
             return self._empty_structure()
 
+    def page_count(self, pdf_path: Path) -> int:
+        """Number of pages in the PDF"""
+        return get_page_count(pdf_path)
+
+    def extract_sections(
+        self,
+        pdf_path: Path,
+        section: str,
+        pages: List[int],
+        submitter_info: Dict,
+        nacc_detail: Dict,
+        enum_mappings: Dict
+    ) -> Optional[Dict]:
+        """
+        Re-extract one section from selected pages at higher DPI
+
+        Args:
+            pdf_path: Path to PDF file
+            section: Section to extract (e.g. "assets")
+            pages: 1-based page numbers containing the section
+            submitter_info: Basic submitter information
+            nacc_detail: NACC detail information
+            enum_mappings: Enum type mappings
+
+        Returns:
+            Dictionary with the section's keys, or None if extraction failed
+        """
+        try:
+            images = convert_pdf_pages(pdf_path, pages, dpi=REFINE_DPI)
+            content = [build_section_prompt(section, nacc_detail, pages, enum_mappings)] + images
+
+            for attempt in range(MAX_RETRIES):
+                try:
+                    response = get_usage_tracker().generate(
+                        self.model,
+                        content,
+                        self.generation_config,
+                        "refine",
+                        num_images=len(images)
+                    )
+
+                    if response.candidates and response.candidates[0].content.parts:
+                        data = self._parse_response(response.text)
+                        if data:
+                            return data
+                    else:
+                        print(f"      ⚠️ Refinement attempt {attempt + 1}: Response blocked")
+
+                except TokenBudgetExceeded as e:
+                    print(f"      🛑 {e} - skipping refinement")
+                    return None
+                except Exception as e:
+                    print(f"      ⚠️ Refinement attempt {attempt + 1} error: {e}")
+                    if attempt < MAX_RETRIES - 1:
+                        time.sleep(2 ** attempt)
+
+        except Exception as e:
+            print(f"      ❌ Section refinement failed: {e}")
+
+        return None
+
     def _build_vision_prompt(
         self,
         submitter_info: Dict,
@@ -0,0 +1,219 @@
+"""
+Work Queue - Durable SQLite task queue with leases for multi-worker runs
+
+A coordinator enqueues one task per document (main.py enqueue); any number
+of workers on any machine that sees the queue file pull tasks
+(main.py worker). A leased task belongs to its worker until the lease
+expires; workers renew it with heartbeats while a long document is being
+processed, and a task whose worker died goes back to the queue when its
+lease runs out. Failed tasks are retried up to QUEUE_MAX_ATTEMPTS times;
+documents that can't succeed (PDF or metadata missing) fail at once.
+
+Every worker process registers and gets a fresh slot number, used as its
+output directory and ID range (like a shard index) so worker outputs merge
+without collisions.
+"""
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    from .config import QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS
+except ImportError:
+    from config import QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    mode TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending | leased | done | failed
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL,
+    PRIMARY KEY (mode, doc_id)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (mode, status, lease_expires);
+CREATE TABLE IF NOT EXISTS workers (
+    slot INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    registered REAL
+);
+"""
+
+
+class WorkQueue:
+    """Lease-based document queue in one SQLite file"""
+
+    def __init__(
+        self,
+        path: Path,
+        lease_seconds: float = QUEUE_LEASE_SECONDS,
+        max_attempts: int = QUEUE_MAX_ATTEMPTS
+    ):
+        """
+        Open (or create) a queue
+
+        Args:
+            path: SQLite file (on storage every worker can reach)
+            lease_seconds: How long a task stays with a worker without a heartbeat
+            max_attempts: Leases per task before it is marked failed
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """One connection per operation - safe to use from heartbeat threads"""
+        conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def enqueue(self, mode: str, doc_ids: Iterable[int]) -> int:
+        """Add documents (already queued ones are left as they are); returns tasks added"""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (mode, doc_id, updated) VALUES (?, ?, ?)",
+                ((mode, int(doc_id), now) for doc_id in doc_ids)
+            )
+            return conn.total_changes - before
+
+    def register_worker(self, name: str) -> int:
+        """
+        New slot for a starting worker process.
+
+        Never reused (not even for a restarted worker of the same name), so a
+        worker's output directory and ID range can't clobber earlier ones.
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute("INSERT INTO workers (name, registered) VALUES (?, ?)", (name, time.time()))
+            return cursor.lastrowid
+
+    def lease(self, mode: str, worker: str) -> Optional[int]:
+        """
+        Take the next pending (or expired) task.
+
+        Returns:
+            doc_id, or None if nothing is available right now
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Workers that died on their last attempt
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired', updated = ? "
+                "WHERE mode = ? AND status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, mode, now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT doc_id FROM tasks WHERE mode = ? AND "
+                "(status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                "ORDER BY attempts, doc_id LIMIT 1",
+                (mode, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE mode = ? AND doc_id = ?",
+                (worker, now + self.lease_seconds, now, mode, row[0])
+            )
+            return row[0]
+
+    def heartbeat(self, mode: str, doc_id: int, worker: str) -> bool:
+        """Extend a lease; False if the task is no longer this worker's"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated = ? "
+                "WHERE mode = ? AND doc_id = ? AND worker = ? AND status = 'leased'",
+                (now + self.lease_seconds, now, mode, doc_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, mode: str, doc_id: int, worker: str) -> bool:
+        """Mark a leased task done; False if the lease had been lost"""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'done', lease_expires = NULL, error = NULL, updated = ? "
+                "WHERE mode = ? AND doc_id = ? AND worker = ? AND status = 'leased'",
+                (time.time(), mode, doc_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, mode: str, doc_id: int, worker: str, error: str = "", permanent: bool = False) -> bool:
+        """
+        Return a task for retry, or mark it failed after max_attempts
+        (at once if permanent); False if the lease had been lost
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = CASE WHEN ? OR attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_expires = NULL, error = ?, updated = ? "
+                "WHERE mode = ? AND doc_id = ? AND worker = ? AND status = 'leased'",
+                (permanent, self.max_attempts, error, time.time(), mode, doc_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def counts(self, mode: str) -> Dict[str, int]:
+        """Tasks per status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM tasks WHERE mode = ? GROUP BY status", (mode,))
+            counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+            counts.update(dict(rows.fetchall()))
+            return counts
+
+    @contextmanager
+    def keep_alive(self, mode: str, doc_id: int, worker: str):
+        """Heartbeat a lease from a background thread for the duration of the with-block"""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    if not self.heartbeat(mode, doc_id, worker):
+                        print(f"   ⚠️ Lease on doc {doc_id} lost")
+                        return
+                except sqlite3.Error as e:
+                    print(f"   ⚠️ Heartbeat failed for doc {doc_id}: {e}")
+
+        thread = threading.Thread(target=beat, name=f"heartbeat-{doc_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def print_stats(self, mode: str):
+        """Print queue progress"""
+        c = self.counts(mode)
+        print(f"\n📬 Work Queue ({self.path.name}, {mode}):")
+        print(f"   Done: {c['done']}, pending: {c['pending']}, leased: {c['leased']}, failed: {c['failed']}")
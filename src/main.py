@@ -7,6 +7,12 @@ Usage:
     python main.py --mode train --limit 5        # Process 5 training documents
     python main.py --mode test                   # Process all test documents
     python main.py --pdf path/to/file.pdf       # Process single PDF
+    python main.py --mode test --offline        # No API calls (Tesseract + pattern scanner)
+    python main.py --mode test --shard 0/4      # Process shard 0 of 4 (into output/test/shard-0-of-4)
+    python main.py merge --mode test            # Merge shard outputs into output/test
+    python main.py merge --mode test --sql-summary  # ...and write Test_summary.csv via validation_query.sql
+    python main.py enqueue --mode test          # Queue all test documents (coordinator)
+    python main.py worker --mode test           # Pull documents from the queue (any number of workers)
 """
 import argparse
 import os
@@ -18,7 +24,41 @@ from dotenv import load_dotenv
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.pipeline import Pipeline
-from backend.config import OUTPUT_DIR
+from backend.merge import find_shard_dirs, merge_shards
+from backend.work_queue import WorkQueue
+from backend.sql_sink import build_summary
+from backend.config import OUTPUT_DIR, USE_OFFLINE, WORK_QUEUE_FILE, SQL_SUMMARY
+
+
+def parse_shard(value: str):
+    """ "i/n" -> (i, n) with 0 <= i < n"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, got {value!r}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{count - 1}")
+    return index, count
+
+
+def run_merge(args):
+    """Merge shard outputs of a dataset (no extraction, no API key)"""
+    prefix = "Train_" if args.mode == "train" else "Test_"
+    dataset_dir = OUTPUT_DIR / args.mode
+    shard_dirs = [Path(d) for d in args.inputs] if args.inputs else find_shard_dirs(dataset_dir)
+    if not shard_dirs:
+        print(f"❌ No shard directories found in {dataset_dir}")
+        sys.exit(1)
+
+    output_dir = Path(args.output_dir) if args.output_dir else dataset_dir
+    merge_shards(shard_dirs, output_dir, prefix)
+    if args.sql_summary:
+        # Metadata only - no extraction, no API key
+        pipeline = Pipeline(use_imputation=not args.skip_imputation, use_offline=True)
+        metadata = pipeline.load_metadata(pipeline.dataset_paths(args.mode))
+        build_summary(output_dir, prefix, metadata.doc_info, metadata.submitter_info, metadata.nacc_detail)
+    print(f"\n✅ Merge complete!")
+    print(f"📁 Output directory: {output_dir}")
 
 
 def main():
@@ -27,6 +67,15 @@ def main():
         description="NACC Asset Declaration Digitization System"
     )
     
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["run", "merge", "enqueue", "worker"],
+        default="run",
+        help="run: extract documents (default); merge: combine shard/worker outputs; "
+             "enqueue: queue a dataset; worker: process queued documents"
+    )
+    
     parser.add_argument(
         "--mode",
         choices=["train", "test"],
@@ -57,15 +106,73 @@ def main():
         help="Skip data imputation step (not recommended)"
     )
     
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        default=USE_OFFLINE,
+        help="Offline extraction without Gemini (bulk triage, no API key needed)"
+    )
+    
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        help="Process only shard i of n (i/n, by doc_id) into its own output directory"
+    )
+    
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        help="Output directory (run: overrides the default; merge: where merged CSVs go)"
+    )
+    
+    parser.add_argument(
+        "--inputs",
+        nargs="+",
+        help="merge: shard/worker directories (default: output/<mode>/shard-*-of-* and worker-*)"
+    )
+    
+    parser.add_argument(
+        "--sql-summary",
+        action="store_true",
+        default=SQL_SUMMARY,
+        help="run/merge: also write <prefix>summary.csv by running data/validation_query.sql over the outputs"
+    )
+    
+    parser.add_argument(
+        "--queue",
+        type=str,
+        default=str(WORK_QUEUE_FILE),
+        help="enqueue/worker: SQLite queue file (on storage shared by all workers)"
+    )
+    
+    parser.add_argument(
+        "--worker-name",
+        type=str,
+        help="worker: label in the queue (default: hostname-pid)"
+    )
+    
     args = parser.parse_args()
     
+    if args.command != "run" and not args.mode:
+        parser.error(f"{args.command} needs --mode")
+    
+    if args.command == "merge":
+        run_merge(args)
+        return
+    
+    if args.command == "enqueue":
+        # Coordinator only reads metadata - no extraction, no API key
+        pipeline = Pipeline(use_imputation=not args.skip_imputation, use_offline=True)
+        pipeline.enqueue_dataset(WorkQueue(Path(args.queue)), mode=args.mode, limit=args.limit)
+        return
+    
     # Load environment variables
     load_dotenv()
     
     # Get API key
     api_key = args.api_key or os.getenv("GEMINI_API_KEY")
     
-    if not api_key:
+    if not api_key and not args.offline:
         print("❌ Error: GEMINI_API_KEY not found!")
         print("\nPlease either:")
         print("  1. Set environment variable: export GEMINI_API_KEY='your-key'")
@@ -78,11 +185,14 @@ def main():
     print("\n" + "="*60)
     print("🚀 NACC Asset Declaration Digitization System")
     print("="*60)
-    print(f"📌 Using Gemini 2.0 Flash")
-    print(f"🔑 API Key: {api_key[:10]}...")
+    if args.offline:
+        print(f"📌 Offline mode (no API calls)")
+    else:
+        print(f"📌 Using Gemini 2.0 Flash")
+        print(f"🔑 API Key: {api_key[:10]}...")
     
     try:
-        pipeline = Pipeline(api_key=api_key, use_imputation=not args.skip_imputation)
+        pipeline = Pipeline(api_key=api_key, use_imputation=not args.skip_imputation, use_offline=args.offline)
         
         if args.pdf:
             # Process single PDF
@@ -97,11 +207,25 @@ def main():
                 nacc_id=1
             )
             
+        elif args.command == "worker":
+            output_dir = pipeline.process_queue(
+                WorkQueue(Path(args.queue)),
+                mode=args.mode,
+                worker_name=args.worker_name,
+                output_dir=Path(args.output_dir) if args.output_dir else None
+            )
+            
+            print(f"\n✅ Queue drained!")
+            print(f"📁 Output directory: {output_dir}")
+            
         elif args.mode:
             # Process dataset
             output_dir = pipeline.process_dataset(
                 mode=args.mode,
-                limit=args.limit
+                limit=args.limit,
+                shard=args.shard,
+                output_dir=Path(args.output_dir) if args.output_dir else None,
+                sql_summary=args.sql_summary
             )
             
             print(f"\n✅ Processing complete!")